@@ -4,10 +4,77 @@ import os
 DB_PATH = os.getenv("DB_PATH", "data/seo_generator.db")
 TEMPLATES_DIR = os.getenv("TEMPLATES_DIR", "data/templates")
 
+# Prompts older than this many days are moved to monthly archive databases
+# by "manage.py archive"; the archive directory defaults to <db dir>/archive
+PROMPT_RETENTION_DAYS = int(os.getenv("PROMPT_RETENTION_DAYS", "180"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "")
+
+# Online backups - directory (defaults to <db dir>/backups), number kept,
+# pages copied per step, seconds slept between steps and the number of
+# times writers may restart a stepped copy before it finishes in one step
+BACKUP_DIR = os.getenv("BACKUP_DIR", "")
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "7"))
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+BACKUP_STEP_SLEEP = float(os.getenv("BACKUP_STEP_SLEEP", "0.01"))
+BACKUP_MAX_RESTARTS = int(os.getenv("BACKUP_MAX_RESTARTS", "3"))
+
+# Analytics read from a copy of the database refreshed once it is older
+# than this many seconds, so dashboard queries never share the live file
+# with generation writes (0 reads the live database)
+ANALYTICS_SNAPSHOT_MAX_AGE = float(os.getenv("ANALYTICS_SNAPSHOT_MAX_AGE", "30"))
+
+# Analytics datasets are loaded once per data version and shared by all
+# callbacks - memory budget in MB and seconds an entry is kept at most
+ANALYTICS_CACHE_MAX_MB = float(os.getenv("ANALYTICS_CACHE_MAX_MB", "64"))
+ANALYTICS_CACHE_TTL = float(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+
+# SQLite connection pool - connections kept per database, seconds to wait
+# for a free one and seconds before a connection is recycled
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_CONNECTION_MAX_LIFETIME = float(os.getenv("DB_CONNECTION_MAX_LIFETIME", "3600"))
+
+# SQLite pragmas applied to every pooled connection
+DB_JOURNAL_MODE = os.getenv("DB_JOURNAL_MODE", "WAL")
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "20000"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+
 # App Settings
 DEBUG = os.getenv("DEBUG", "True") == "True"
 APP_TITLE = "SEO Prompt Generator"
 APP_DESCRIPTION = "Generate optimized SEO prompts for content creation"
 
 # Default theme
-DEFAULT_THEME = "BOOTSTRAP"  # Options: BOOTSTRAP, CYBORG, DARKLY, etc.
\ No newline at end of file
+DEFAULT_THEME = "BOOTSTRAP"  # Options: BOOTSTRAP, CYBORG, DARKLY, etc.
+
+# Prompt persistence - sync, batched (wait for a group commit) or async
+# (fire-and-forget), plus queue bound, rows per transaction and batch wait
+PROMPT_WRITE_MODE = os.getenv("PROMPT_WRITE_MODE", "batched")
+PROMPT_WRITE_QUEUE_SIZE = int(os.getenv("PROMPT_WRITE_QUEUE_SIZE", "1000"))
+PROMPT_WRITE_BATCH_SIZE = int(os.getenv("PROMPT_WRITE_BATCH_SIZE", "100"))
+PROMPT_WRITE_FLUSH_INTERVAL = float(os.getenv("PROMPT_WRITE_FLUSH_INTERVAL", "0.05"))
+
+# Keyword usage - seconds usage counts are coalesced in memory before one
+# batched upsert, and pending keywords that force an early flush
+KEYWORD_FLUSH_INTERVAL = float(os.getenv("KEYWORD_FLUSH_INTERVAL", "5.0"))
+KEYWORD_MAX_PENDING = int(os.getenv("KEYWORD_MAX_PENDING", "1000"))
+
+# Template registry - seconds between disk change checks, optional watchdog watcher
+TEMPLATE_CHECK_INTERVAL = float(os.getenv("TEMPLATE_CHECK_INTERVAL", "2.0"))
+TEMPLATE_WATCHER = os.getenv("TEMPLATE_WATCHER", "False") == "True"
+TEMPLATE_JOURNAL_COMPACT_BYTES = int(os.getenv("TEMPLATE_JOURNAL_COMPACT_BYTES", str(1024 * 1024)))
+
+# Number of get_template() lookups cached, including unknown IDs
+TEMPLATE_LOOKUP_CACHE_SIZE = int(os.getenv("TEMPLATE_LOOKUP_CACHE_SIZE", "512"))
+
+# Number of compiled template bodies kept in memory
+TEMPLATE_RENDER_CACHE_SIZE = int(os.getenv("TEMPLATE_RENDER_CACHE_SIZE", "256"))
+
+# Bulk generation - worker processes (0 = one per CPU) and rows per chunk
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "0"))
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "200"))
+
+# Milliseconds the template store may add to a warm process start
+TEMPLATE_STARTUP_BUDGET_MS = float(os.getenv("TEMPLATE_STARTUP_BUDGET_MS", "50"))
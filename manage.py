@@ -0,0 +1,230 @@
+"""
+Command line tools for SEO Prompt Generator
+
+Usage:
+    python manage.py generate keywords.csv --template default --output prompts.jsonl
+    python manage.py backup --every 24
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Run in a fresh interpreter so the measurement includes the module import
+STARTUP_PROBE = """
+import json, time
+started = time.perf_counter()
+import utils.template_store as template_store
+import_ms = (time.perf_counter() - started) * 1000
+template_store.ensure_initialized()
+print(json.dumps({**template_store.get_startup_stats(), "import_ms": round(import_ms, 3)}))
+"""
+
+
+def cmd_generate(args):
+    """Bulk-generate prompts for a keyword CSV"""
+    from services.batch_service import (read_keyword_rows, count_jobs, generate_batch, JsonlWriter,
+                                        DatabaseWriter)
+
+    # Counting rows is a cheap extra pass that checks every row has a
+    # template before anything is written, and gives a meaningful progress line
+    try:
+        total = count_jobs(read_keyword_rows(args.csv_path), args.template)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+
+    if args.output:
+        writer = JsonlWriter(args.output)
+    else:
+        from utils.database import DatabaseManager
+        from config import DB_PATH
+        writer = DatabaseWriter(DatabaseManager(DB_PATH))
+
+    def report(progress):
+        print(f"\r{progress['completed']}/{progress['total']} prompts "
+              f"({progress['failed']} failed, {progress['prompts_per_second']:.0f}/s)",
+              end="", file=sys.stderr, flush=True)
+
+    try:
+        stats = generate_batch(read_keyword_rows(args.csv_path), args.template, writer,
+                               workers=args.workers, chunk_size=args.chunk_size, total=total,
+                               progress_callback=None if args.quiet else report)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"Generated {stats['completed'] - stats['failed']} prompts "
+          f"({stats['failed']} failed) in {stats['elapsed_seconds']:.1f}s "
+          f"- {stats['prompts_per_second']:.0f} prompts/s")
+    return 1 if stats["failed"] else 0
+
+
+def cmd_import_templates(args):
+    """Import data/templates and prompt_templates/ into the database"""
+    from utils.template_store import import_templates_to_db
+
+    result = import_templates_to_db()
+    print(f"Imported {result['imported']} of {result['found']} templates")
+    return 0
+
+
+def cmd_rebuild_rollups(args):
+    """Recompute the daily analytics rollup tables from the prompts table"""
+    from utils.database import DatabaseManager
+    from config import DB_PATH
+
+    rows = DatabaseManager(DB_PATH).rebuild_rollups()
+    for table, count in rows.items():
+        print(f"{table}: {count} rows")
+    return 0
+
+
+def cmd_archive(args):
+    """Move old prompts into monthly archive databases"""
+    from utils.database import DatabaseManager
+    from config import DB_PATH, PROMPT_RETENTION_DAYS
+
+    days = args.older_than_days if args.older_than_days is not None else PROMPT_RETENTION_DAYS
+    db_manager = DatabaseManager(DB_PATH)
+    archived = db_manager.archive_prompts(older_than_days=days)
+    for month, count in archived.items():
+        print(f"{month}: {count} prompts archived")
+    print(f"Archived {sum(archived.values())} prompts older than {days} days to {db_manager.archive_dir}")
+    return 0
+
+
+def _format_size(size_bytes):
+    return f"{size_bytes / (1024 * 1024):.1f} MB"
+
+
+def cmd_backup(args):
+    """Back up the database online, once or every few hours"""
+    import time
+    from services.backup_service import run_backup
+
+    while True:
+        result = run_backup(keep=args.keep)
+        print(f"Backed up to {result['path']} ({_format_size(result['size_bytes'])}) "
+              f"in {result['duration_seconds']:.2f}s")
+        for path in result["removed"]:
+            print(f"Removed old backup {path}")
+        if not args.every:
+            return 0
+        time.sleep(args.every * 3600)
+
+
+def cmd_list_backups(args):
+    """List the available backups"""
+    from services.backup_service import get_backups, backup_dir
+
+    backups = get_backups()
+    if not backups:
+        print(f"No backups in {backup_dir}")
+    for backup in backups:
+        print(f"{backup['name']}  {_format_size(backup['size_bytes'])}  {backup['created']}")
+    return 0
+
+
+def cmd_restore(args):
+    """Restore a verified backup over the live database"""
+    from services.backup_service import restore_backup
+
+    if not args.yes:
+        answer = input(f"Replace the current database with {args.backup}? [y/N] ")
+        if answer.strip().lower() not in ("y", "yes"):
+            print("Restore cancelled")
+            return 1
+    try:
+        result = restore_backup(args.backup)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    print(f"Restored {args.backup} ({_format_size(result['size_bytes'])}) in {result['duration_seconds']:.2f}s; "
+          f"previous database saved as {result['safety_backup']}")
+    return 0
+
+
+def cmd_startup_budget(args):
+    """Measure how many milliseconds the template store adds to startup"""
+    from config import TEMPLATE_STARTUP_BUDGET_MS
+
+    budget = args.budget_ms if args.budget_ms is not None else TEMPLATE_STARTUP_BUDGET_MS
+    runs = []
+    for _ in range(args.runs):
+        # From the project directory, so the probe imports this checkout
+        output = subprocess.run([sys.executable, "-c", STARTUP_PROBE], check=True,
+                                capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    for number, run in enumerate(runs, start=1):
+        total = run["import_ms"] + run["init_ms"]
+        state = "skipped (stamp matched)" if run["init_skipped"] else "ran"
+        print(f"run {number}: import {run['import_ms']:.1f} ms + init {run['init_ms']:.1f} ms "
+              f"= {total:.1f} ms, initialization {state}")
+
+    # The first run may have to initialize; the budget applies to warm starts
+    warm = runs[-1]["import_ms"] + runs[-1]["init_ms"]
+    print(f"warm start: {warm:.1f} ms (budget {budget:.1f} ms)")
+    return 0 if warm <= budget else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="SEO Prompt Generator command line tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate = subparsers.add_parser("generate", help="Bulk-generate prompts from a keyword CSV")
+    generate.add_argument("csv_path", help="CSV file with a primary_keyword column")
+    generate.add_argument("--template", action="append", default=[],
+                          help="Template ID to generate against (repeatable)")
+    generate.add_argument("--output", help="Write JSON Lines here instead of the prompts table")
+    generate.add_argument("--workers", type=int, help="Worker processes (1 = no pool)")
+    generate.add_argument("--chunk-size", type=int, help="Rows per worker chunk and transaction")
+    generate.add_argument("--quiet", action="store_true", help="Don't print progress")
+    generate.set_defaults(func=cmd_generate)
+
+    import_templates = subparsers.add_parser("import-templates",
+                                             help="Import template files into the database")
+    import_templates.set_defaults(func=cmd_import_templates)
+
+    rollups = subparsers.add_parser("rebuild-rollups",
+                                    help="Recompute the daily analytics rollup tables")
+    rollups.set_defaults(func=cmd_rebuild_rollups)
+
+    archive = subparsers.add_parser("archive", help="Move old prompts into monthly archive databases")
+    archive.add_argument("--older-than-days", type=int,
+                         help="Archive prompts older than this (default PROMPT_RETENTION_DAYS)")
+    archive.set_defaults(func=cmd_archive)
+
+    backup = subparsers.add_parser("backup", help="Back up the database without stopping the app")
+    backup.add_argument("--keep", type=int, help="Backups to keep (default BACKUP_KEEP, 0 keeps all)")
+    backup.add_argument("--every", type=float, help="Keep running and back up every this many hours")
+    backup.set_defaults(func=cmd_backup)
+
+    list_backups = subparsers.add_parser("list-backups", help="List the available backups")
+    list_backups.set_defaults(func=cmd_list_backups)
+
+    restore = subparsers.add_parser("restore", help="Restore a backup over the live database")
+    restore.add_argument("backup", help="Backup file name (see list-backups) or path")
+    restore.add_argument("--yes", action="store_true", help="Don't ask for confirmation")
+    restore.set_defaults(func=cmd_restore)
+
+    startup = subparsers.add_parser("startup-budget",
+                                    help="Measure what the template store adds to startup time")
+    startup.add_argument("--runs", type=int, default=3, help="Fresh interpreters to measure")
+    startup.add_argument("--budget-ms", type=float, help="Fail above this many milliseconds")
+    startup.set_defaults(func=cmd_startup_budget)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 import dash
-from dash import dcc, html, Input, Output, callback
+from dash import dcc, html, Input, Output, State, callback
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 import pandas as pd
 import plotly.express as px
@@ -9,6 +10,11 @@ from datetime import datetime, timedelta
 # Register the page
 dash.register_page(__name__, path='/analytics', title='Analytics - SEO Prompt Generator')
 
+# Tab IDs - each tab's figures are only computed while it is active
+PROMPT_USAGE_TAB = "prompt-usage"
+TEMPLATE_PERFORMANCE_TAB = "template-performance"
+KEYWORD_TRENDS_TAB = "keyword-trends"
+
 def layout():
     """
     Main layout for the analytics dashboard
@@ -17,13 +23,48 @@ def layout():
         html.H1("Analytics Dashboard", className="page-header"),
         html.P("View performance metrics for your SEO prompt generator", className="lead mb-4"),
         
+        # Data version read on each tab switch, and the version each tab's
+        # figures were last rendered with
+        dcc.Store(id="analytics-data-version"),
+        dcc.Store(id=rendered_store_id(PROMPT_USAGE_TAB)),
+        dcc.Store(id=rendered_store_id(TEMPLATE_PERFORMANCE_TAB)),
+        dcc.Store(id=rendered_store_id(KEYWORD_TRENDS_TAB)),
+        
         dbc.Tabs([
-            dbc.Tab([render_prompt_usage_content()], label="Prompt Usage"),
-            dbc.Tab([render_template_performance_content()], label="Template Performance"),
-            dbc.Tab([render_keyword_trends_content()], label="Keyword Trends")
-        ], id="analytics-tabs")
+            dbc.Tab([render_prompt_usage_content()], label="Prompt Usage", tab_id=PROMPT_USAGE_TAB),
+            dbc.Tab([render_template_performance_content()], label="Template Performance",
+                    tab_id=TEMPLATE_PERFORMANCE_TAB),
+            dbc.Tab([render_keyword_trends_content()], label="Keyword Trends", tab_id=KEYWORD_TRENDS_TAB)
+        ], id="analytics-tabs", active_tab=PROMPT_USAGE_TAB)
     ])
 
+def rendered_store_id(tab_id):
+    """ID of the store holding the data version a tab was rendered with"""
+    return f"analytics-rendered-{tab_id}"
+
+@callback(
+    Output("analytics-data-version", "data"),
+    [Input("analytics-tabs", "active_tab")]
+)
+def update_data_version(active_tab):
+    """Read the data version once per tab switch; the tab callbacks use it"""
+    from services.analytics_service import get_data_version
+    version = get_data_version()
+    return list(version) if version is not None else None
+
+def skip_unless_needed(tab_id, active_tab, version, rendered_version):
+    """
+    Stop a tab's callback unless the tab is active and its figures are
+    missing or older than the data
+    
+    Figures of tabs already shown stay in the browser, so switching back to
+    a tab costs nothing until new prompts arrive.
+    """
+    if active_tab != tab_id:
+        raise PreventUpdate
+    if version is not None and rendered_version == version:
+        raise PreventUpdate
+
 def render_prompt_usage_content():
     """
     Content for prompt usage tab
@@ -125,10 +166,28 @@ def render_keyword_trends_content():
     [Output("total-prompts-metric", "children"),
      Output("unique-keywords-metric", "children"),
      Output("categories-metric", "children"),
-     Output("weekly-trend-metric", "children")],
-    [Input("analytics-tabs", "active_tab")]
+     Output("weekly-trend-metric", "children"),
+     Output("prompt-time-chart", "figure"),
+     Output("category-distribution-chart", "figure"),
+     Output("recent-prompts-table", "children"),
+     Output(rendered_store_id(PROMPT_USAGE_TAB), "data")],
+    [Input("analytics-data-version", "data")],
+    [State("analytics-tabs", "active_tab"),
+     State(rendered_store_id(PROMPT_USAGE_TAB), "data")],
+    prevent_initial_call=True
 )
-def update_prompt_metrics(active_tab):
+def update_prompt_usage_tab(version, active_tab, rendered_version):
+    """Render the prompt usage tab and record the data version it shows"""
+    skip_unless_needed(PROMPT_USAGE_TAB, active_tab, version, rendered_version)
+    return (
+        *update_prompt_metrics(),
+        update_prompt_time_chart(),
+        update_category_chart(),
+        update_recent_prompts_table(),
+        version
+    )
+
+def update_prompt_metrics():
     """Update the prompt usage metric cards"""
     # In a real implementation, this would fetch data from the database
     # Here we're using sample data for illustration
@@ -149,11 +208,7 @@ def update_prompt_metrics(active_tab):
         trend_display
     )
 
-@callback(
-    Output("prompt-time-chart", "figure"),
-    [Input("analytics-tabs", "active_tab")]
-)
-def update_prompt_time_chart(active_tab):
+def update_prompt_time_chart():
     """Update the prompt generation over time chart"""
     # In a real implementation, fetch this data from the database
     
@@ -179,11 +234,7 @@ def update_prompt_time_chart(active_tab):
     
     return fig
 
-@callback(
-    Output("category-distribution-chart", "figure"),
-    [Input("analytics-tabs", "active_tab")]
-)
-def update_category_chart(active_tab):
+def update_category_chart():
     """Update the category distribution chart"""
     # In a real implementation, fetch this data from the database
     
@@ -209,11 +260,7 @@ def update_category_chart(active_tab):
     
     return fig
 
-@callback(
-    Output("recent-prompts-table", "children"),
-    [Input("analytics-tabs", "active_tab")]
-)
-def update_recent_prompts_table(active_tab):
+def update_recent_prompts_table():
     """Update the recent prompts table"""
     # In a real implementation, fetch this data from the database
     
@@ -258,10 +305,26 @@ def update_recent_prompts_table(active_tab):
 
 # Callbacks for Template Performance tab
 @callback(
-    Output("template-usage-chart", "figure"),
-    [Input("analytics-tabs", "active_tab")]
+    [Output("template-usage-chart", "figure"),
+     Output("template-time-chart", "figure"),
+     Output("template-metrics-table", "children"),
+     Output(rendered_store_id(TEMPLATE_PERFORMANCE_TAB), "data")],
+    [Input("analytics-data-version", "data")],
+    [State("analytics-tabs", "active_tab"),
+     State(rendered_store_id(TEMPLATE_PERFORMANCE_TAB), "data")],
+    prevent_initial_call=True
 )
-def update_template_usage_chart(active_tab):
+def update_template_performance_tab(version, active_tab, rendered_version):
+    """Render the template performance tab and record the data version it shows"""
+    skip_unless_needed(TEMPLATE_PERFORMANCE_TAB, active_tab, version, rendered_version)
+    return (
+        update_template_usage_chart(),
+        update_template_time_chart(),
+        update_template_metrics_table(),
+        version
+    )
+
+def update_template_usage_chart():
     """Update the template usage comparison chart"""
     
     from services.analytics_service import get_template_usage
@@ -302,11 +365,7 @@ def update_template_usage_chart(active_tab):
     
     return fig
 
-@callback(
-    Output("template-time-chart", "figure"),
-    [Input("analytics-tabs", "active_tab")]
-)
-def update_template_time_chart(active_tab):
+def update_template_time_chart():
     """Update the template usage over time chart"""
     
     from services.analytics_service import get_template_time_data
@@ -349,11 +408,7 @@ def update_template_time_chart(active_tab):
     
     return fig
 
-@callback(
-    Output("template-metrics-table", "children"),
-    [Input("analytics-tabs", "active_tab")]
-)
-def update_template_metrics_table(active_tab):
+def update_template_metrics_table():
     """Update the template metrics table"""
     
     from services.analytics_service import get_template_metrics
@@ -395,10 +450,26 @@ def update_template_metrics_table(active_tab):
 
 # Callbacks for Keyword Trends tab
 @callback(
-    Output("top-keywords-chart", "figure"),
-    [Input("analytics-tabs", "active_tab")]
+    [Output("top-keywords-chart", "figure"),
+     Output("keyword-category-chart", "figure"),
+     Output("keyword-trends-chart", "figure"),
+     Output(rendered_store_id(KEYWORD_TRENDS_TAB), "data")],
+    [Input("analytics-data-version", "data")],
+    [State("analytics-tabs", "active_tab"),
+     State(rendered_store_id(KEYWORD_TRENDS_TAB), "data")],
+    prevent_initial_call=True
 )
-def update_top_keywords_chart(active_tab):
+def update_keyword_trends_tab(version, active_tab, rendered_version):
+    """Render the keyword trends tab and record the data version it shows"""
+    skip_unless_needed(KEYWORD_TRENDS_TAB, active_tab, version, rendered_version)
+    return (
+        update_top_keywords_chart(),
+        update_keyword_category_chart(),
+        update_keyword_trends_chart(),
+        version
+    )
+
+def update_top_keywords_chart():
     """Update the top keywords chart"""
     
     from services.analytics_service import get_top_keywords
@@ -439,11 +510,7 @@ def update_top_keywords_chart(active_tab):
     
     return fig
 
-@callback(
-    Output("keyword-category-chart", "figure"),
-    [Input("analytics-tabs", "active_tab")]
-)
-def update_keyword_category_chart(active_tab):
+def update_keyword_category_chart():
     """Update the keyword usage by category chart"""
     
     from services.analytics_service import get_keyword_category_data
@@ -486,11 +553,7 @@ def update_keyword_category_chart(active_tab):
     
     return fig
 
-@callback(
-    Output("keyword-trends-chart", "figure"),
-    [Input("analytics-tabs", "active_tab")]
-)
-def update_keyword_trends_chart(active_tab):
+def update_keyword_trends_chart():
     """Update the keyword trends over time chart"""
     
     from services.analytics_service import get_keyword_trends_data
@@ -4,10 +4,11 @@ import dash_bootstrap_components as dbc
 import pandas as pd
 import re
 import json
-from datetime import date
 
 from services.template_service import get_template, get_template_list, get_templates_by_category, save_prompt_generation
-from utils.template_store import get_all_categories
+from services.prompt_service import build_prompt
+from utils.template_store import get_all_categories, search_templates
+from utils.template_renderer import get_manifest
 
 # Register the page
 dash.register_page(__name__, path='/generator', title='Generate Prompts - SEO Prompt Generator')
@@ -22,6 +23,20 @@ def layout():
         html.Div([
             html.H2("Step 1: Select Template", className="mb-3"),
             
+            # Template search
+            dbc.Row([
+                dbc.Col([
+                    html.Label("Search Templates"),
+                    dbc.Input(
+                        id="template-search",
+                        type="search",
+                        placeholder="Search by name, intent, tone, schema or content...",
+                        debounce=True,
+                        className="mb-3"
+                    )
+                ], width=12)
+            ]),
+            
             # Template category and selection
             dbc.Row([
                 dbc.Col([
@@ -60,10 +75,16 @@ def layout():
 
 @callback(
     Output("template-selector", "options"),
-    [Input("category-selector", "value")]
+    [Input("category-selector", "value"),
+     Input("template-search", "value")]
 )
-def update_template_options(selected_category):
-    """Update template options based on selected category"""
+def update_template_options(selected_category, search_query):
+    """Update template options based on the search query or the selected category"""
+    if search_query and search_query.strip():
+        matches = search_templates(search_query, page=1, page_size=50)["results"]
+        return [{"label": f"{template['name']} ({template['category']})", "value": template["id"]}
+                for template in matches]
+    
     if not selected_category:
         return []
     
@@ -374,12 +395,11 @@ def render_prompt_form(template_id):
     return form
 
 def render_template_fields(template):
-    """Render template-specific fields"""
-    if 'fields' not in template or not template['fields']:
+    """Render template-specific fields from the template's manifest"""
+    fields = get_manifest(template)["fields"]
+    if not fields:
         return html.Div()  # No fields to render
     
-    fields = template['fields']
-    
     return html.Div([
         html.H4("Template-Specific Fields", className="mt-4 mb-3"),
         
@@ -479,133 +499,41 @@ def generate_prompt(n_clicks, template_id, source_link, reference_content, prima
         field_name = field_id["name"]
         template_fields[field_name] = field_value
     
-    # Source input - use the link if provided, otherwise use the content
-    source_input = source_link if source_link else reference_content
-    
-    # Format secondary keywords
-    secondary_kw_text = ", ".join(secondary_keywords) if secondary_keywords else ""
-    
-    # Get current date
-    current_date = date.today().strftime("%Y-%m-%d")
-    current_year = date.today().year
-    
-    # Start with the template content
-    prompt_template = template["template"]
-    
-    # If tone isn't already in the template and it's different, add it
-    default_tone = template.get("tone", "Professional")
-    if content_tone != default_tone and "Tone:" in prompt_template:
-        prompt_template = prompt_template.replace(
-            f"Tone: {default_tone}", f"Tone: {content_tone}"
-        )
-    
-    # Build the replacements dictionary
-    replacements = {
-        "{source_link}": source_input or "",
-        "{primary_keyword}": primary_keyword,
-        "{secondary_keywords}": secondary_kw_text,
-        "{target_audience}": target_audience,
-        "{target_location}": target_location,
-        "{update_frequency}": update_frequency,
-        "{current_date}": current_date,
-        "{current_year}": str(current_year),
-        "{word_count}": str(word_count),
-        "{tone}": content_tone,
-        "{reading_level}": reading_level,
-    }
-    
-    # Add template-specific field replacements
-    for field_name, field_value in template_fields.items():
-        replacements[f"{{{field_name}}}"] = field_value or ""
-    
-    # Apply all replacements
-    prompt = prompt_template
-    for key, value in replacements.items():
-        if value:  # Only replace if value is not empty
-            prompt = prompt.replace(key, value)
-    
-    # Handle optional sections
-    if not include_faq and "FAQ Section" in prompt:
-        # Try to remove FAQ section without breaking the prompt
-        faq_lines = []
-        lines = prompt.split("\n")
-        in_faq_section = False
-        
-        for i, line in enumerate(lines):
-            if "FAQ Section" in line or "FAQ:" in line:
-                in_faq_section = True
-            elif (
-                in_faq_section
-                and line.strip()
-                and (line.startswith("#") or line.startswith("##"))
-            ):
-                in_faq_section = False
-                
-            if in_faq_section:
-                faq_lines.append(i)
-                
-        # Remove FAQ lines
-        if faq_lines:
-            prompt = "\n".join(
-                [line for i, line in enumerate(lines) if i not in faq_lines]
-            )
-    
-    # Add meta tags generation if requested
-    if include_meta and "Meta title" not in prompt and "Meta description" not in prompt:
-        prompt += "\n\n## Generate Meta Tags\n"
-        prompt += "- Title Tag (50-60 characters)\n"
-        prompt += "- Meta Description (150-160 characters)\n"
-        
-    # Add schema recommendation if requested
-    schema_type = template.get("schema", "Article")
-    if include_schema and "Schema markup" not in prompt:
-        prompt += f"\n\n## Schema Markup\nRecommend appropriate schema.org markup for this {schema_type} content.\n"
-        
-    # Add target location if provided
-    if target_location and target_location != "Other":
-        prompt += f"\n\n## Location Targeting\nThis content targets audiences in {target_location}. Include location-specific information and keywords where relevant.\n"
-        
-    # Add reading level guidance
-    if reading_level and reading_level != "General":
-        prompt += f"\n\n## Reading Level\nContent should be written at a {reading_level} reading level appropriate for the target audience.\n"
-        
-    # Add image prompt generation if requested
-    if generate_image_prompt:
-        prompt += "\n\n## Image Suggestions\n"
-        prompt += "- Suggest 3-5 image ideas that would enhance this content\n"
-        prompt += "- Provide SEO-optimized alt text for each image\n"
-        prompt += "- Recommend image types (e.g., infographic, hero image, screenshot)\n"
-        
-    # Add URL slug generation if requested
-    if url_slug:
-        prompt += "\n\n## URL Slug\nGenerate an SEO-friendly URL slug for this content.\n"
-        
-    # Add tags generation if requested
-    if tags:
-        prompt += "\n\n## Content Tags\nSuggest 5-10 tags for categorizing this content.\n"
-        
-    # Add external references if requested
-    if external_references:
-        prompt += "\n\n## External References\nSuggest 3-5 authoritative external sources that could be referenced in this content.\n"
-        
-    # Add internal linking suggestions if requested
-    if internal_linking:
-        prompt += "\n\n## Internal Linking Opportunities\nSuggest topics or content types on the same site that should link to or from this content.\n"
-        
-    # Add featured snippet optimization if requested
-    if featured_snippet:
-        prompt += "\n\n## Featured Snippet Optimization\n"
-        prompt += "- Format a section of this content to be eligible for a featured snippet\n"
-        prompt += "- Include a clear definition, list, or table that directly answers a common question\n"
-        prompt += "- Optimize for 'People Also Ask' opportunities\n"
-        
-    # Add update notes if provided
-    if update_notes:
-        prompt += f"\n\n## Content Update Strategy\n{update_notes}\n"
-        
-    # Add social media suggestion section
-    prompt += "\n\n## Social Media Content\n"
-    prompt += "Generate social media post ideas for LinkedIn, Instagram, and other recommended platforms based on this content.\n"
+    # Check required template fields against the manifest
+    manifest_fields = get_manifest(template)["fields"]
+    missing_required = [
+        field_config.get("label", field_name)
+        for field_name, field_config in manifest_fields.items()
+        if field_config.get("required") and not template_fields.get(field_name)
+    ]
+    if missing_required:
+        return dbc.Alert("Required fields are empty: " + ", ".join(missing_required), color="danger")
+    
+    # Build the prompt with the shared generation logic
+    result = build_prompt(
+        template_id, template, primary_keyword,
+        source_link=source_link,
+        reference_content=reference_content,
+        secondary_keywords=secondary_keywords,
+        target_audience=target_audience,
+        target_location=target_location,
+        reading_level=reading_level,
+        update_frequency=update_frequency,
+        word_count=word_count,
+        content_tone=content_tone,
+        include_faq=include_faq,
+        include_meta=include_meta,
+        include_schema=include_schema,
+        generate_image_prompt=generate_image_prompt,
+        url_slug=url_slug,
+        tags=tags,
+        external_references=external_references,
+        internal_linking=internal_linking,
+        featured_snippet=featured_snippet,
+        update_notes=update_notes,
+        template_fields=template_fields
+    )
+    prompt = result["prompt"]
     
     # Save the prompt to database
     save_prompt_generation(
@@ -613,18 +541,34 @@ def generate_prompt(n_clicks, template_id, source_link, reference_content, prima
         primary_keyword,
         template.get("category", "General"),
         target_audience,
-        secondary_kw_text,
+        result["secondary_keywords"],
         prompt
     )
     
     # Return the generated prompt with tabs for different views
-    return render_generated_prompt(prompt, primary_keyword)
+    return render_generated_prompt(prompt, primary_keyword, result["missing_fields"], result["unknown_fields"])
 
-def render_generated_prompt(prompt, primary_keyword):
+def render_field_warnings(missing_fields, unknown_fields):
+    """Render a warning for placeholders left empty and fields the template doesn't use"""
+    messages = []
+    if missing_fields:
+        messages.append(html.P("Placeholders left unfilled: " + ", ".join(f"{{{field}}}" for field in missing_fields)))
+    if unknown_fields:
+        messages.append(html.P("Fields not used by this template: " + ", ".join(unknown_fields)))
+    
+    if not messages:
+        return html.Div()
+    
+    return dbc.Alert(messages, color="warning", className="mb-3")
+
+def render_generated_prompt(prompt, primary_keyword, missing_fields=None, unknown_fields=None):
     """Render the generated prompt with tabs for editing, preview, and analysis"""
     return html.Div([
         html.H2("Generated SEO Prompt", className="mt-4 mb-3"),
         
+        # Placeholder report from the template renderer
+        render_field_warnings(missing_fields or [], unknown_fields or []),
+        
         # Create tabs for different views
         dbc.Tabs([
             # Edit & Copy tab
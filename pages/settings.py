@@ -0,0 +1,154 @@
+import dash
+from dash import dcc, html, Input, Output, State, callback
+import dash_bootstrap_components as dbc
+
+from services.backup_service import (run_backup, get_backups, restore_backup, get_backup_interval,
+                                     set_backup_interval, start_scheduler)
+
+# Register the page
+dash.register_page(__name__, path='/settings', title='Settings - SEO Prompt Generator')
+
+# Resume scheduled backups if they were turned on
+if get_backup_interval() > 0:
+    start_scheduler()
+
+SCHEDULE_OPTIONS = [
+    {"label": "Off", "value": 0},
+    {"label": "Every 6 hours", "value": 6},
+    {"label": "Every 12 hours", "value": 12},
+    {"label": "Daily", "value": 24},
+    {"label": "Weekly", "value": 168},
+]
+
+def layout():
+    """
+    Main layout for the settings page
+    """
+    return html.Div([
+        html.H1("Settings", className="page-header"),
+        html.P("Manage database backups", className="lead mb-4"),
+
+        dbc.Card([
+            dbc.CardHeader(html.H4("Backups", className="mb-0")),
+            dbc.CardBody([
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Label("Scheduled backups"),
+                        dcc.Dropdown(
+                            id="backup-schedule",
+                            options=SCHEDULE_OPTIONS,
+                            value=get_backup_interval(),
+                            clearable=False
+                        )
+                    ], width=4),
+                    dbc.Col([
+                        dbc.Button("Back Up Now", id="backup-now-btn", color="primary", className="mt-4")
+                    ], width=4)
+                ], className="mb-3"),
+
+                dcc.Loading(html.Div(id="backup-status")),
+
+                html.H5("Available Backups", className="mt-4 mb-3"),
+                html.Div(id="backup-list", children=render_backup_list()),
+
+                html.H5("Restore", className="mt-4 mb-3"),
+                dbc.Row([
+                    dbc.Col([
+                        dcc.Dropdown(id="restore-backup-selector", options=backup_options(),
+                                     placeholder="Select a backup to restore")
+                    ], width=8),
+                    dbc.Col([
+                        dbc.Button("Restore", id="restore-btn", color="danger")
+                    ], width=4)
+                ]),
+                dcc.ConfirmDialog(
+                    id="restore-confirm",
+                    message="Replace the current database with this backup? "
+                            "A safety backup of the current database is taken first."
+                ),
+                dcc.Loading(html.Div(id="restore-status", className="mt-3"))
+            ])
+        ])
+    ])
+
+def format_size(size_bytes):
+    """Format a byte count as megabytes"""
+    return f"{size_bytes / (1024 * 1024):.1f} MB"
+
+def backup_options():
+    """Dropdown options for the available backups"""
+    return [{"label": f"{backup['created']} ({format_size(backup['size_bytes'])})", "value": backup["name"]}
+            for backup in get_backups()]
+
+def render_backup_list():
+    """Render the table of available backups"""
+    backups = get_backups()
+    if not backups:
+        return html.P("No backups yet.", className="text-muted")
+
+    return dbc.Table([
+        html.Thead(html.Tr([html.Th("File"), html.Th("Created"), html.Th("Size")])),
+        html.Tbody([
+            html.Tr([html.Td(backup["name"]), html.Td(backup["created"]), html.Td(format_size(backup["size_bytes"]))])
+            for backup in backups
+        ])
+    ], bordered=True, hover=True, responsive=True, striped=True, size="sm")
+
+@callback(
+    Output("backup-status", "children", allow_duplicate=True),
+    Input("backup-schedule", "value"),
+    prevent_initial_call=True
+)
+def update_backup_schedule(hours):
+    """Save the backup schedule"""
+    set_backup_interval(hours)
+    if not hours:
+        return dbc.Alert("Scheduled backups are off", color="secondary", duration=4000)
+    return dbc.Alert(f"Backups will run every {hours:g} hours", color="info", duration=4000)
+
+@callback(
+    [Output("backup-status", "children"),
+     Output("backup-list", "children"),
+     Output("restore-backup-selector", "options")],
+    Input("backup-now-btn", "n_clicks"),
+    prevent_initial_call=True
+)
+def backup_now(n_clicks):
+    """Run an online backup"""
+    try:
+        result = run_backup()
+    except Exception as e:
+        return dbc.Alert(f"Backup failed: {str(e)}", color="danger"), dash.no_update, dash.no_update
+
+    message = (f"Backed up {format_size(result['size_bytes'])} in {result['duration_seconds']:.2f}s"
+               + (f", removed {len(result['removed'])} old backup(s)" if result["removed"] else ""))
+    return dbc.Alert(message, color="success"), render_backup_list(), backup_options()
+
+@callback(
+    Output("restore-confirm", "displayed"),
+    Input("restore-btn", "n_clicks"),
+    State("restore-backup-selector", "value"),
+    prevent_initial_call=True
+)
+def confirm_restore(n_clicks, backup_name):
+    """Ask for confirmation before restoring"""
+    return bool(backup_name)
+
+@callback(
+    [Output("restore-status", "children"),
+     Output("backup-list", "children", allow_duplicate=True),
+     Output("restore-backup-selector", "options", allow_duplicate=True)],
+    Input("restore-confirm", "submit_n_clicks"),
+    State("restore-backup-selector", "value"),
+    prevent_initial_call=True
+)
+def restore(submit_n_clicks, backup_name):
+    """Restore the selected backup after it has been verified"""
+    try:
+        result = restore_backup(backup_name)
+    except Exception as e:
+        return dbc.Alert(f"Restore failed: {str(e)}", color="danger"), dash.no_update, dash.no_update
+
+    return (dbc.Alert(f"Restored {backup_name} in {result['duration_seconds']:.2f}s. "
+                      f"The previous database was saved as a backup.", color="success"),
+            render_backup_list(), backup_options())
@@ -4,11 +4,57 @@ Handles data processing for analytics dashboard
 """
 import pandas as pd
 from datetime import datetime, timedelta
-from utils.database import DatabaseManager
-from config import DB_PATH
+from utils.database import DatabaseManager, SnapshotDatabaseManager
+from utils.analytics_cache import DatasetCache
+from utils.analytics_aggregates import IncrementalAggregator
+from config import DB_PATH, ANALYTICS_SNAPSHOT_MAX_AGE, ANALYTICS_CACHE_MAX_MB, ANALYTICS_CACHE_TTL
 
-# Initialize the database manager
-db_manager = DatabaseManager(DB_PATH)
+# Initialize the database manager; dashboard queries read a snapshot of the
+# database so they don't contend with prompt generation writes
+db_manager = DatabaseManager(DB_PATH).snapshot(ANALYTICS_SNAPSHOT_MAX_AGE)
+
+# Datasets shared by every analytics callback until the data changes
+dataset_cache = DatasetCache(db_manager.get_data_version,
+                             max_bytes=int(ANALYTICS_CACHE_MAX_MB * 1024 * 1024),
+                             ttl=ANALYTICS_CACHE_TTL)
+
+# Prompt counters advanced with the prompts added since the last refresh
+aggregator = IncrementalAggregator(db_manager)
+
+def get_aggregates():
+    """Get the prompt aggregates, brought up to date with the database"""
+    aggregator.refresh()
+    return aggregator
+
+def get_data_version():
+    """Get the version of the data the analytics datasets are cached under"""
+    return db_manager.get_data_version()
+
+def get_daily_counts(dimension):
+    """Daily counts of a dimension (template, category or keyword)"""
+    return get_aggregates().daily_counts(dimension)
+
+def get_primary_keywords():
+    """Cached primary keywords, most used first"""
+    return dataset_cache.get("primary_keywords", lambda: db_manager.get_keywords_by_type("primary"))
+
+def get_template_usage_stats():
+    """Usage count and last use of every template"""
+    return get_aggregates().template_usage()
+
+def get_analytics_cache_stats():
+    """Get hit, load and memory statistics of the analytics dataset cache"""
+    return dataset_cache.stats()
+
+def get_aggregator_stats():
+    """Get refresh, rebuild and size statistics of the prompt aggregates"""
+    return aggregator.get_stats()
+
+def get_snapshot_stats():
+    """Get refresh statistics and the age of the analytics snapshot"""
+    if isinstance(db_manager, SnapshotDatabaseManager):
+        return db_manager.get_snapshot_stats()
+    return {"max_age": 0}
 
 def get_prompt_metrics():
     """
@@ -17,10 +63,11 @@ def get_prompt_metrics():
     Returns:
     - Dictionary of metrics
     """
-    # Get prompt data
-    prompts_df = db_manager.get_prompts_df()
+    # Get the shared pre-aggregated frames
+    aggregates = get_aggregates()
+    prompts_per_day = aggregates.prompts_per_day()
     
-    # Default values if dataframe is empty
+    # Default values if there is no data
     metrics = {
         "total_prompts": 0,
         "unique_keywords": 0,
@@ -28,33 +75,28 @@ def get_prompt_metrics():
         "weekly_trend": 0
     }
     
-    if not prompts_df.empty:
+    if not prompts_per_day.empty:
         # Calculate metrics
-        metrics["total_prompts"] = len(prompts_df)
+        metrics["total_prompts"] = int(prompts_per_day["count"].sum())
+        metrics["unique_keywords"] = len(aggregates.totals("keyword"))
+        metrics["categories"] = len(aggregates.totals("category"))
         
-        if "primary_keyword" in prompts_df.columns:
-            metrics["unique_keywords"] = prompts_df["primary_keyword"].nunique()
+        # Calculate trend (prompts in last week vs previous week), comparing
+        # the datetime64 dates directly
+        dates = prompts_per_day["date"]
+        counts = prompts_per_day["count"]
         
-        if "category" in prompts_df.columns:
-            metrics["categories"] = prompts_df["category"].nunique()
+        one_week_ago = pd.Timestamp("today").normalize() - pd.Timedelta(days=7)
+        two_weeks_ago = pd.Timestamp("today").normalize() - pd.Timedelta(days=14)
         
-        # Calculate trend (prompts in last week vs previous week)
-        if "timestamp" in prompts_df.columns:
-            prompts_df["date"] = pd.to_datetime(prompts_df["timestamp"]).dt.date
-            
-            today = pd.to_datetime("today").date()
-            one_week_ago = pd.to_datetime("today") - pd.Timedelta(days=7)
-            two_weeks_ago = pd.to_datetime("today") - pd.Timedelta(days=14)
-            
-            prompts_last_week = len(prompts_df[prompts_df["date"] >= one_week_ago.date()])
-            prompts_previous_week = len(prompts_df[(prompts_df["date"] >= two_weeks_ago.date()) & 
-                                                 (prompts_df["date"] < one_week_ago.date())])
-            
-            if prompts_previous_week > 0:
-                metrics["weekly_trend"] = ((prompts_last_week - prompts_previous_week) / 
-                                         prompts_previous_week * 100)
-            else:
-                metrics["weekly_trend"] = 0
+        prompts_last_week = int(counts[dates >= one_week_ago].sum())
+        prompts_previous_week = int(counts[(dates >= two_weeks_ago) & (dates < one_week_ago)].sum())
+        
+        if prompts_previous_week > 0:
+            metrics["weekly_trend"] = ((prompts_last_week - prompts_previous_week) / 
+                                     prompts_previous_week * 100)
+        else:
+            metrics["weekly_trend"] = 0
     
     return metrics
 
@@ -65,19 +107,8 @@ def get_prompt_time_data():
     Returns:
     - DataFrame with date and count columns
     """
-    # Get prompt data
-    prompts_df = db_manager.get_prompts_df()
-    
-    # Default empty dataframe
-    time_data = pd.DataFrame(columns=["date", "count"])
-    
-    if not prompts_df.empty and "timestamp" in prompts_df.columns:
-        # Format timestamp
-        prompts_df["date"] = pd.to_datetime(prompts_df["timestamp"]).dt.date
-        
-        # Group by date
-        time_data = prompts_df.groupby("date").size().reset_index(name="count")
-        time_data["date"] = pd.to_datetime(time_data["date"])
+    # Prompts of every day, from the incremental aggregates
+    time_data = get_aggregates().prompts_per_day()
     
     # If we have no data, return sample data for development
     if time_data.empty:
@@ -100,16 +131,8 @@ def get_category_distribution():
     Returns:
     - DataFrame with category and count columns
     """
-    # Get prompt data
-    prompts_df = db_manager.get_prompts_df()
-    
-    # Default empty dataframe
-    category_data = pd.DataFrame(columns=["category", "count"])
-    
-    if not prompts_df.empty and "category" in prompts_df.columns:
-        # Group by category
-        category_data = prompts_df.groupby("category").size().reset_index(name="count")
-        category_data = category_data.sort_values("count", ascending=False)
+    # Prompts of every category, most used first
+    category_data = get_aggregates().totals("category")
     
     # If we have no data, return sample data for development
     if category_data.empty:
@@ -133,16 +156,20 @@ def get_recent_prompts(limit=10):
     Returns:
     - DataFrame with prompt data
     """
-    # Get prompt data
-    prompts_df = db_manager.get_prompts_df()
+    # Get only the newest prompts, without their bodies
+    prompts_df = dataset_cache.get(f"recent_prompts:{limit}", lambda: db_manager.get_prompts_df(
+        columns=["timestamp", "template_id", "primary_keyword", "category", "audience"],
+        limit=limit,
+        newest_first=True
+    ))
     
     if not prompts_df.empty:
         # Sort by timestamp
-        recent_prompts = prompts_df.sort_values("timestamp", ascending=False).head(limit)
+        recent_prompts = prompts_df.sort_values("timestamp", ascending=False)
         
         # Format timestamp
         if "timestamp" in recent_prompts.columns:
-            recent_prompts["timestamp"] = pd.to_datetime(recent_prompts["timestamp"]).dt.strftime('%Y-%m-%d %H:%M')
+            recent_prompts["timestamp"] = recent_prompts["timestamp"].dt.strftime('%Y-%m-%d %H:%M')
         
         return recent_prompts
     
@@ -157,7 +184,7 @@ def get_template_usage():
     - DataFrame with template usage data
     """
     # Get template usage data
-    template_usage_df = db_manager.get_template_usage_stats()
+    template_usage_df = get_template_usage_stats()
     
     # If we have no data, return sample data for development
     if template_usage_df.empty:
@@ -180,19 +207,8 @@ def get_template_time_data():
     Returns:
     - DataFrame with date, template_id, and count columns
     """
-    # Get prompt data
-    prompts_df = db_manager.get_prompts_df()
-    
-    # Default empty dataframe
-    template_time_data = pd.DataFrame(columns=["date", "template_id", "count"])
-    
-    if not prompts_df.empty and "timestamp" in prompts_df.columns and "template_id" in prompts_df.columns:
-        # Convert timestamp to datetime
-        prompts_df["date"] = pd.to_datetime(prompts_df["timestamp"]).dt.date
-        
-        # Group by date and template
-        template_time_data = prompts_df.groupby(["date", "template_id"]).size().reset_index(name="count")
-        template_time_data["date"] = pd.to_datetime(template_time_data["date"])
+    # Pre-aggregated counts are already by date and template
+    template_time_data = get_daily_counts("template")
     
     # If we have no data, return sample data for development
     if template_time_data.empty:
@@ -227,8 +243,8 @@ def get_template_metrics():
     - DataFrame with template metrics
     """
     # Get template usage data
-    template_usage_df = db_manager.get_template_usage_stats()
-    prompts_df = db_manager.get_prompts_df()
+    template_usage_df = get_template_usage_stats()
+    template_diversity = get_aggregates().template_keyword_diversity()
     
     # Default empty dataframe
     template_metrics = pd.DataFrame(columns=["Template Name", "usage_count", "keyword_diversity", "Last Used"])
@@ -244,14 +260,10 @@ def get_template_metrics():
         template_metrics["Template Name"] = template_metrics["template_id"].map(lambda x: template_map.get(x, x))
         
         if "last_used" in template_metrics.columns:
-            template_metrics["Last Used"] = pd.to_datetime(template_metrics["last_used"]).dt.strftime('%Y-%m-%d')
+            template_metrics["Last Used"] = template_metrics["last_used"].dt.strftime('%Y-%m-%d')
         
-        # Calculate template diversity (number of unique primary keywords per template)
-        if not prompts_df.empty and "primary_keyword" in prompts_df.columns and "template_id" in prompts_df.columns:
-            template_diversity = prompts_df.groupby("template_id")["primary_keyword"].nunique().reset_index()
-            template_diversity.columns = ["template_id", "keyword_diversity"]
-            
-            # Merge with metrics
+        # Merge with the template diversity
+        if not template_diversity.empty:
             template_metrics = pd.merge(template_metrics, template_diversity, on="template_id", how="left")
     
     # If we have no data, return sample data for development
@@ -282,12 +294,10 @@ def get_top_keywords(limit=10):
     Returns:
     - DataFrame with keyword usage data
     """
-    # Get keyword data
-    primary_keywords_df = db_manager.get_keywords_by_type("primary")
+    # Get keyword data, already sorted by usage count
+    top_keywords = get_primary_keywords().head(limit)
     
-    if not primary_keywords_df.empty:
-        # Sort by usage count
-        top_keywords = primary_keywords_df.sort_values("usage_count", ascending=False).head(limit)
+    if not top_keywords.empty:
         return top_keywords
     
     # Return sample data if no real data is available
@@ -307,25 +317,9 @@ def get_keyword_category_data():
     Returns:
     - DataFrame with keyword, category, and count columns
     """
-    # Get keyword data
-    primary_keywords_df = db_manager.get_keywords_by_type("primary")
-    prompts_df = db_manager.get_prompts_df()
-    
-    # Default empty dataframe
-    keyword_category_data = pd.DataFrame(columns=["primary_keyword", "category", "count"])
-    
-    if (not primary_keywords_df.empty and not prompts_df.empty and 
-        "category" in prompts_df.columns and "primary_keyword" in prompts_df.columns):
-        
-        # Get top keywords
-        top_keywords = primary_keywords_df.sort_values("usage_count", ascending=False).head(5)["keyword"].tolist()
-        
-        # Filter prompts to include only top keywords
-        filtered_prompts = prompts_df[prompts_df["primary_keyword"].isin(top_keywords)]
-        
-        if not filtered_prompts.empty:
-            # Group by keyword and category
-            keyword_category_data = filtered_prompts.groupby(["primary_keyword", "category"]).size().reset_index(name="count")
+    # Get the top keywords and their prompts by category
+    top_keywords = get_primary_keywords().head(5)["keyword"].tolist()
+    keyword_category_data = get_aggregates().keyword_category_counts(top_keywords)
     
     # If we have no data, return sample data for development
     if keyword_category_data.empty:
@@ -354,29 +348,16 @@ def get_keyword_trends_data():
     Returns:
     - DataFrame with date, primary_keyword, and count columns
     """
-    # Get keyword data
-    primary_keywords_df = db_manager.get_keywords_by_type("primary")
-    prompts_df = db_manager.get_prompts_df()
+    # Get the top keywords for trend analysis
+    top_keywords = get_primary_keywords().head(5)["keyword"].tolist()
     
     # Default empty dataframe
     keyword_trends_data = pd.DataFrame(columns=["date", "primary_keyword", "count"])
     
-    if (not primary_keywords_df.empty and not prompts_df.empty and 
-        "timestamp" in prompts_df.columns and "primary_keyword" in prompts_df.columns):
-        
-        # Convert timestamp to datetime
-        prompts_df["date"] = pd.to_datetime(prompts_df["timestamp"]).dt.date
-        
-        # Get top keywords for trend analysis
-        top_keywords = primary_keywords_df.sort_values("usage_count", ascending=False).head(5)["keyword"].tolist()
-        
-        # Filter prompts to include only top keywords
-        filtered_prompts = prompts_df[prompts_df["primary_keyword"].isin(top_keywords)]
-        
-        if not filtered_prompts.empty:
-            # Group by date and keyword
-            keyword_trends_data = filtered_prompts.groupby(["date", "primary_keyword"]).size().reset_index(name="count")
-            keyword_trends_data["date"] = pd.to_datetime(keyword_trends_data["date"])
+    if top_keywords:
+        # Pre-aggregated counts are already by date and keyword
+        keyword_counts = get_daily_counts("keyword")
+        keyword_trends_data = keyword_counts[keyword_counts["primary_keyword"].isin(top_keywords)].reset_index(drop=True)
     
     # If we have no data, return sample data for development
     if keyword_trends_data.empty:
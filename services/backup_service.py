@@ -0,0 +1,120 @@
+"""
+Backup Service for SEO Prompt Generator
+Runs online backups and restores of the main database, on demand or on a
+schedule stored in the config table
+"""
+import os
+import threading
+import time
+
+from utils.database import DatabaseManager
+from utils.backup import backup_database, restore_database, list_backups, verify_database
+from config import (DB_PATH, BACKUP_DIR, BACKUP_KEEP, BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP,
+                    BACKUP_MAX_RESTARTS)
+
+# Initialize the database manager
+db_manager = DatabaseManager(DB_PATH)
+
+backup_dir = BACKUP_DIR or os.path.join(os.path.dirname(DB_PATH), "backups")
+
+# Only one backup or restore runs at a time
+_backup_lock = threading.Lock()
+
+def run_backup(keep=None):
+    """
+    Back up the database now
+    
+    Returns:
+    - Dictionary with the backup path, size_bytes, duration_seconds and removed backups
+    """
+    with _backup_lock:
+        result = backup_database(
+            DB_PATH, backup_dir,
+            keep=BACKUP_KEEP if keep is None else keep,
+            pages=BACKUP_PAGES_PER_STEP,
+            sleep=BACKUP_STEP_SLEEP,
+            max_restarts=BACKUP_MAX_RESTARTS,
+            archive_dir=db_manager.archive_dir
+        )
+    db_manager.set_config_value("last_backup", result["path"])
+    return result
+
+def get_backups():
+    """Get the available backups, newest first"""
+    return list_backups(backup_dir)
+
+def restore_backup(name):
+    """
+    Restore a backup by file name (or path), after taking a safety backup
+    of the current database
+    
+    Returns:
+    - Dictionary with the restore result and the safety backup
+    """
+    backup_path = name if os.path.exists(name) else os.path.join(backup_dir, os.path.basename(name))
+    ok, message = verify_database(backup_path)
+    if not ok:
+        raise ValueError(f"Backup {name} can't be restored: {message}")
+    
+    # Keep every backup while restoring so the safety copy can't rotate the source out
+    safety = run_backup(keep=0)
+    with _backup_lock:
+        result = restore_database(backup_path, DB_PATH, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP,
+                                  max_restarts=BACKUP_MAX_RESTARTS, archive_dir=db_manager.archive_dir)
+    return {**result, "safety_backup": safety["path"]}
+
+def get_backup_interval():
+    """Hours between scheduled backups, 0 when scheduling is off"""
+    return float(db_manager.get_config_value("backup_interval_hours", "0"))
+
+def set_backup_interval(hours):
+    """Set the hours between scheduled backups (0 turns scheduling off)"""
+    db_manager.set_config_value("backup_interval_hours", float(hours or 0))
+    if hours:
+        start_scheduler()
+
+class BackupScheduler:
+    """Background thread running backups every backup_interval_hours"""
+    
+    def __init__(self, check_seconds=60):
+        self.check_seconds = check_seconds
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_result = None
+        self.last_error = None
+    
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="backup-scheduler", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def _due(self):
+        hours = get_backup_interval()
+        if hours <= 0:
+            return False
+        backups = get_backups()
+        if not backups:
+            return True
+        return time.time() - os.path.getmtime(backups[0]["path"]) >= hours * 3600
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self._due():
+                    self.last_result = run_backup()
+                    self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Error running scheduled backup: {str(e)}")
+            self._stop.wait(self.check_seconds)
+
+scheduler = BackupScheduler()
+
+def start_scheduler():
+    """Start scheduled backups in this process"""
+    scheduler.start()
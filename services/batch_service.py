@@ -0,0 +1,258 @@
+"""
+Batch Service for SEO Prompt Generator
+Generates prompts for many keyword rows at once, fanned out across a
+process pool and streamed to a JSONL file or the prompts table
+"""
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from config import BATCH_WORKERS, BATCH_CHUNK_SIZE
+from services.prompt_service import build_prompt
+
+# CSV columns mapped to build_prompt() options; any other column is passed
+# to the template as a template-specific field
+TEXT_OPTIONS = ("source_link", "reference_content", "target_audience", "target_location",
+                "reading_level", "update_frequency", "content_tone", "update_notes")
+FLAG_OPTIONS = ("include_faq", "include_meta", "include_schema", "generate_image_prompt", "url_slug",
+                "tags", "external_references", "internal_linking", "featured_snippet")
+RESERVED_COLUMNS = set(TEXT_OPTIONS) | set(FLAG_OPTIONS) | {"primary_keyword", "secondary_keywords",
+                                                              "word_count", "template_id"}
+
+
+def read_keyword_rows(csv_path):
+    """Yield the non-empty rows of a keyword CSV file as dictionaries"""
+    with open(csv_path, "r", newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            row = {key.strip(): (value or "").strip() for key, value in row.items() if key}
+            if row.get("primary_keyword"):
+                yield row
+
+
+def _parse_flag(value):
+    return value.lower() in ("1", "true", "yes", "y")
+
+
+def row_to_options(row):
+    """Convert a CSV row into build_prompt() keyword arguments"""
+    options = {option: row[option] for option in TEXT_OPTIONS if row.get(option)}
+    options.update({option: _parse_flag(row[option]) for option in FLAG_OPTIONS if row.get(option)})
+
+    secondary = row.get("secondary_keywords", "")
+    separator = ";" if ";" in secondary else ","
+    options["secondary_keywords"] = [kw.strip() for kw in secondary.split(separator) if kw.strip()]
+
+    if row.get("word_count"):
+        options["word_count"] = int(row["word_count"])
+
+    options["template_fields"] = {key: value for key, value in row.items() if key not in RESERVED_COLUMNS}
+    return options
+
+
+def _generate_chunk(jobs, templates):
+    """Build the prompts of one chunk of (row_number, template_id, row) jobs"""
+    results = []
+    for row_number, template_id, row in jobs:
+        template = templates[template_id]
+        result = {
+            "row": row_number,
+            "template_id": template_id,
+            "primary_keyword": row["primary_keyword"],
+            "category": template.get("category", "General") if template is not None else None,
+            "audience": row.get("target_audience") or "General Public",
+        }
+        if template is None:
+            result["error"] = f"Unknown template: {template_id}"
+            results.append(result)
+            continue
+        try:
+            generated = build_prompt(template_id, template, row["primary_keyword"], **row_to_options(row))
+        except Exception as e:
+            result["error"] = str(e)
+        else:
+            result["secondary"] = generated["secondary_keywords"]
+            result["prompt_text"] = generated["prompt"]
+            result["missing_fields"] = generated["missing_fields"]
+        results.append(result)
+    return results
+
+
+class JsonlWriter:
+    """Stream batch results to a JSON Lines file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, results):
+        for result in results:
+            self._file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class DatabaseWriter:
+    """
+    Stream batch results to the prompts table, one transaction per chunk,
+    and count their keywords
+    """
+
+    def __init__(self, db_manager):
+        from services.keyword_service import KeywordUsageTracker
+
+        self.db_manager = db_manager
+        # Flushed per chunk rather than on a timer
+        self.keyword_tracker = KeywordUsageTracker(db_manager, flush_interval=None)
+
+    def write(self, results):
+        saved = [result for result in results if "error" not in result]
+        self.db_manager.save_prompt_generations(saved)
+        for result in saved:
+            self.keyword_tracker.record_prompt(result["primary_keyword"], result["secondary"],
+                                               result.get("category"))
+        self.keyword_tracker.flush()
+
+    def close(self):
+        self.keyword_tracker.flush()
+
+
+class BatchProgress:
+    """Progress and throughput of a batch run"""
+
+    def __init__(self, total=None):
+        self.total = total
+        self.completed = 0
+        self.failed = 0
+        self.started = time.monotonic()
+
+    def update(self, results):
+        self.completed += len(results)
+        self.failed += sum(1 for result in results if "error" in result)
+
+    def as_dict(self):
+        elapsed = time.monotonic() - self.started
+        return {
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "elapsed_seconds": round(elapsed, 3),
+            "prompts_per_second": round(self.completed / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+
+def count_jobs(rows, template_ids):
+    """
+    Check every row has a template and count the prompts a batch will generate
+
+    Run this over the rows before generate_batch(): a row without a template
+    found mid-stream would stop the batch after earlier chunks were written.
+
+    Returns:
+    - Number of prompts; raises ValueError naming the rows without a
+      template_id when no template_ids were given
+    """
+    total = 0
+    missing = []
+    for row_number, row in enumerate(rows, start=1):
+        if row.get("template_id"):
+            total += 1
+        elif template_ids:
+            total += len(template_ids)
+        else:
+            missing.append(row_number)
+    if missing:
+        shown = ", ".join(str(row_number) for row_number in missing[:10])
+        more = f" and {len(missing) - 10} more" if len(missing) > 10 else ""
+        label = "Row" if len(missing) == 1 else "Rows"
+        verb = "has" if len(missing) == 1 else "have"
+        raise ValueError(f"{label} {shown}{more} {verb} no template_id and no templates were given")
+    return total
+
+
+def _iter_chunks(rows, template_ids, load_template, templates, chunk_size):
+    """
+    Group (row_number, template_id, row) jobs into chunks with the templates
+    they use; load_template returns None for an unknown ID, which the
+    workers turn into an error result for that row
+    """
+    chunk = []
+    for row_number, row in enumerate(rows, start=1):
+        row_template_ids = [row["template_id"]] if row.get("template_id") else template_ids
+        if not row_template_ids:
+            raise ValueError(f"Row {row_number} has no template_id and no templates were given")
+        for template_id in row_template_ids:
+            if template_id not in templates:
+                templates[template_id] = load_template(template_id)
+            chunk.append((row_number, template_id, row))
+        if len(chunk) >= chunk_size:
+            yield chunk, {template_id: templates[template_id] for _, template_id, _ in chunk}
+            chunk = []
+    if chunk:
+        yield chunk, {template_id: templates[template_id] for _, template_id, _ in chunk}
+
+
+def generate_batch(rows, template_ids, writer, workers=None, chunk_size=None, total=None,
+                   progress_callback=None):
+    """
+    Generate prompts for every keyword row against one or more templates
+
+    Parameters:
+    - rows: Iterable of row dictionaries (see read_keyword_rows); a row with
+      a template_id column uses that template instead of template_ids
+    - template_ids: Templates every row is generated against
+    - writer: JsonlWriter, DatabaseWriter or any object with write()/close()
+    - workers: Worker processes; 1 runs in-process, None uses BATCH_WORKERS
+    - chunk_size: Jobs sent to a worker at once and written per transaction
+    - total: Expected number of prompts, for progress reporting only
+    - progress_callback: Called with the progress dictionary after each chunk
+
+    Returns:
+    - Dictionary with completed/failed counts and throughput; raises
+      ValueError when one of template_ids is not a known template
+    """
+    from utils.template_store import get_template, template_exists
+
+    def load_template(template_id):
+        return get_template(template_id) if template_exists(template_id) else None
+
+    template_ids = list(template_ids)
+    unknown = [template_id for template_id in template_ids if not template_exists(template_id)]
+    if unknown:
+        writer.close()
+        raise ValueError(f"Unknown template: {', '.join(unknown)}")
+
+    workers = workers or BATCH_WORKERS or os.cpu_count() or 1
+    chunk_size = chunk_size or BATCH_CHUNK_SIZE
+    progress = BatchProgress(total)
+    chunks = _iter_chunks(rows, template_ids, load_template, {}, chunk_size)
+
+    def handle(results):
+        writer.write(results)
+        progress.update(results)
+        if progress_callback:
+            progress_callback(progress.as_dict())
+
+    try:
+        if workers == 1:
+            for jobs, templates in chunks:
+                handle(_generate_chunk(jobs, templates))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # Keep a bounded number of chunks in flight so huge inputs
+                # stream through instead of being queued all at once
+                pending = deque()
+                for jobs, templates in chunks:
+                    pending.append(executor.submit(_generate_chunk, jobs, templates))
+                    if len(pending) >= workers * 2:
+                        handle(pending.popleft().result())
+                while pending:
+                    handle(pending.popleft().result())
+    finally:
+        writer.close()
+
+    return progress.as_dict()
@@ -1,9 +1,121 @@
-from utils.database import DatabaseManager
-from config import DB_PATH
+import atexit
+import threading
+from datetime import datetime
+from utils.database import DatabaseManager, normalize_keyword
+from config import DB_PATH, KEYWORD_FLUSH_INTERVAL, KEYWORD_MAX_PENDING
 
 # Initialize database manager
 db_manager = DatabaseManager(DB_PATH)
 
+class KeywordUsageTracker:
+    """Coalesce keyword usage in memory and write it in batched upserts"""
+    
+    def __init__(self, db_manager, flush_interval=KEYWORD_FLUSH_INTERVAL, max_pending=KEYWORD_MAX_PENDING):
+        """
+        Parameters:
+        - db_manager: DatabaseManager the counts are written to
+        - flush_interval: Seconds usage is collected before it is written;
+          0 writes every use at once, None only on flush()
+        - max_pending: Distinct pending keywords that trigger an immediate flush
+        """
+        self.db_manager = db_manager
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # (normalized, type) -> [keyword, count, last_used, category]
+        self._pending = {}
+        self._timer = None
+    
+    def record(self, keyword, keyword_type, category=None, count=1):
+        """Count one use of a keyword"""
+        if not keyword or not keyword.strip():
+            return
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        key = (normalize_keyword(keyword), keyword_type)
+        with self._lock:
+            usage = self._pending.get(key)
+            if usage is None:
+                self._pending[key] = [keyword.strip(), count, now, category]
+            else:
+                usage[1] += count
+                usage[2] = now
+                usage[3] = usage[3] or category
+            flush_now = len(self._pending) >= self.max_pending
+            if not flush_now and self._timer is None and self.flush_interval:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if flush_now or self.flush_interval == 0:
+            self.flush()
+    
+    def record_prompt(self, primary_keyword, secondary_keywords, category=None):
+        """
+        Count the keywords of one generated prompt
+        
+        Parameters:
+        - primary_keyword: The prompt's primary keyword
+        - secondary_keywords: List of keywords or a comma-separated string
+        - category: Template category, stored for new keywords
+        """
+        self.record(primary_keyword, "primary", category)
+        if isinstance(secondary_keywords, str):
+            secondary_keywords = secondary_keywords.split(",")
+        for keyword in secondary_keywords or []:
+            self.record(keyword, "secondary", category)
+    
+    def flush(self):
+        """Write all pending usage in one transaction; returns the rows written"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not pending:
+                return 0
+            try:
+                return self.db_manager.record_keyword_usage(
+                    (keyword, keyword_type, count, last_used, category)
+                    for (_, keyword_type), (keyword, count, last_used, category) in pending.items()
+                )
+            except Exception as e:
+                self._restore(pending)
+                print(f"Error saving keyword usage, keeping {len(pending)} keywords for the next flush: {str(e)}")
+                return 0
+    
+    def _restore(self, pending):
+        """Merge a batch that failed to write back into the pending usage"""
+        with self._lock:
+            for key, (keyword, count, last_used, category) in pending.items():
+                usage = self._pending.get(key)
+                if usage is None:
+                    self._pending[key] = [keyword, count, last_used, category]
+                else:
+                    # Recorded again while the write was failing
+                    usage[0] = keyword
+                    usage[1] += count
+                    usage[2] = max(usage[2], last_used)
+                    usage[3] = category or usage[3]
+            if self._timer is None and self.flush_interval:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+    
+    def pending_count(self):
+        """Number of distinct keywords waiting to be written"""
+        with self._lock:
+            return len(self._pending)
+
+# Keyword usage from generated prompts, written at most every KEYWORD_FLUSH_INTERVAL
+keyword_tracker = KeywordUsageTracker(db_manager)
+atexit.register(keyword_tracker.flush)
+
+def track_prompt_keywords(primary_keyword, secondary_keywords, category=None):
+    """Count the primary and secondary keywords of a generated prompt"""
+    keyword_tracker.record_prompt(primary_keyword, secondary_keywords, category)
+
 def get_primary_keywords():
     """Get all primary keywords"""
     # Placeholder implementation
@@ -16,7 +128,11 @@ def get_secondary_keywords():
     return ["keywords", "optimization", "search engine", "ranking", "traffic", "conversion"]
 
 def add_keyword(keyword, keyword_type, category=""):
-    """Add a new keyword"""
-    # Placeholder - in real implementation, add to database
-    print(f"Adding keyword: {keyword} ({keyword_type})")
-    return True
\ No newline at end of file
+    """Add a new keyword; returns False if it already exists"""
+    if not keyword or not keyword.strip():
+        return False
+    try:
+        return db_manager.add_keyword(keyword, keyword_type, category)
+    except Exception as e:
+        print(f"Error adding keyword: {str(e)}")
+        return False
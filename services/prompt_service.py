@@ -0,0 +1,165 @@
+"""
+Prompt Service for SEO Prompt Generator
+Builds SEO prompts from templates - shared by the generator page and bulk generation
+"""
+from datetime import date
+
+from utils.template_renderer import get_compiled_template
+
+
+def build_prompt(template_id, template, primary_keyword, source_link=None, reference_content=None,
+                 secondary_keywords=None, target_audience="General Public", target_location="United States",
+                 reading_level="General", update_frequency="3 months", word_count=1500, content_tone=None,
+                 include_faq=True, include_meta=True, include_schema=True, generate_image_prompt=False,
+                 url_slug=True, tags=True, external_references=False, internal_linking=False,
+                 featured_snippet=False, update_notes=None, template_fields=None):
+    """
+    Build an SEO prompt from a template and the generation options
+    
+    Parameters:
+    - template_id: ID of the template, used to cache its compiled body
+    - template: Template data as returned by get_template()
+    - primary_keyword: Main keyword to target
+    - remaining keyword arguments mirror the generator form inputs
+    
+    Returns:
+    - Dictionary with the prompt, the formatted secondary keywords and the
+      missing/unknown template fields
+    """
+    template_fields = template_fields or {}
+    if content_tone is None:
+        content_tone = template.get("tone", "Professional")
+    
+    # Source input - use the link if provided, otherwise use the content
+    source_input = source_link if source_link else reference_content
+    
+    # Format secondary keywords
+    secondary_kw_text = ", ".join(secondary_keywords) if secondary_keywords else ""
+    
+    # Get current date
+    current_date = date.today().strftime("%Y-%m-%d")
+    current_year = date.today().year
+    
+    # Compiled template body, parsed once per template version
+    compiled_template = get_compiled_template(template_id, template)
+    
+    # If tone isn't already in the template and it's different, add it
+    default_tone = template.get("tone", "Professional")
+    if content_tone != default_tone and "Tone:" in template["template"]:
+        compiled_template = compiled_template.replace_literal(
+            f"Tone: {default_tone}", f"Tone: {content_tone}"
+        )
+    
+    # Build the replacements dictionary
+    replacements = {
+        "source_link": source_input or "",
+        "primary_keyword": primary_keyword,
+        "secondary_keywords": secondary_kw_text,
+        "target_audience": target_audience,
+        "target_location": target_location,
+        "update_frequency": update_frequency,
+        "current_date": current_date,
+        "current_year": str(current_year),
+        "word_count": str(word_count),
+        "tone": content_tone,
+        "reading_level": reading_level,
+    }
+    
+    # Add template-specific field replacements
+    for field_name, field_value in template_fields.items():
+        replacements[field_name] = field_value or ""
+    
+    # Fill all placeholders in a single pass
+    prompt = compiled_template.render(replacements)
+    missing_fields = compiled_template.missing_fields(replacements)
+    unknown_fields = compiled_template.unknown_fields(template_fields)
+    
+    # Handle optional sections
+    if not include_faq and "FAQ Section" in prompt:
+        # Try to remove FAQ section without breaking the prompt
+        faq_lines = []
+        lines = prompt.split("\n")
+        in_faq_section = False
+        
+        for i, line in enumerate(lines):
+            if "FAQ Section" in line or "FAQ:" in line:
+                in_faq_section = True
+            elif (
+                in_faq_section
+                and line.strip()
+                and (line.startswith("#") or line.startswith("##"))
+            ):
+                in_faq_section = False
+                
+            if in_faq_section:
+                faq_lines.append(i)
+                
+        # Remove FAQ lines
+        if faq_lines:
+            prompt = "\n".join(
+                [line for i, line in enumerate(lines) if i not in faq_lines]
+            )
+    
+    # Add meta tags generation if requested
+    if include_meta and "Meta title" not in prompt and "Meta description" not in prompt:
+        prompt += "\n\n## Generate Meta Tags\n"
+        prompt += "- Title Tag (50-60 characters)\n"
+        prompt += "- Meta Description (150-160 characters)\n"
+        
+    # Add schema recommendation if requested
+    schema_type = template.get("schema", "Article")
+    if include_schema and "Schema markup" not in prompt:
+        prompt += f"\n\n## Schema Markup\nRecommend appropriate schema.org markup for this {schema_type} content.\n"
+        
+    # Add target location if provided
+    if target_location and target_location != "Other":
+        prompt += f"\n\n## Location Targeting\nThis content targets audiences in {target_location}. Include location-specific information and keywords where relevant.\n"
+        
+    # Add reading level guidance
+    if reading_level and reading_level != "General":
+        prompt += f"\n\n## Reading Level\nContent should be written at a {reading_level} reading level appropriate for the target audience.\n"
+        
+    # Add image prompt generation if requested
+    if generate_image_prompt:
+        prompt += "\n\n## Image Suggestions\n"
+        prompt += "- Suggest 3-5 image ideas that would enhance this content\n"
+        prompt += "- Provide SEO-optimized alt text for each image\n"
+        prompt += "- Recommend image types (e.g., infographic, hero image, screenshot)\n"
+        
+    # Add URL slug generation if requested
+    if url_slug:
+        prompt += "\n\n## URL Slug\nGenerate an SEO-friendly URL slug for this content.\n"
+        
+    # Add tags generation if requested
+    if tags:
+        prompt += "\n\n## Content Tags\nSuggest 5-10 tags for categorizing this content.\n"
+        
+    # Add external references if requested
+    if external_references:
+        prompt += "\n\n## External References\nSuggest 3-5 authoritative external sources that could be referenced in this content.\n"
+        
+    # Add internal linking suggestions if requested
+    if internal_linking:
+        prompt += "\n\n## Internal Linking Opportunities\nSuggest topics or content types on the same site that should link to or from this content.\n"
+        
+    # Add featured snippet optimization if requested
+    if featured_snippet:
+        prompt += "\n\n## Featured Snippet Optimization\n"
+        prompt += "- Format a section of this content to be eligible for a featured snippet\n"
+        prompt += "- Include a clear definition, list, or table that directly answers a common question\n"
+        prompt += "- Optimize for 'People Also Ask' opportunities\n"
+        
+    # Add update notes if provided
+    if update_notes:
+        prompt += f"\n\n## Content Update Strategy\n{update_notes}\n"
+        
+    # Add social media suggestion section
+    prompt += "\n\n## Social Media Content\n"
+    prompt += "Generate social media post ideas for LinkedIn, Instagram, and other recommended platforms based on this content.\n"
+    
+    return {
+        "prompt": prompt,
+        "secondary_keywords": secondary_kw_text,
+        "missing_fields": missing_fields,
+        "unknown_fields": unknown_fields
+    }
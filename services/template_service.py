@@ -1,9 +1,23 @@
+from datetime import datetime
 from utils.database import DatabaseManager
-from config import DB_PATH
+from utils import template_store
+from utils.write_behind import WriteBehindQueue, register_for_shutdown, SYNC
+from services.keyword_service import track_prompt_keywords
+from config import (DB_PATH, PROMPT_WRITE_MODE, PROMPT_WRITE_QUEUE_SIZE, PROMPT_WRITE_BATCH_SIZE,
+                    PROMPT_WRITE_FLUSH_INTERVAL)
 
 # Initialize database manager
 db_manager = DatabaseManager(DB_PATH)
 
+# Generated prompts are written behind the request, in batched transactions
+prompt_write_queue = register_for_shutdown(WriteBehindQueue(
+    db_manager.save_prompt_generations,
+    mode=PROMPT_WRITE_MODE,
+    max_size=PROMPT_WRITE_QUEUE_SIZE,
+    batch_size=PROMPT_WRITE_BATCH_SIZE,
+    flush_interval=PROMPT_WRITE_FLUSH_INTERVAL
+))
+
 def get_templates():
     """Get all templates"""
     # Placeholder implementation
@@ -38,4 +52,56 @@ def get_template_by_id(template_id):
     for template in templates:
         if template["id"] == template_id:
             return template
-    return None
\ No newline at end of file
+    return None
+
+def get_template(template_id):
+    """Get a template from the template store"""
+    return template_store.get_template(template_id)
+
+def get_template_cache_stats():
+    """Get the hit/miss counters of the template lookup cache"""
+    return template_store.get_template_cache_stats()
+
+def get_template_list():
+    """Get the summaries of all templates in the template store"""
+    return template_store.get_template_list()
+
+def get_templates_by_category(category_id):
+    """Get the templates of a category from the template store"""
+    return template_store.get_templates_by_category(category_id)
+
+def get_template_history(template_id):
+    """Get the saved versions of a template, newest first"""
+    return template_store.get_template_history(template_id)
+
+def get_recently_updated_templates(since, limit=50):
+    """Get templates updated at or after a timestamp, newest first"""
+    return db_manager.list_template_records(updated_since=since, limit=limit)
+
+def save_prompt_generation(template_id, primary_keyword, category, audience, secondary, prompt_text):
+    """
+    Record a generated prompt in the database
+    
+    Returns:
+    - The new row ID in sync mode, None when the write is queued
+    """
+    track_prompt_keywords(primary_keyword, secondary, category)
+    
+    if prompt_write_queue.mode == SYNC:
+        return db_manager.save_prompt_generation(template_id, primary_keyword, category, audience,
+                                                 secondary, prompt_text)
+    
+    prompt_write_queue.submit({
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "template_id": template_id,
+        "primary_keyword": primary_keyword,
+        "category": category,
+        "audience": audience,
+        "secondary": secondary,
+        "prompt_text": prompt_text
+    })
+    return None
+
+def get_prompt_write_stats():
+    """Get queue depth and flush latency of the prompt write-behind queue"""
+    return prompt_write_queue.get_stats()
@@ -0,0 +1,148 @@
+"""
+Parity of SQL and incremental analytics aggregates with pandas
+
+Every aggregate must equal the same groupby run on get_prompts_df(), on
+data with NULL templates, categories and keywords, after incremental
+refreshes and after prompts are moved to the monthly archives.
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.analytics_aggregates import IncrementalAggregator
+from utils.database import DatabaseManager, ROLLUP_TABLES
+from utils.query_builder import AggregateQuery
+
+TEMPLATES = ["ai_in_business", "beginner_guides", "tool_reviews", None]
+CATEGORIES = ["Business", "Educational", None]
+KEYWORDS = ["ai tools", "machine learning", "chatbots", "automation", None]
+
+
+def make_prompts(rng, count, max_age_days):
+    """Prompts spread over the last max_age_days days, some without template/category/keyword"""
+    now = datetime.now()
+    return [{
+        "timestamp": (now - timedelta(days=rng.uniform(0, max_age_days))).strftime("%Y-%m-%d %H:%M:%S"),
+        "template_id": rng.choice(TEMPLATES),
+        "category": rng.choice(CATEGORIES),
+        "primary_keyword": rng.choice(KEYWORDS),
+        "audience": "Marketers",
+        "secondary": "",
+        "prompt_text": f"prompt {rng.randrange(50)}"
+    } for _ in range(count)]
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "prompts.db"), archive_dir=str(tmp_path / "archive"))
+    db.save_prompt_generations(make_prompts(random.Random(7), 800, 400))
+    yield db
+    db.pool.close_all()
+
+
+def prompts(db):
+    df = db.get_prompts_df(columns=["id", "timestamp", "template_id", "category", "primary_keyword"])
+    df["date"] = df["timestamp"].dt.normalize()
+    return df
+
+
+def records(df):
+    """Rows of a frame as plain Python values, NULL/NaN/NaT as None"""
+    df = df.astype(object).where(df.notna(), None)
+    return [tuple(row) for row in df.itertuples(index=False, name=None)]
+
+
+def assert_aggregator_matches(aggregator, df):
+    for dimension, (_, column) in ROLLUP_TABLES.items():
+        expected = df.groupby(["date", column]).size().reset_index(name="count")
+        assert records(aggregator.daily_counts(dimension)) == records(expected), dimension
+
+        totals = df.groupby(column).size().reset_index(name="count")
+        totals = totals.sort_values(["count", column], ascending=[False, True], kind="stable")
+        assert records(aggregator.totals(dimension)) == records(totals), dimension
+
+    per_day = df.dropna(subset=["date"]).groupby("date").size().reset_index(name="count")
+    assert records(aggregator.prompts_per_day()) == records(per_day)
+    assert aggregator.prompts_per_day()["count"].sum() == len(df)
+
+    usage = df.groupby("template_id").agg(usage_count=("id", "size"), last_used=("timestamp", "max")).reset_index()
+    usage = usage.sort_values(["usage_count", "template_id"], ascending=[False, True], kind="stable")
+    assert records(aggregator.template_usage()[["template_id", "usage_count", "last_used"]]) == records(usage)
+
+    diversity = df.groupby("template_id")["primary_keyword"].nunique().reset_index(name="keyword_diversity")
+    assert records(aggregator.template_keyword_diversity()) == records(diversity)
+
+    keywords = ["ai tools", "chatbots"]
+    by_category = (df[df["primary_keyword"].isin(keywords)]
+                   .groupby(["primary_keyword", "category"]).size().reset_index(name="count"))
+    assert records(aggregator.keyword_category_counts(keywords)) == records(by_category)
+
+
+def assert_sql_aggregates_match(db, df):
+    # SQL groups NULL keys together and sorts them first
+    query = (AggregateQuery("prompts")
+             .group_by("template_id")
+             .count()
+             .count_distinct("primary_keyword", "keywords")
+             .max("created_at", "last_created"))
+    expected = (df.assign(created_at=df["timestamp"].astype("int64") // 10 ** 9)
+                .groupby("template_id", dropna=False)
+                .agg(count=("id", "size"), keywords=("primary_keyword", "nunique"),
+                     last_created=("created_at", "max"))
+                .reset_index()
+                .sort_values("template_id", na_position="first", kind="stable"))
+    assert records(db.aggregate(query)) == records(expected)
+
+    query = (AggregateQuery("prompts")
+             .group_by("category")
+             .group_by("primary_keyword")
+             .count()
+             .order_by("count", descending=True)
+             .order_by("category")
+             .order_by("primary_keyword")
+             .limit(5))
+    expected = (df.groupby(["category", "primary_keyword"], dropna=False).size().reset_index(name="count")
+                .sort_values(["count", "category", "primary_keyword"], ascending=[False, True, True],
+                             na_position="first", kind="stable")
+                .head(5))
+    assert records(db.aggregate(query)) == records(expected)
+
+    query = AggregateQuery("prompts").count().count_distinct("category", "categories")
+    assert records(db.aggregate(query)) == [(len(df), df["category"].nunique())]
+
+
+def test_aggregates_match_pandas(db):
+    aggregator = IncrementalAggregator(db)
+    assert aggregator.refresh() == "rebuilt"
+    df = prompts(db)
+    assert df["template_id"].isna().any() and df["category"].isna().any() and df["primary_keyword"].isna().any()
+    assert_aggregator_matches(aggregator, df)
+    assert_sql_aggregates_match(db, df)
+
+
+def test_aggregates_match_pandas_after_incremental_refresh(db):
+    aggregator = IncrementalAggregator(db)
+    aggregator.refresh()
+    db.save_prompt_generations(make_prompts(random.Random(11), 60, 30))
+    assert aggregator.refresh() == "advanced"
+    assert aggregator.refresh() == "current"
+    df = prompts(db)
+    assert_aggregator_matches(aggregator, df)
+    assert_sql_aggregates_match(db, df)
+
+
+def test_aggregates_match_pandas_after_archiving(db):
+    aggregator = IncrementalAggregator(db)
+    aggregator.refresh()
+    before = prompts(db)
+    archived = db.archive_prompts(older_than_days=120)
+    assert archived and len(db.list_archives()) > 1
+    assert aggregator.refresh() == "rebuilt"
+    db.save_prompt_generations(make_prompts(random.Random(13), 40, 10))
+    assert aggregator.refresh() == "advanced"
+
+    df = prompts(db)
+    assert len(df) == len(before) + 40
+    assert_aggregator_matches(aggregator, df)
+    assert_sql_aggregates_match(db, df)
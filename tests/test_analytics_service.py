@@ -0,0 +1,135 @@
+"""
+Parity of the analytics service with its previous pandas implementation
+
+The previous_* functions are the service functions as they were before
+the dashboard read SQL and incremental aggregates, run on the rollup
+tables and get_prompts_df() of the same database. The one deliberate
+change is that per-day totals count prompts without a template.
+"""
+import random
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import config
+from tests.test_analytics_parity import make_prompts, records
+from utils.analytics_aggregates import IncrementalAggregator
+from utils.analytics_cache import DatasetCache
+from utils.database import DatabaseManager
+
+TEMPLATE_NAMES = {"ai_in_business": "AI in Business", "beginner_guides": "Beginner Guides"}
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "prompts.db"), archive_dir=str(tmp_path / "archive"))
+    prompts = make_prompts(random.Random(17), 600, 60) + make_prompts(random.Random(19), 200, 400)
+    db.save_prompt_generations(prompts)
+    usage = Counter(prompt["primary_keyword"] for prompt in prompts if prompt["primary_keyword"])
+    db.record_keyword_usage((keyword, "primary", count, datetime.now().isoformat(), "Business")
+                            for keyword, count in usage.items())
+    yield db
+    db.pool.close_all()
+
+
+@pytest.fixture
+def service(db, monkeypatch):
+    # The module opens config.DB_PATH on import; keep that off the real database
+    monkeypatch.setattr(config, "DB_PATH", db.db_path)
+    from services import analytics_service
+    import utils.template_store
+    monkeypatch.setattr(analytics_service, "db_manager", db)
+    monkeypatch.setattr(analytics_service, "dataset_cache", DatasetCache(db.get_data_version))
+    monkeypatch.setattr(analytics_service, "aggregator", IncrementalAggregator(db))
+    monkeypatch.setattr(utils.template_store, "get_template_list",
+                        lambda: [{"id": template_id, "name": name} for template_id, name in TEMPLATE_NAMES.items()])
+    return analytics_service
+
+
+def previous_prompts_per_day(db):
+    prompts_df = db.get_prompts_df(columns=["timestamp"])
+    return prompts_df.groupby(prompts_df["timestamp"].dt.normalize().rename("date")).size().rename("count")
+
+
+def previous_prompt_metrics(db):
+    prompts_per_day = previous_prompts_per_day(db)
+    metrics = {
+        "total_prompts": int(prompts_per_day.sum()),
+        "unique_keywords": db.get_daily_counts("keyword")["primary_keyword"].nunique(),
+        "categories": db.get_daily_counts("category")["category"].nunique(),
+        "weekly_trend": 0
+    }
+    dates = prompts_per_day.index.date
+    one_week_ago = pd.to_datetime("today") - pd.Timedelta(days=7)
+    two_weeks_ago = pd.to_datetime("today") - pd.Timedelta(days=14)
+    prompts_last_week = int(prompts_per_day[dates >= one_week_ago.date()].sum())
+    prompts_previous_week = int(prompts_per_day[(dates >= two_weeks_ago.date()) &
+                                                (dates < one_week_ago.date())].sum())
+    if prompts_previous_week > 0:
+        metrics["weekly_trend"] = ((prompts_last_week - prompts_previous_week) /
+                                   prompts_previous_week * 100)
+    return metrics
+
+
+def previous_category_distribution(db):
+    category_data = db.get_daily_counts("category").groupby("category", observed=True)["count"].sum().reset_index()
+    # Ties were left in any order; the service breaks them by category
+    return category_data.sort_values(["count", "category"], ascending=[False, True])
+
+
+def previous_template_metrics(db):
+    template_usage_df = db.get_template_usage_stats()
+    prompts_df = db.get_prompts_df(columns=["template_id", "primary_keyword"])
+    template_diversity = prompts_df.groupby("template_id")["primary_keyword"].nunique().reset_index()
+    template_diversity.columns = ["template_id", "keyword_diversity"]
+
+    template_metrics = template_usage_df.copy()
+    template_metrics["Template Name"] = template_metrics["template_id"].map(lambda x: TEMPLATE_NAMES.get(x, x))
+    template_metrics["Last Used"] = pd.to_datetime(template_metrics["last_used"]).dt.strftime('%Y-%m-%d')
+    return pd.merge(template_metrics, template_diversity, on="template_id", how="left")
+
+
+def previous_keyword_category_data(db):
+    top_keywords = db.get_keywords_by_type("primary").head(5)["keyword"].tolist()
+    filtered_prompts = db.get_prompts_df(columns=["primary_keyword", "category"], keywords=top_keywords)
+    return filtered_prompts.groupby(["primary_keyword", "category"]).size().reset_index(name="count")
+
+
+def previous_keyword_trends_data(db):
+    top_keywords = db.get_keywords_by_type("primary").head(5)["keyword"].tolist()
+    keyword_counts = db.get_daily_counts("keyword")
+    return keyword_counts[keyword_counts["primary_keyword"].isin(top_keywords)].reset_index(drop=True)
+
+
+def assert_service_matches_previous(service, db):
+    assert service.get_prompt_metrics() == previous_prompt_metrics(db)
+    assert records(service.get_prompt_time_data()) == records(previous_prompts_per_day(db).reset_index())
+    assert records(service.get_category_distribution()) == records(previous_category_distribution(db))
+    assert records(service.get_template_time_data()) == records(db.get_daily_counts("template"))
+
+    usage = db.get_template_usage_stats()
+    assert records(service.get_template_usage()[usage.columns]) == records(usage)
+    expected = previous_template_metrics(db)
+    assert records(service.get_template_metrics()[expected.columns]) == records(expected)
+
+    assert records(service.get_keyword_category_data()) == records(previous_keyword_category_data(db))
+    assert records(service.get_keyword_trends_data()) == records(previous_keyword_trends_data(db))
+
+    recent = db.get_prompts_df(columns=["timestamp", "template_id", "primary_keyword", "category", "audience"],
+                               limit=10, newest_first=True).sort_values("timestamp", ascending=False)
+    recent["timestamp"] = recent["timestamp"].dt.strftime('%Y-%m-%d %H:%M')
+    assert records(service.get_recent_prompts(10)) == records(recent)
+
+
+def test_service_matches_previous_implementation(service, db):
+    assert_service_matches_previous(service, db)
+
+
+def test_service_matches_previous_implementation_after_new_prompts_and_archiving(service, db):
+    assert_service_matches_previous(service, db)
+    db.save_prompt_generations(make_prompts(random.Random(23), 50, 5))
+    assert_service_matches_previous(service, db)
+    assert db.archive_prompts(older_than_days=120)
+    assert_service_matches_previous(service, db)
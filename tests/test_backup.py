@@ -0,0 +1,145 @@
+"""Online backups and restores, under write load and with prompt archives"""
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from utils.analytics_aggregates import IncrementalAggregator
+from utils.analytics_cache import DatasetCache
+from utils.backup import backup_database, restore_database, verify_database
+from utils.database import DatabaseManager
+
+
+def test_backup_finishes_while_a_writer_is_inserting(tmp_path):
+    db_path = str(tmp_path / "prompts.db")
+    db = DatabaseManager(db_path, archive_dir=str(tmp_path / "archive"))
+    db.save_prompt_generations([{
+        "template_id": "default",
+        "primary_keyword": f"keyword {number}",
+        "category": "Business",
+        "audience": "Marketers",
+        "secondary": "",
+        "prompt_text": f"prompt {number} " + "x" * 2000
+    } for number in range(3000)])
+    db.pool.close_all()
+
+    stop = threading.Event()
+
+    def write():
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            while not stop.is_set():
+                conn.execute("INSERT INTO config (key, value) VALUES (?, '1')", (f"writer-{time.monotonic()}",))
+                conn.commit()
+                time.sleep(0.005)
+        finally:
+            conn.close()
+
+    writer = threading.Thread(target=write, daemon=True)
+    writer.start()
+    result = {}
+    backup = threading.Thread(target=lambda: result.update(
+        backup_database(db_path, str(tmp_path / "backups"), pages=8, sleep=0.01, max_restarts=2)
+    ), daemon=True)
+    try:
+        backup.start()
+        backup.join(30)
+    finally:
+        stop.set()
+        writer.join(5)
+
+    assert not backup.is_alive(), "backup never finished under write load"
+    assert result["restarts"] > 0 and result["single_step"]
+    assert verify_database(result["path"]) == (True, "ok")
+    conn = sqlite3.connect(result["path"])
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM prompts").fetchone()[0] == 3000
+    finally:
+        conn.close()
+    assert os.listdir(tmp_path / "backups") == [os.path.basename(result["path"])]
+
+
+def seeded_database(tmp_path, count=120):
+    """Database with prompts spread over the last 300 days"""
+    db = DatabaseManager(str(tmp_path / "prompts.db"), archive_dir=str(tmp_path / "archive"))
+    now = datetime.now()
+    db.save_prompt_generations([{
+        "timestamp": (now - timedelta(days=number * 300 / count)).strftime("%Y-%m-%d %H:%M:%S"),
+        "template_id": "default",
+        "primary_keyword": f"keyword {number % 7}",
+        "category": "Business",
+        "audience": "Marketers",
+        "secondary": "",
+        "prompt_text": f"prompt {number}"
+    } for number in range(count)])
+    return db
+
+
+def prompt_ids(db):
+    return sorted(db.get_prompts_df(columns=["id"])["id"])
+
+
+def test_backup_includes_archives(tmp_path):
+    db = seeded_database(tmp_path)
+    expected = prompt_ids(db)
+    assert db.archive_prompts(older_than_days=100)
+    backup = backup_database(db.db_path, str(tmp_path / "backups"), archive_dir=db.archive_dir)
+    assert backup["archives"] == len(db.list_archives()) > 0
+
+    shutil.rmtree(db.archive_dir)
+    restored = restore_database(backup["path"], db.db_path, archive_dir=db.archive_dir)
+    assert restored["archives"] == backup["archives"]
+    assert prompt_ids(db) == expected
+    db.pool.close_all()
+
+
+def test_restoring_a_backup_from_before_archiving_counts_prompts_once(tmp_path):
+    db = seeded_database(tmp_path)
+    expected = prompt_ids(db)
+    with_archives = backup_database(db.db_path, str(tmp_path / "backups"), archive_dir=db.archive_dir)
+    without_archives = backup_database(db.db_path, str(tmp_path / "old-backups"))
+    assert db.archive_prompts(older_than_days=100)
+
+    # The backup's (empty) set of archives replaces the live ones
+    restore_database(with_archives["path"], db.db_path, archive_dir=db.archive_dir)
+    assert db.list_archives() == []
+    assert prompt_ids(db) == expected
+
+    # A backup without archives keeps the live ones and drops the prompts they hold
+    assert db.archive_prompts(older_than_days=100)
+    restored = restore_database(without_archives["path"], db.db_path, archive_dir=db.archive_dir)
+    assert restored["duplicates_removed"] > 0
+    assert prompt_ids(db) == expected
+    db.pool.close_all()
+
+
+def test_restore_rebuilds_analytics_of_the_replaced_data(tmp_path):
+    db = DatabaseManager(str(tmp_path / "prompts.db"), archive_dir=str(tmp_path / "archive"))
+
+    def add(template_id, count):
+        db.save_prompt_generations([{
+            "template_id": template_id,
+            "primary_keyword": "ai tools",
+            "category": "Business",
+            "audience": "Marketers",
+            "secondary": "",
+            "prompt_text": f"prompt {number}"
+        } for number in range(count)])
+
+    aggregator = IncrementalAggregator(db)
+    cache = DatasetCache(db.get_data_version)
+    add("a", 10)
+    backup = backup_database(db.db_path, str(tmp_path / "backups"), archive_dir=db.archive_dir)
+    add("a", 5)
+    aggregator.refresh()
+    cache.get("prompts", lambda: len(db.get_prompts_df(columns=["id"])))
+
+    restore_database(backup["path"], db.db_path, archive_dir=db.archive_dir)
+    add("b", 8)
+    assert aggregator.refresh() == "rebuilt"
+    usage = aggregator.template_usage().set_index("template_id")["usage_count"].to_dict()
+    assert usage == {"a": 10, "b": 8}
+    assert cache.get("prompts", lambda: len(db.get_prompts_df(columns=["id"]))) == 18
+    db.pool.close_all()
@@ -0,0 +1,35 @@
+"""Connection pool and prompt query behaviour of DatabaseManager"""
+import pytest
+
+from utils.database import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "prompts.db"), archive_dir=str(tmp_path / "archive"))
+    yield db
+    db.pool.close_all()
+
+
+def test_closing_a_connection_twice_returns_it_once(db):
+    conn = db.get_connection()
+    conn.close()
+    conn.close()
+    first = db.get_connection()
+    second = db.get_connection()
+    try:
+        assert first is not second
+        assert db.pool.get_stats()["in_use"] == 2
+    finally:
+        first.close()
+        second.close()
+    assert db.pool.get_stats()["in_use"] == 0
+
+
+def test_prompt_range_bounds_must_be_timestamps(db):
+    db.save_prompt_generation("default", "ai tools", "Business", "Marketers", "", "prompt")
+    assert len(db.get_prompts_df(start="2000-01-01")) == 1
+    with pytest.raises(ValueError):
+        db.get_prompts_df(start="last tuesday")
+    with pytest.raises(ValueError):
+        db.get_prompts_df(end="2024-13-45")
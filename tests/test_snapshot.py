@@ -0,0 +1,73 @@
+"""Reads through SnapshotDatabaseManager"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.analytics_aggregates import IncrementalAggregator
+from utils.database import DatabaseManager, SnapshotDatabaseManager
+from utils.query_builder import AggregateQuery
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "prompts.db"), archive_dir=str(tmp_path / "archive"))
+    now = datetime.now()
+    db.save_prompt_generations([{
+        "timestamp": (now - timedelta(days=2 * number)).strftime("%Y-%m-%d %H:%M:%S"),
+        "template_id": "default",
+        "category": "Business",
+        "primary_keyword": "ai tools",
+        "audience": "Marketers",
+        "secondary": "",
+        "prompt_text": f"prompt {number}"
+    } for number in range(100)])
+    yield db
+    db.pool.close_all()
+
+
+def test_snapshot_taken_before_archiving_counts_prompts_once(db):
+    snapshot = SnapshotDatabaseManager(db, max_age=3600)
+    try:
+        assert len(snapshot.get_prompts_df(columns=["id"])) == 100
+        assert db.archive_prompts(older_than_days=100)
+
+        assert len(db.get_prompts_df(columns=["id"])) == 100
+        assert len(snapshot.get_prompts_df(columns=["id"])) == 100
+        assert snapshot.aggregate(AggregateQuery("prompts").count())["count"].tolist() == [100]
+        aggregator = IncrementalAggregator(snapshot)
+        aggregator.refresh()
+        assert aggregator.prompts_per_day()["count"].sum() == 100
+    finally:
+        snapshot.pool.close_all()
+
+
+def test_stale_snapshot_is_served_while_it_refreshes(db, monkeypatch):
+    snapshot = SnapshotDatabaseManager(db, max_age=0.05)
+    try:
+        assert len(snapshot.get_prompts_df(columns=["id"])) == 100
+        db.save_prompt_generation("default", "chatbots", "Business", "Marketers", "", "prompt")
+        time.sleep(0.1)
+
+        copying = threading.Event()
+        release = threading.Event()
+        refresh = snapshot.refresh
+
+        def slow_refresh():
+            copying.set()
+            assert release.wait(5)
+            refresh()
+        monkeypatch.setattr(snapshot, "refresh", slow_refresh)
+
+        assert len(snapshot.get_prompts_df(columns=["id"])) == 100
+        assert copying.wait(5)
+        assert len(snapshot.get_prompts_df(columns=["id"])) == 100
+        assert snapshot.get_snapshot_stats()["refreshing"]
+
+        release.set()
+        snapshot._refresher.join(5)
+        assert len(snapshot.get_prompts_df(columns=["id"])) == 101
+        assert snapshot.stats["refreshes"] == 2
+    finally:
+        snapshot.pool.close_all()
@@ -0,0 +1,32 @@
+"""Shutdown behaviour of the write-behind queue"""
+import threading
+import time
+
+from utils.write_behind import BATCHED, WriteBehindQueue
+
+
+def test_rows_submitted_while_closing_are_written():
+    written = []
+    lock = threading.Lock()
+
+    def write_batch(rows):
+        time.sleep(0.005)
+        with lock:
+            written.extend(rows)
+
+    write_queue = WriteBehindQueue(write_batch, mode=BATCHED, max_size=1, batch_size=1)
+
+    def produce(offset):
+        for number in range(50):
+            write_queue.submit(offset + number)
+
+    producers = [threading.Thread(target=produce, args=(offset * 1000,), daemon=True) for offset in range(8)]
+    for producer in producers:
+        producer.start()
+    time.sleep(0.01)
+    write_queue.close()
+    for producer in producers:
+        producer.join(5)
+
+    assert not any(producer.is_alive() for producer in producers), "a submit() never returned"
+    assert sorted(written) == sorted(offset * 1000 + number for offset in range(8) for number in range(50))
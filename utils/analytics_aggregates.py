@@ -0,0 +1,250 @@
+"""
+Incremental analytics aggregates for SEO Prompt Generator
+Keeps prompt counters in memory and advances them with the prompts added
+since the last refresh, so the cost of a refresh follows new activity
+rather than the size of the prompt history
+"""
+import threading
+import time
+from collections import Counter, defaultdict
+
+import pandas as pd
+
+from utils.database import ROLLUP_TABLES, DAY_FORMAT, parse_datetimes, to_categorical
+from utils.query_builder import AggregateQuery
+
+
+def _value(value):
+    """A result cell, with NULL/NaN as None"""
+    return None if pd.isna(value) else value
+
+
+class IncrementalAggregator:
+    """
+    Per-day template, category and keyword counts, template usage and
+    keyword sets maintained from new prompt rows
+
+    A refresh reads only prompts with id > last_seen_id. Deleted or
+    archived prompts (counted by a trigger), migrations and restored
+    backups can't be applied as deltas, so they trigger a full rebuild
+    instead.
+    """
+
+    def __init__(self, db_manager):
+        """
+        Parameters:
+        - db_manager: DatabaseManager (or snapshot) to read prompts from
+        """
+        self.db_manager = db_manager
+        # Re-entrant: result builders use other results
+        self._lock = threading.RLock()
+        self._reset()
+        self.stats = {
+            "refreshes": 0,
+            "rebuilds": 0,
+            "rows_applied": 0,
+            "last_refresh_ms": 0.0,
+            "last_rebuild_ms": 0.0
+        }
+
+    def _reset(self):
+        self.last_seen_id = 0
+        self.signature = None
+        # (day, key) -> prompts, one counter per rollup dimension
+        self.daily = {dimension: Counter() for dimension in ROLLUP_TABLES}
+        # day -> prompts, including prompts without a template/category/keyword
+        self.daily_totals = Counter()
+        self.template_last_used = {}
+        self.template_keywords = defaultdict(set)
+        self.keyword_categories = Counter()
+        # Result frames built since the counters last changed
+        self._frames = {}
+
+    @staticmethod
+    def _query():
+        return (AggregateQuery("prompts")
+                .group_by("date(timestamp)", "day")
+                .group_by("template_id")
+                .group_by("category")
+                .group_by("primary_keyword")
+                .count()
+                .max("timestamp", "last_used"))
+
+    def _apply(self, frame):
+        """Add one grouped batch of prompts to the counters"""
+        for row in frame.itertuples(index=False, name=None):
+            day, template_id, category, keyword, count, last_used = map(_value, row)
+            count = int(count)
+            if day is not None:
+                self.daily_totals[day] += count
+            if template_id is not None:
+                if day is not None:
+                    self.daily["template"][(day, template_id)] += count
+                if last_used is not None and last_used > self.template_last_used.get(template_id, ""):
+                    self.template_last_used[template_id] = last_used
+                if keyword is not None:
+                    self.template_keywords[template_id].add(keyword)
+            if day is not None and category is not None:
+                self.daily["category"][(day, category)] += count
+            if day is not None and keyword is not None:
+                self.daily["keyword"][(day, keyword)] += count
+            if keyword is not None and category is not None:
+                self.keyword_categories[(keyword, category)] += count
+            self.stats["rows_applied"] += count
+
+    def refresh(self):
+        """
+        Bring the counters up to date with the database
+
+        Returns:
+        - "rebuilt", "advanced" or "current"
+        """
+        with self._lock:
+            started = time.perf_counter()
+            try:
+                max_id, deletes, schema_version, generation = self.db_manager.get_prompt_watermark()
+                signature = (deletes, schema_version, generation)
+                if signature != self.signature or max_id < self.last_seen_id:
+                    self._rebuild(max_id, signature)
+                    result = "rebuilt"
+                elif max_id > self.last_seen_id:
+                    query = self._query().where("id > ?", self.last_seen_id).where("id <= ?", max_id)
+                    for frame in self.db_manager.iter_aggregate(query, include_archives=False):
+                        self._apply(frame)
+                    self.last_seen_id = max_id
+                    self._frames = {}
+                    result = "advanced"
+                else:
+                    result = "current"
+            except Exception as e:
+                # Keep serving the last good counters; the next refresh retries
+                print(f"Error refreshing analytics aggregates: {str(e)}")
+                return "failed"
+
+            self.stats["refreshes"] += 1
+            self.stats["last_refresh_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            return result
+
+    def _rebuild(self, max_id, signature):
+        started = time.perf_counter()
+        self._reset()
+        try:
+            # One archive at a time, so memory is bounded by the largest part
+            for frame in self.db_manager.iter_aggregate(self._query().where("id <= ?", max_id)):
+                self._apply(frame)
+        except Exception:
+            self._reset()
+            raise
+        self.last_seen_id = max_id
+        self.signature = signature
+        self.stats["rebuilds"] += 1
+        self.stats["last_rebuild_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+    # ------------------------------------------------------------------
+    # Results
+    #
+    # Frames are built once per state of the counters and shared by every
+    # caller - treat them as read-only. Dates are datetime64[ns] and the
+    # template, category and keyword columns are categoricals.
+    # ------------------------------------------------------------------
+    def _frame(self, key, build):
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is None:
+                frame = self._frames[key] = build()
+            return frame
+
+    def daily_counts(self, dimension):
+        """
+        Daily prompt counts of a dimension, like DatabaseManager.get_daily_counts
+
+        Returns:
+        - DataFrame with date, the dimension's prompts column and count
+        """
+        _, column = ROLLUP_TABLES[dimension]
+
+        def build():
+            rows = sorted((day, key, count) for (day, key), count in self.daily[dimension].items())
+            df = pd.DataFrame(rows, columns=["date", column, "count"])
+            df["date"] = parse_datetimes(df["date"], DAY_FORMAT)
+            return to_categorical(df)
+
+        return self._frame(("daily", dimension), build)
+
+    def prompts_per_day(self):
+        """DataFrame with date and count columns"""
+        def build():
+            df = pd.DataFrame(sorted(self.daily_totals.items()), columns=["date", "count"])
+            df["date"] = parse_datetimes(df["date"], DAY_FORMAT)
+            return df
+
+        return self._frame("prompts_per_day", build)
+
+    def totals(self, dimension):
+        """
+        Total prompts of every value of a dimension, most used first
+
+        Returns:
+        - DataFrame with the dimension's prompts column and count
+        """
+        _, column = ROLLUP_TABLES[dimension]
+
+        def build():
+            totals = Counter()
+            for (_, key), count in self.daily[dimension].items():
+                totals[key] += count
+            rows = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+            return to_categorical(pd.DataFrame(rows, columns=[column, "count"]))
+
+        return self._frame(("totals", dimension), build)
+
+    def template_usage(self):
+        """
+        Same result as DatabaseManager.get_template_usage_stats
+
+        Returns:
+        - DataFrame with template_id, usage_count and last_used columns,
+          most used first
+        """
+        def build():
+            usage = self.totals("template").rename(columns={"count": "usage_count"})
+            usage["last_used"] = parse_datetimes(usage["template_id"].astype(str).map(self.template_last_used))
+            return usage
+
+        return self._frame("template_usage", build)
+
+    def template_keyword_diversity(self):
+        """DataFrame with template_id and keyword_diversity (unique primary keywords) columns"""
+        def build():
+            rows = sorted((template_id, len(keywords)) for template_id, keywords in self.template_keywords.items())
+            return to_categorical(pd.DataFrame(rows, columns=["template_id", "keyword_diversity"]))
+
+        return self._frame("template_keyword_diversity", build)
+
+    def keyword_category_counts(self, keywords):
+        """
+        Prompts of the given primary keywords by category
+
+        Returns:
+        - DataFrame with primary_keyword, category and count columns
+        """
+        keywords = tuple(sorted(set(keywords)))
+
+        def build():
+            rows = sorted((keyword, category, count)
+                          for (keyword, category), count in self.keyword_categories.items()
+                          if keyword in keywords)
+            return to_categorical(pd.DataFrame(rows, columns=["primary_keyword", "category", "count"]))
+
+        return self._frame(("keyword_category", keywords), build)
+
+    def get_stats(self):
+        """Refresh counters and the size of the aggregates"""
+        with self._lock:
+            return {
+                **self.stats,
+                "last_seen_id": self.last_seen_id,
+                "daily_entries": sum(len(counter) for counter in self.daily.values()) + len(self.daily_totals),
+                "template_keyword_pairs": sum(len(keywords) for keywords in self.template_keywords.values()),
+                "keyword_category_pairs": len(self.keyword_categories)
+            }
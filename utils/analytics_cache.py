@@ -0,0 +1,162 @@
+"""
+Analytics dataset cache for SEO Prompt Generator
+Keeps the datasets behind the analytics dashboard in memory until the
+data version changes, so every callback and worker thread shares one load
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def dataset_size(value):
+    """Approximate memory held by a cached dataset, in bytes"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ("version", "value", "size", "loaded_at")
+
+    def __init__(self, version, value, size):
+        self.version = version
+        self.value = value
+        self.size = size
+        self.loaded_at = time.monotonic()
+
+
+class _Load:
+    """A load in progress that other callers of the same dataset wait on"""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class DatasetCache:
+    """Named datasets cached per data version, with a memory budget and TTL"""
+
+    def __init__(self, version_loader, max_bytes=64 * 1024 * 1024, ttl=300):
+        """
+        Parameters:
+        - version_loader: Returns the current data version; datasets cached
+          under another version are reloaded. None disables caching.
+        - max_bytes: Memory budget; least recently used datasets are dropped
+          beyond it and larger datasets are not cached at all
+        - ttl: Seconds a dataset is kept even if the version doesn't change
+        """
+        self.version_loader = version_loader
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        # Bumped by clear() so a load racing with it isn't cached stale
+        self._epoch = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.shared_loads = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, name, loader):
+        """
+        Get a dataset, calling loader() when it isn't cached for the current
+        data version
+
+        The same object is returned to every caller - treat it as read-only.
+        """
+        version = self.version_loader()
+        if version is None:
+            return loader()
+        key = (name, version)
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                if entry.version == version and time.monotonic() - entry.loaded_at <= self.ttl:
+                    self._entries.move_to_end(name)
+                    self.hits += 1
+                    return entry.value
+                if entry.version == version:
+                    self.expirations += 1
+                self._drop(name)
+
+            load = self._loading.get(key)
+            owner = load is None
+            if owner:
+                load = self._loading[key] = _Load()
+                self.misses += 1
+                epoch = self._epoch
+            else:
+                self.shared_loads += 1
+
+        if not owner:
+            # Another caller is loading this dataset already - share its result
+            load.done.wait()
+            if load.error is not None:
+                raise load.error
+            return load.value
+
+        try:
+            load.value = loader()
+        except BaseException as e:
+            load.error = e
+            raise
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+                if load.error is None and epoch == self._epoch:
+                    self._store(name, version, load.value)
+            load.done.set()
+        return load.value
+
+    def _store(self, name, version, value):
+        size = dataset_size(value)
+        if size > self.max_bytes:
+            return
+        if name in self._entries:
+            self._drop(name)
+        self._entries[name] = _Entry(version, value, size)
+        self._size += size
+        while self._size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, name):
+        self._size -= self._entries.pop(name).size
+
+    def clear(self):
+        """Drop every cached dataset"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._epoch += 1
+
+    def stats(self):
+        """Counters suitable for exporting to logs or metrics"""
+        with self._lock:
+            lookups = self.hits + self.misses + self.shared_loads
+            return {
+                "datasets": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared_loads": self.shared_loads,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round((self.hits + self.shared_loads) / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,341 @@
+"""
+Online backup and restore for SEO Prompt Generator
+Copies the live SQLite database with the sqlite3 backup API a few pages at
+a time, sleeping between steps so writers keep getting the lock
+
+A backup also copies the monthly prompt archives into a directory next to
+the database copy, so it holds the full prompt history; restoring it puts
+those archives back as well.
+"""
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+
+from utils.database import ARCHIVE_FILE_PATTERN
+
+BACKUP_PREFIX = "seo_generator-"
+BACKUP_SUFFIX = ".db"
+# <backup>.db.archives/ holds the archive databases of a backup
+ARCHIVES_SUFFIX = ".archives"
+
+
+class _TooManyRestarts(Exception):
+    """Raised from the progress callback to abandon a stepped copy"""
+
+
+def _copy(source, target, pages, sleep, progress=None, max_restarts=3):
+    """
+    Copy source into target in steps of `pages` pages
+
+    SQLite starts a stepped copy over whenever another connection writes to
+    the source between steps, so under steady writes it may never finish.
+    After max_restarts restarts the copy is redone in a single step, which
+    holds one read transaction instead (under WAL writers carry on).
+
+    Returns:
+    - (restarts, single_step) - restarts seen and whether the copy had to
+      finish in one step
+    """
+    state = {"remaining": None, "restarts": 0}
+
+    def report(status, remaining, total):
+        if state["remaining"] is not None and remaining > state["remaining"]:
+            state["restarts"] += 1
+            if state["restarts"] > max_restarts:
+                raise _TooManyRestarts()
+        state["remaining"] = remaining
+        if progress:
+            progress({"copied_pages": total - remaining, "total_pages": total})
+        if sleep:
+            time.sleep(sleep)
+
+    try:
+        source.backup(target, pages=pages, progress=report)
+        return state["restarts"], False
+    except _TooManyRestarts:
+        pass
+
+    def report_done(status, remaining, total):
+        if progress:
+            progress({"copied_pages": total - remaining, "total_pages": total})
+
+    source.backup(target, pages=-1, progress=report_done)
+    return state["restarts"], True
+
+
+def _archive_files(archive_dir):
+    """Monthly archive databases in a directory, oldest first"""
+    if not archive_dir or not os.path.isdir(archive_dir):
+        return []
+    return sorted(Path(archive_dir).glob(ARCHIVE_FILE_PATTERN))
+
+
+def _copy_file(path, target_path):
+    """Copy a database that nothing writes to in one backup step"""
+    source = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+        target.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        source.close()
+        target.close()
+
+
+def _remove_archived_prompts(conn, archive_dir):
+    """
+    Delete prompts of the main database that an archive also holds
+
+    Returns:
+    - Number of prompts deleted
+    """
+    removed = 0
+    for path in _archive_files(archive_dir):
+        conn.execute("ATTACH DATABASE ? AS archive", (str(path),))
+        try:
+            removed += conn.execute(
+                "DELETE FROM main.prompts WHERE id IN (SELECT id FROM archive.prompts)"
+            ).rowcount
+            conn.commit()
+        finally:
+            conn.execute("DETACH DATABASE archive")
+    if removed:
+        conn.execute('''
+        DELETE FROM prompt_bodies
+        WHERE NOT EXISTS (SELECT 1 FROM prompts WHERE prompts.body_hash = prompt_bodies.hash)
+        ''')
+        conn.commit()
+    return removed
+
+
+def verify_database(path):
+    """
+    Check that a database file is intact and looks like ours
+
+    Returns:
+    - (ok, message)
+    """
+    if not os.path.exists(path):
+        return False, f"{path} does not exist"
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    except sqlite3.Error as e:
+        return False, str(e)
+    try:
+        result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        if result != "ok":
+            return False, f"Integrity check failed: {result}"
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        missing = {"config", "prompts", "keywords"} - tables
+        if missing:
+            return False, f"Missing tables: {', '.join(sorted(missing))}"
+        return True, "ok"
+    except sqlite3.Error as e:
+        return False, str(e)
+    finally:
+        conn.close()
+
+
+def backup_database(db_path, backup_dir, keep=7, pages=256, sleep=0.01, progress=None, max_restarts=3,
+                    archive_dir=None):
+    """
+    Back up a live database without blocking its writers
+
+    Parameters:
+    - db_path: Database to back up
+    - backup_dir: Directory for the rotating backups
+    - keep: Number of backups kept; older ones are deleted (0 keeps all)
+    - pages: Pages copied per step
+    - sleep: Seconds to sleep between steps
+    - progress: Called with copied/total page counts after every step
+    - max_restarts: Restarts caused by writers before the copy finishes in
+      a single step
+    - archive_dir: Directory of the monthly prompt archives to back up
+      along with the database
+
+    Returns:
+    - Dictionary with the backup path, size in bytes (archives included),
+      duration, the number of archives, the number of restarts, whether it
+      finished in a single step and the backups removed by rotation
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    started = time.monotonic()
+    name = f"{BACKUP_PREFIX}{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}{BACKUP_SUFFIX}"
+    path = os.path.join(backup_dir, name)
+    tmp_path = os.path.join(backup_dir, f".tmp-{name}")
+    tmp_archives = tmp_path + ARCHIVES_SUFFIX
+
+    source = sqlite3.connect(db_path)
+    target = sqlite3.connect(tmp_path)
+    try:
+        restarts, single_step = _copy(source, target, pages, sleep, progress, max_restarts)
+        # A standalone copy: fold everything into the file itself
+        target.execute("PRAGMA journal_mode=DELETE")
+    except BaseException:
+        target.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        source.close()
+    target.close()
+
+    # Archives after the database: prompts archived in between end up in
+    # both, and restore_database() drops the main table's copy
+    archives = []
+    if archive_dir:
+        try:
+            os.makedirs(tmp_archives)
+            for archive_path in _archive_files(archive_dir):
+                _copy_file(str(archive_path), os.path.join(tmp_archives, archive_path.name))
+                archives.append(archive_path.name)
+        except BaseException:
+            shutil.rmtree(tmp_archives, ignore_errors=True)
+            os.remove(tmp_path)
+            raise
+
+    ok, message = verify_database(tmp_path)
+    if not ok:
+        os.remove(tmp_path)
+        shutil.rmtree(tmp_archives, ignore_errors=True)
+        raise sqlite3.DatabaseError(f"Backup failed verification: {message}")
+    # The database file goes last; its presence marks a complete backup
+    if archive_dir:
+        os.replace(tmp_archives, path + ARCHIVES_SUFFIX)
+    os.replace(tmp_path, path)
+
+    return {
+        "path": path,
+        "size_bytes": _backup_size(path),
+        "archives": len(archives),
+        "duration_seconds": round(time.monotonic() - started, 3),
+        "restarts": restarts,
+        "single_step": single_step,
+        "removed": rotate_backups(backup_dir, keep)
+    }
+
+
+def _backup_size(path):
+    """Size of a backup, its archives included"""
+    size = os.path.getsize(path)
+    for archive_path in _archive_files(path + ARCHIVES_SUFFIX):
+        size += archive_path.stat().st_size
+    return size
+
+
+def list_backups(backup_dir):
+    """Get the backups in a directory, newest first"""
+    backups = []
+    for path in Path(backup_dir).glob(f"{BACKUP_PREFIX}*{BACKUP_SUFFIX}"):
+        stat = path.stat()
+        backups.append({
+            "name": path.name,
+            "path": str(path),
+            "size_bytes": _backup_size(str(path)),
+            "created": datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+        })
+    return sorted(backups, key=lambda backup: backup["name"], reverse=True)
+
+
+def rotate_backups(backup_dir, keep):
+    """Delete all but the newest `keep` backups; returns the removed paths"""
+    if not keep:
+        return []
+    removed = []
+    for backup in list_backups(backup_dir)[keep:]:
+        os.remove(backup["path"])
+        shutil.rmtree(backup["path"] + ARCHIVES_SUFFIX, ignore_errors=True)
+        removed.append(backup["path"])
+    return removed
+
+
+def restore_database(backup_path, db_path, pages=256, sleep=0.01, progress=None, max_restarts=3,
+                     archive_dir=None):
+    """
+    Restore a backup into the live database
+
+    The backup is verified before anything is touched, copied in over the
+    live database (open connections see the restored content) and the
+    result is verified again.
+
+    With an archive_dir, the archives saved with the backup replace the
+    live ones. Backups made without archives keep the live archives. Either
+    way, prompts the archives hold are then deleted from the restored main
+    table, so no prompt is counted twice.
+
+    The restored database gets a data_generation (in config) above both
+    the backup's and the replaced database's, so analytics aggregates and
+    cached datasets of the replaced data are rebuilt even where prompt
+    ids and counts happen to line up again.
+
+    Returns:
+    - Dictionary with the restored path, size in bytes, duration, the
+      number of archives restored and of duplicate prompts removed
+    """
+    ok, message = verify_database(backup_path)
+    if not ok:
+        raise sqlite3.DatabaseError(f"Refusing to restore {backup_path}: {message}")
+
+    started = time.monotonic()
+    source = sqlite3.connect(f"file:{backup_path}?mode=ro", uri=True)
+    target = sqlite3.connect(db_path, timeout=30)
+    try:
+        replaced_generation = _data_generation(target)
+        _copy(source, target, pages, sleep, progress, max_restarts)
+        result = target.execute("PRAGMA integrity_check").fetchone()[0]
+        if result != "ok":
+            raise sqlite3.DatabaseError(f"Restored database failed integrity check: {result}")
+        restored_archives = _restore_archives(backup_path + ARCHIVES_SUFFIX, archive_dir) if archive_dir else 0
+        duplicates = _remove_archived_prompts(target, archive_dir) if archive_dir else 0
+        generation = max(replaced_generation, _data_generation(target)) + 1
+        with target:
+            target.execute('''
+            INSERT INTO config (key, value) VALUES ('data_generation', ?)
+            ON CONFLICT (key) DO UPDATE SET value = excluded.value
+            ''', (str(generation),))
+    finally:
+        source.close()
+        target.close()
+
+    return {
+        "path": db_path,
+        "size_bytes": os.path.getsize(db_path),
+        "archives": restored_archives,
+        "duplicates_removed": duplicates,
+        "data_generation": generation,
+        "duration_seconds": round(time.monotonic() - started, 3)
+    }
+
+
+def _data_generation(conn):
+    """The data_generation of a database, 0 if it has none (or no config table yet)"""
+    try:
+        row = conn.execute("SELECT value FROM config WHERE key = 'data_generation'").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return int(row[0]) if row and row[0] is not None else 0
+
+
+def _restore_archives(backup_archives, archive_dir):
+    """
+    Replace the live archives with those saved in a backup
+
+    Returns:
+    - Number of archives restored; 0 (live archives kept) for backups
+      made without an archives directory
+    """
+    if not os.path.isdir(backup_archives):
+        return 0
+    os.makedirs(archive_dir, exist_ok=True)
+    saved = {path.name: path for path in _archive_files(backup_archives)}
+    for path in _archive_files(archive_dir):
+        if path.name not in saved:
+            os.remove(path)
+    for name, path in saved.items():
+        tmp_path = os.path.join(archive_dir, f".tmp-{name}")
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, os.path.join(archive_dir, name))
+    return len(saved)
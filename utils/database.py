@@ -3,15 +3,532 @@ import json
 import pandas as pd
 from datetime import datetime
 import os
-from config import DB_PATH
+import calendar
+import hashlib
+import threading
+import time
+import zlib
+from collections import deque
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+from config import (DB_PATH, ARCHIVE_DIR, PROMPT_RETENTION_DAYS, ANALYTICS_SNAPSHOT_MAX_AGE, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_CONNECTION_MAX_LIFETIME, DB_JOURNAL_MODE,
+                    DB_SYNCHRONOUS, DB_BUSY_TIMEOUT_MS, DB_CACHE_SIZE_KB, DB_MMAP_SIZE)
+
+# Search result counts stop here - counting every match of a very common
+# word would cost more than ranking the page that is actually shown
+SEARCH_COUNT_LIMIT = 1000
+
+# Columns of the prompts table; prompt bodies are only read when asked for
+PROMPT_COLUMNS = ("id", "timestamp", "created_at", "template_id", "primary_keyword", "category", "audience",
+                  "secondary", "body_hash", "prompt_text")
+DEFAULT_PROMPT_COLUMNS = tuple(column for column in PROMPT_COLUMNS if column != "prompt_text")
+
+# Prompt columns with few distinct values - cheaper as pandas categoricals
+CATEGORICAL_PROMPT_COLUMNS = ("template_id", "category", "primary_keyword", "audience")
+
+# Format of rollup days
+DAY_FORMAT = "%Y-%m-%d"
+
+def hash_prompt_body(text):
+    """Content hash that prompt bodies are stored under"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def compress_prompt_body(text):
+    """Compress a prompt body for the prompt_bodies table"""
+    return zlib.compress(text.encode("utf-8"))
+
+
+def inflate_prompt_body(body):
+    """Decompress a prompt_bodies.body value (also registered as SQL inflate_body())"""
+    return zlib.decompress(body).decode("utf-8") if body is not None else None
+
+
+def _move_prompt_bodies(conn, chunk_size=500):
+    """Migration step: move inline prompt_text values into prompt_bodies"""
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, prompt_text FROM prompts WHERE id > ? AND prompt_text IS NOT NULL ORDER BY id LIMIT ?",
+            (last_id, chunk_size)
+        ).fetchall()
+        if not rows:
+            return
+        bodies = {}
+        updates = []
+        for prompt_id, text in rows:
+            body_hash = hash_prompt_body(text)
+            if body_hash not in bodies:
+                bodies[body_hash] = (body_hash, compress_prompt_body(text), len(text))
+            updates.append((body_hash, prompt_id))
+        conn.executemany("INSERT OR IGNORE INTO prompt_bodies (hash, body, size) VALUES (?, ?, ?)",
+                         bodies.values())
+        conn.executemany("UPDATE prompts SET body_hash = ?, prompt_text = NULL WHERE id = ?", updates)
+        last_id = rows[-1][0]
+
+
+def normalize_keyword(keyword):
+    """Key used to match keywords regardless of case and spacing"""
+    return " ".join(keyword.split()).casefold()
+
+
+def _rebuild_keywords_table(conn):
+    """Migration step: key keywords by (normalized, type), merging duplicates"""
+    conn.execute('''
+    CREATE TABLE keywords_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        keyword TEXT NOT NULL,
+        normalized TEXT NOT NULL,
+        type TEXT NOT NULL DEFAULT 'primary',
+        category TEXT,
+        usage_count INTEGER DEFAULT 0,
+        last_used TEXT,
+        source TEXT,
+        UNIQUE (normalized, type)
+    )
+    ''')
+    merged = {}
+    for keyword, keyword_type, category, usage_count, last_used, source in conn.execute(
+        "SELECT keyword, type, category, usage_count, last_used, source FROM keywords ORDER BY id"
+    ):
+        if not keyword or not keyword.strip():
+            continue
+        key = (normalize_keyword(keyword), keyword_type or "primary")
+        if key not in merged:
+            merged[key] = [keyword.strip(), category, usage_count or 0, last_used, source]
+        else:
+            row = merged[key]
+            row[2] += usage_count or 0
+            row[3] = max(filter(None, (row[3], last_used)), default=None)
+    conn.executemany(
+        '''INSERT INTO keywords_new (keyword, normalized, type, category, usage_count, last_used, source)
+        VALUES (?, ?, ?, ?, ?, ?, ?)''',
+        [(row[0], key[0], key[1], row[1], row[2], row[3], row[4]) for key, row in merged.items()]
+    )
+    conn.execute("DROP TABLE keywords")
+    conn.execute("ALTER TABLE keywords_new RENAME TO keywords")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_keywords_type_usage ON keywords(type, usage_count)")
+
+
+# Monthly archive databases are named prompts_YYYY_MM.db
+ARCHIVE_FILE_PATTERN = "prompts_*_*.db"
+
+# Archived prompts whose id is still in the hot table are skipped: a
+# snapshot copied before a month was archived still has those rows in its
+# own prompts table, and a restored backup can hold them again
+ARCHIVED_ONLY = "NOT EXISTS (SELECT 1 FROM main.prompts AS live WHERE live.id = prompts.id)"
+
+ARCHIVE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS archive.prompts (
+        id INTEGER PRIMARY KEY,
+        timestamp TEXT,
+        created_at INTEGER,
+        template_id TEXT,
+        primary_keyword TEXT,
+        category TEXT,
+        audience TEXT,
+        secondary TEXT,
+        body_hash TEXT,
+        prompt_text TEXT
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS archive.idx_prompts_created_at ON prompts(created_at)",
+    '''
+    CREATE TABLE IF NOT EXISTS archive.prompt_bodies (
+        hash TEXT PRIMARY KEY,
+        body BLOB NOT NULL,
+        size INTEGER NOT NULL
+    ) WITHOUT ROWID
+    ''',
+]
+
+
+def _month_bounds(month):
+    """Epoch seconds of the start of a YYYY-MM month and of the next month"""
+    year, month_number = (int(part) for part in month.split("-"))
+    start = calendar.timegm((year, month_number, 1, 0, 0, 0))
+    if month_number == 12:
+        year, month_number = year + 1, 1
+    else:
+        month_number += 1
+    return start, calendar.timegm((year, month_number, 1, 0, 0, 0))
+
+
+# Daily prompt counts by dimension: dimension -> (table, prompts column).
+# Insert triggers keep them current; deleting prompts (e.g. archiving) leaves
+# them as they are, so they count every prompt ever generated.
+ROLLUP_TABLES = {
+    "template": ("daily_template_counts", "template_id"),
+    "category": ("daily_category_counts", "category"),
+    "keyword": ("daily_keyword_counts", "primary_keyword"),
+}
+
+# Schema migrations as (version, description, steps), applied in order
+# by DatabaseManager.migrate() and recorded as schema_version in the config table.
+# A step is an SQL statement or a function called with the connection.
+# Never edit a migration that has shipped - add a new one instead.
+MIGRATIONS = [
+    (1, "Indexes for analytics queries", [
+        "CREATE INDEX IF NOT EXISTS idx_prompts_timestamp ON prompts(timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_prompts_template_timestamp ON prompts(template_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_prompts_keyword ON prompts(primary_keyword)",
+        "CREATE INDEX IF NOT EXISTS idx_keywords_type_usage ON keywords(type, usage_count)",
+    ]),
+    (2, "Numeric created_at column for prompt date ranges", [
+        # Seconds since the epoch of the (naive) timestamp text, so range
+        # scans compare integers and can be answered from the index alone
+        "ALTER TABLE prompts ADD COLUMN created_at INTEGER",
+        "UPDATE prompts SET created_at = CAST(strftime('%s', timestamp) AS INTEGER) WHERE created_at IS NULL",
+        "CREATE INDEX IF NOT EXISTS idx_prompts_created_at ON prompts(created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_prompts_template_created_at ON prompts(template_id, created_at)",
+        "DROP INDEX IF EXISTS idx_prompts_timestamp",
+        "DROP INDEX IF EXISTS idx_prompts_template_timestamp",
+        # Rows inserted without created_at (older code, manual inserts) get it filled in
+        '''
+        CREATE TRIGGER IF NOT EXISTS prompts_fill_created_at AFTER INSERT ON prompts
+        WHEN NEW.created_at IS NULL
+        BEGIN
+            UPDATE prompts SET created_at = CAST(strftime('%s', NEW.timestamp) AS INTEGER)
+            WHERE id = NEW.id;
+        END
+        ''',
+    ]),
+    (3, "Daily rollup tables kept current by insert triggers", [
+        *(f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            day TEXT NOT NULL,
+            {column} TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, {column})
+        ) WITHOUT ROWID
+        ''' for table, column in ROLLUP_TABLES.values()),
+        *(f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON prompts
+        WHEN NEW.{column} IS NOT NULL
+        BEGIN
+            INSERT INTO {table} (day, {column}, count) VALUES (date(NEW.timestamp), NEW.{column}, 1)
+            ON CONFLICT (day, {column}) DO UPDATE SET count = count + 1;
+        END
+        ''' for table, column in ROLLUP_TABLES.values()),
+        "INSERT INTO config (key, value) VALUES ('rollups_need_rebuild', '1')",
+    ]),
+    (4, "Content-addressed, compressed prompt bodies", [
+        '''
+        CREATE TABLE IF NOT EXISTS prompt_bodies (
+            hash TEXT PRIMARY KEY,
+            body BLOB NOT NULL,
+            size INTEGER NOT NULL
+        ) WITHOUT ROWID
+        ''',
+        "ALTER TABLE prompts ADD COLUMN body_hash TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_prompts_body_hash ON prompts(body_hash)",
+        # prompts.prompt_text is kept only for rows written by older code
+        _move_prompt_bodies,
+    ]),
+    (5, "Keywords keyed by normalized text and type", [
+        _rebuild_keywords_table,
+    ]),
+    (6, "Count prompt deletes so in-memory aggregates know to rebuild", [
+        "INSERT OR IGNORE INTO config (key, value) VALUES ('prompt_deletes', '0')",
+        '''
+        CREATE TRIGGER IF NOT EXISTS prompts_count_deletes AFTER DELETE ON prompts
+        BEGIN
+            UPDATE config SET value = CAST(value AS INTEGER) + 1 WHERE key = 'prompt_deletes';
+        END
+        ''',
+    ]),
+]
+
+
+def timestamp_to_epoch(value):
+    """
+    Convert a prompt timestamp (text, date or datetime) to the integer stored
+    in prompts.created_at, matching SQLite's strftime('%s', timestamp);
+    unparseable text gives None, stored as NULL like SQLite would
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    return calendar.timegm(value.timetuple())
+
+
+def range_bound_to_epoch(value, name="bound"):
+    """
+    Convert a start/end filter value with timestamp_to_epoch, raising
+    ValueError instead of returning None - a NULL bound matches no rows
+    """
+    epoch = timestamp_to_epoch(value)
+    if epoch is None:
+        raise ValueError(f"Invalid {name} timestamp: {value!r}")
+    return epoch
+
+
+def epochs_to_datetimes(values):
+    """Convert prompts.created_at integers to datetime64[ns]; NULL becomes NaT"""
+    return pd.to_datetime(pd.Series(values, dtype="float64"), unit="s").astype("datetime64[ns]")
+
+
+def parse_datetimes(values, format="ISO8601"):
+    """
+    Parse date or timestamp text to datetime64[ns] with a known format
+    instead of inferring one; unparseable values become NaT
+    """
+    return pd.to_datetime(values, format=format, errors="coerce").astype("datetime64[ns]")
+
+
+def to_categorical(df, columns=CATEGORICAL_PROMPT_COLUMNS):
+    """Store the low-cardinality columns of a DataFrame as categoricals"""
+    for column in columns:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
+
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection whose close() hands it back to its pool"""
+    
+    pool = None
+    created_at = 0.0
+    generation = 0
+    # Set while a borrower holds the connection; guards against double release
+    checked_out = False
+    
+    def close(self):
+        if self.pool is not None:
+            self.pool.release(self)
+        else:
+            super().close()
+    
+    def discard(self):
+        """Really close the connection"""
+        self.pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """
+    Pool of SQLite connections shared by all threads of a process
+    
+    A connection is used by one thread at a time. A thread that already
+    holds a connection and asks for another one while the pool is exhausted
+    gets an extra connection instead of waiting on itself.
+    """
+    
+    def __init__(self, db_path, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                 max_lifetime=DB_CONNECTION_MAX_LIFETIME, read_only=False):
+        """
+        Parameters:
+        - db_path: SQLite database file
+        - size: Connections kept open at most, apart from re-entrant extras
+        - timeout: Seconds to wait for a free connection
+        - max_lifetime: Seconds after which a returned connection is recycled
+        - read_only: Open connections with mode=ro and leave the journal
+          settings of the file alone
+        """
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.read_only = read_only
+        # Bumped by invalidate(); connections from older generations are closed
+        self.generation = 0
+        
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._open = 0
+        self._pid = os.getpid()
+        self._held = threading.local()
+        self._reset_stats()
+    
+    def _reset_stats(self):
+        self.stats = {
+            "created": 0,
+            "closed": 0,
+            "recycled": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "timeouts": 0,
+            "overflow": 0,
+            "in_use": 0
+        }
+    
+    def _connect(self):
+        if self.read_only:
+            conn = sqlite3.connect(f"file:{os.path.abspath(self.db_path)}?mode=ro", uri=True,
+                                   timeout=DB_BUSY_TIMEOUT_MS / 1000, factory=PooledConnection,
+                                   check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, timeout=DB_BUSY_TIMEOUT_MS / 1000,
+                                   factory=PooledConnection, check_same_thread=False)
+            conn.execute(f"PRAGMA journal_mode={DB_JOURNAL_MODE}")
+            conn.execute(f"PRAGMA synchronous={DB_SYNCHRONOUS}")
+        conn.execute(f"PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT_MS)}")
+        conn.execute(f"PRAGMA cache_size={-int(DB_CACHE_SIZE_KB)}")
+        conn.execute(f"PRAGMA mmap_size={int(DB_MMAP_SIZE)}")
+        conn.create_function("inflate_body", 1, inflate_prompt_body, deterministic=True)
+        conn.created_at = time.monotonic()
+        conn.generation = self.generation
+        conn.pool = self
+        return conn
+    
+    def _check_fork(self):
+        # Connections must not be shared with a forked child process
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._idle = deque()
+            self._open = 0
+            self._held = threading.local()
+            self._reset_stats()
+    
+    def _expired(self, conn):
+        return (conn.generation != self.generation
+                or time.monotonic() - conn.created_at > self.max_lifetime)
+    
+    def acquire(self):
+        """Check a connection out of the pool"""
+        held = getattr(self._held, "count", 0)
+        deadline = None
+        with self._condition:
+            self._check_fork()
+            while True:
+                while self._idle:
+                    conn = self._idle.pop()
+                    if not self._expired(conn):
+                        self._checked_out(conn, held)
+                        return conn
+                    self._open -= 1
+                    self.stats["recycled"] += 1
+                    self._close(conn)
+                
+                if self._open < self.size or held:
+                    if self._open >= self.size:
+                        self.stats["overflow"] += 1
+                    self._open += 1
+                    break
+                
+                # Pool exhausted - wait for another thread to release one
+                now = time.monotonic()
+                if deadline is None:
+                    deadline = now + self.timeout
+                    self.stats["waits"] += 1
+                elif now >= deadline:
+                    self.stats["timeouts"] += 1
+                    raise sqlite3.OperationalError("Timed out waiting for a database connection")
+                self._condition.wait(deadline - now)
+                self.stats["wait_seconds"] += time.monotonic() - now
+        
+        try:
+            conn = self._connect()
+        except BaseException:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.stats["created"] += 1
+            self._checked_out(conn, held)
+        return conn
+    
+    def _checked_out(self, conn, held):
+        conn.checked_out = True
+        self._held.count = held + 1
+        self.stats["checkouts"] += 1
+        self.stats["in_use"] += 1
+    
+    def release(self, conn):
+        """Return a connection to the pool; releasing it again is a no-op"""
+        with self._condition:
+            if not conn.checked_out:
+                return
+            conn.checked_out = False
+        if conn.in_transaction:
+            conn.rollback()
+        # Undo per-use settings so the next borrower gets plain tuples
+        conn.row_factory = None
+        self._held.count = max(getattr(self._held, "count", 1) - 1, 0)
+        with self._condition:
+            if os.getpid() != self._pid:
+                conn.pool = None
+                return
+            self.stats["in_use"] -= 1
+            if self._open > self.size or self._expired(conn):
+                self._open -= 1
+                self.stats["recycled"] += 1
+                self._close(conn)
+            else:
+                self._idle.append(conn)
+            self._condition.notify()
+    
+    def _close(self, conn):
+        self.stats["closed"] += 1
+        conn.discard()
+    
+    def invalidate(self):
+        """
+        Retire every connection, e.g. after the database file was replaced
+        
+        Idle connections are closed now; checked-out ones are closed when
+        they are returned.
+        """
+        with self._condition:
+            self.generation += 1
+            while self._idle:
+                self._open -= 1
+                self.stats["recycled"] += 1
+                self._close(self._idle.pop())
+    
+    def close_all(self):
+        """Close every idle connection"""
+        with self._condition:
+            while self._idle:
+                self._open -= 1
+                self._close(self._idle.pop())
+    
+    def get_stats(self):
+        """Pool counters plus the current number of open and idle connections"""
+        with self._condition:
+            now = time.monotonic()
+            return {
+                **self.stats,
+                "wait_seconds": round(self.stats["wait_seconds"], 3),
+                "size": self.size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "max_lifetime": self.max_lifetime,
+                "oldest_idle_seconds": round(max((now - conn.created_at for conn in self._idle), default=0.0), 3)
+            }
+
+
+# One pool per database file, shared by every DatabaseManager in the process
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path, read_only=False):
+    """Get the connection pool of a database file"""
+    key = (os.path.abspath(db_path), read_only)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(db_path, read_only=read_only)
+        return pool
 
 class DatabaseManager:
     """Centralized database manager for SEO Generator"""
     
-    def __init__(self, db_path=DB_PATH):
+    def __init__(self, db_path=DB_PATH, archive_dir=None):
         """Initialize database connection and create tables if needed"""
         self.db_path = db_path
+        self.archive_dir = archive_dir or ARCHIVE_DIR or os.path.join(os.path.dirname(db_path), "archive")
         self._ensure_directory_exists()
+        self.pool = get_pool(db_path)
         self.init_db()
     
     def _ensure_directory_exists(self):
@@ -21,12 +538,129 @@ class DatabaseManager:
             os.makedirs(db_dir)
     
     def get_connection(self):
-        """Get a database connection"""
-        return sqlite3.connect(self.db_path)
+        """Get a pooled database connection; close() returns it to the pool"""
+        return self.pool.acquire()
+    
+    @contextmanager
+    def transaction(self, immediate=False):
+        """
+        Run a block in one transaction, committed on success and rolled
+        back on error
+        
+        Parameters:
+        - immediate: Take the write lock up front (BEGIN IMMEDIATE) so a
+          read-then-write block can't fail halfway on a busy database
+        """
+        conn = self.get_connection()
+        try:
+            if immediate:
+                conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def get_pool_stats(self):
+        """Get checkout, wait and lifetime statistics of the connection pool"""
+        return self.pool.get_stats()
+    
+    def snapshot(self, max_age=ANALYTICS_SNAPSHOT_MAX_AGE):
+        """
+        Get a read-only view of this database for reporting queries
+        
+        Parameters:
+        - max_age: Seconds a snapshot may lag behind the live database;
+          0 reads the live database
+        
+        Returns:
+        - SnapshotDatabaseManager, or this manager when max_age is 0
+        """
+        if not max_age:
+            return self
+        return SnapshotDatabaseManager(self, max_age)
     
     def init_db(self):
         """Initialize database schema"""
+        with self.transaction() as conn:
+            self._create_schema(conn)
+        self.migrate()
+    
+    def get_config_value(self, key, default=None):
+        """Get a value from the config table"""
+        conn = self.get_connection()
+        try:
+            row = conn.execute("SELECT value FROM config WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else default
+        finally:
+            conn.close()
+    
+    def set_config_value(self, key, value):
+        """Store a value in the config table"""
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)", (key, str(value)))
+    
+    def get_schema_version(self):
+        """Get the version of the last migration applied to the database"""
+        conn = self.get_connection()
+        try:
+            row = conn.execute("SELECT value FROM config WHERE key = 'schema_version'").fetchone()
+            return int(row[0]) if row else 0
+        finally:
+            conn.close()
+    
+    def migrate(self):
+        """
+        Apply the migrations newer than the database's schema_version
+        
+        Each migration runs in its own transaction together with the
+        schema_version update, so a failed migration leaves the database at
+        the previous version.
+        
+        Returns:
+        - List of the versions that were applied
+        """
+        applied = []
+        if self.get_schema_version() >= MIGRATIONS[-1][0]:
+            return applied
+        
+        for version, description, steps in MIGRATIONS:
+            with self.transaction(immediate=True) as conn:
+                # Re-read under the write lock in case another process migrated
+                row = conn.execute("SELECT value FROM config WHERE key = 'schema_version'").fetchone()
+                if row and int(row[0]) >= version:
+                    continue
+                try:
+                    for step in steps:
+                        if callable(step):
+                            step(conn)
+                        else:
+                            conn.execute(step)
+                except sqlite3.Error as e:
+                    print(f"Error applying migration {version} ({description}): {str(e)}")
+                    raise
+                conn.execute(
+                    "INSERT OR REPLACE INTO config (key, value) VALUES ('schema_version', ?)",
+                    (str(version),)
+                )
+            applied.append(version)
+        
+        # Rollup tables created by a migration start out empty
         conn = self.get_connection()
+        try:
+            needs_rebuild = conn.execute(
+                "SELECT 1 FROM config WHERE key = 'rollups_need_rebuild'"
+            ).fetchone()
+        finally:
+            conn.close()
+        if needs_rebuild:
+            self.rebuild_rollups()
+        return applied
+    
+    def _create_schema(self, conn):
+        """Create the tables and indexes that don't exist yet"""
         cursor = conn.cursor()
         
         # Create tables if they don't exist
@@ -62,9 +696,1094 @@ class DatabaseManager:
         )
         ''')
         
+        # Templates and their version history
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS templates (
+            id TEXT PRIMARY KEY,
+            name TEXT,
+            intent TEXT,
+            tone TEXT,
+            schema_type TEXT,
+            category TEXT,
+            data TEXT,
+            version INTEGER NOT NULL DEFAULT 1,
+            source TEXT,
+            created_at TEXT,
+            updated_at TEXT
+        )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_templates_category ON templates(category, name)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_templates_updated ON templates(updated_at)")
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS template_versions (
+            template_id TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            data TEXT,
+            saved_at TEXT,
+            PRIMARY KEY (template_id, version)
+        ) WITHOUT ROWID
+        ''')
+        
+        # Full-text search index over templates (plain table if FTS5 is missing)
+        self.fts_enabled = self._has_fts5(cursor)
+        if self.fts_enabled:
+            cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS template_search USING fts5(
+                template_id UNINDEXED,
+                version UNINDEXED,
+                name,
+                intent,
+                tone,
+                schema_type,
+                category,
+                body,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+            ''')
+        else:
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS template_search (
+                template_id TEXT,
+                version TEXT,
+                name TEXT,
+                intent TEXT,
+                tone TEXT,
+                schema_type TEXT,
+                category TEXT,
+                body TEXT
+            )
+            ''')
+        
         # Add other tables from your existing DatabaseManager
+    
+    @staticmethod
+    def _has_fts5(cursor):
+        """Check whether this SQLite build supports FTS5"""
+        try:
+            return bool(cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0])
+        except sqlite3.Error:
+            return False
+    
+    def save_prompt_generation(self, template_id, primary_keyword, category, audience, secondary, prompt_text):
+        """Save a generated prompt and return its row ID"""
+        with self.transaction() as conn:
+            return self._insert_prompts(conn, [{
+                "template_id": template_id,
+                "primary_keyword": primary_keyword,
+                "category": category,
+                "audience": audience,
+                "secondary": secondary,
+                "prompt_text": prompt_text
+            }])
+    
+    def _insert_prompts(self, conn, prompts):
+        """
+        Insert prompts, storing each distinct body once in prompt_bodies
+        
+        Returns:
+        - Row ID of the last inserted prompt
+        """
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = []
+        texts = {}
+        for prompt in prompts:
+            row_timestamp = prompt.get("timestamp", timestamp)
+            text = prompt["prompt_text"]
+            body_hash = None
+            if text is not None:
+                body_hash = hash_prompt_body(text)
+                texts[body_hash] = text
+            rows.append((row_timestamp, timestamp_to_epoch(row_timestamp), prompt["template_id"],
+                         prompt["primary_keyword"], prompt.get("category"), prompt.get("audience"),
+                         prompt.get("secondary"), body_hash))
+        
+        # Only compress bodies that aren't stored yet
+        if texts:
+            placeholders = ", ".join("?" * len(texts))
+            stored = {row[0] for row in conn.execute(
+                f"SELECT hash FROM prompt_bodies WHERE hash IN ({placeholders})", list(texts)
+            )}
+            conn.executemany(
+                "INSERT OR IGNORE INTO prompt_bodies (hash, body, size) VALUES (?, ?, ?)",
+                [(body_hash, compress_prompt_body(text), len(text))
+                 for body_hash, text in texts.items() if body_hash not in stored]
+            )
+        
+        insert = '''
+        INSERT INTO prompts (timestamp, created_at, template_id, primary_keyword, category, audience,
+                             secondary, body_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        '''
+        if len(rows) == 1:
+            return conn.execute(insert, rows[0]).lastrowid
+        conn.executemany(insert, rows)
+        return conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    
+    def save_prompt_generations(self, prompts):
+        """
+        Save many generated prompts in a single transaction
+        
+        Parameters:
+        - prompts: Iterable of dictionaries with template_id, primary_keyword,
+          category, audience, secondary and prompt_text keys
+        
+        Returns:
+        - Number of rows saved
+        """
+        prompts = list(prompts)
+        if not prompts:
+            return 0
+        
+        with self.transaction() as conn:
+            self._insert_prompts(conn, prompts)
+        return len(prompts)
+    
+    @staticmethod
+    def _add_in_filter(clauses, params, column, values):
+        """Add a column = ? / column IN (...) filter for a value or list of values"""
+        if values is None:
+            return
+        if isinstance(values, str):
+            values = [values]
+        values = list(values)
+        if len(values) == 1:
+            clauses.append(f"{column} = ?")
+        else:
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+
+    def get_prompts_df(self, columns=None, start=None, end=None, template_ids=None, categories=None,
+                       keywords=None, limit=None, newest_first=False, include_archives=True, categorical=False):
+        """
+        Load generated prompts into a DataFrame, filtering and selecting in SQL
+
+        Parameters:
+        - columns: Columns to load; defaults to every column except prompt_text,
+          which is only loaded when asked for by name
+        - start: Only prompts from this date/datetime on (inclusive)
+        - end: Only prompts before this date/datetime (exclusive); a start
+          or end that isn't a valid timestamp raises ValueError
+        - template_ids, categories, keywords: A value or list of values to
+          match against template_id, category and primary_keyword
+        - limit: Maximum number of rows
+        - newest_first: Return the newest prompts first instead of the oldest
+        - include_archives: Also read the monthly archives the date range
+          reaches into (all of them when there is no start date)
+        - categorical: Load template_id, category, primary_keyword and
+          audience as categoricals
+
+        Returns:
+        - DataFrame with the requested columns; timestamp is datetime64[ns]
+        """
+        columns = list(columns) if columns else list(DEFAULT_PROMPT_COLUMNS)
+        unknown = [column for column in columns if column not in PROMPT_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown prompt columns: {', '.join(unknown)}")
+
+        clauses = []
+        params = []
+        if start is not None:
+            clauses.append("prompts.created_at >= ?")
+            params.append(range_bound_to_epoch(start, "start"))
+        if end is not None:
+            clauses.append("prompts.created_at < ?")
+            params.append(range_bound_to_epoch(end, "end"))
+        self._add_in_filter(clauses, params, "prompts.template_id", template_ids)
+        self._add_in_filter(clauses, params, "prompts.category", categories)
+        self._add_in_filter(clauses, params, "prompts.primary_keyword", keywords)
+
+        # Prompt bodies are decompressed in SQL, and only when asked for.
+        # Timestamps are read as the created_at epoch, which converts to
+        # datetime64 without parsing text
+        special = {
+            "prompt_text": "COALESCE(prompts.prompt_text, inflate_body(prompt_bodies.body)) AS prompt_text",
+            "timestamp": "prompts.created_at AS timestamp"
+        }
+        select = [special.get(column, f"prompts.{column}") for column in columns]
+        if limit is not None:
+            params.append(int(limit))
+
+        def build_query(schema):
+            query = f"SELECT {', '.join(select)} FROM {schema}.prompts AS prompts"
+            if "prompt_text" in columns:
+                query += (f" LEFT JOIN {schema}.prompt_bodies AS prompt_bodies"
+                          " ON prompt_bodies.hash = prompts.body_hash")
+            where = clauses if schema == "main" else clauses + [ARCHIVED_ONLY]
+            if where:
+                query += " WHERE " + " AND ".join(where)
+            query += " ORDER BY prompts.id DESC" if newest_first else " ORDER BY prompts.id"
+            if limit is not None:
+                query += " LIMIT ?"
+            return query
+
+        archives = self._archives_for_range(start, end) if include_archives else []
+        conn = self.get_connection()
+        try:
+            frames = [pd.read_sql_query(build_query("main"), conn, params=params)]
+            # Archives hold older prompts: read them newest first after the
+            # hot table, or oldest first before it
+            for _, path in (reversed(archives) if newest_first else archives):
+                if newest_first and limit is not None and sum(len(frame) for frame in frames) >= limit:
+                    break
+                with self._attached(conn, path):
+                    frame = pd.read_sql_query(build_query("archive"), conn, params=params)
+                if newest_first:
+                    frames.append(frame)
+                else:
+                    frames.insert(len(frames) - 1, frame)
+            frames = [frame for frame in frames if not frame.empty] or frames[:1]
+            df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+            if limit is not None:
+                df = df.head(int(limit))
+        except Exception as e:
+            print(f"Error loading prompts: {str(e)}")
+            df = pd.DataFrame(columns=columns)
+        finally:
+            conn.close()
+
+        if "timestamp" in df.columns:
+            df["timestamp"] = epochs_to_datetimes(df["timestamp"])
+        if "id" in df.columns:
+            df["id"] = df["id"].astype("int64")
+        if categorical:
+            to_categorical(df)
+        return df
+
+    def get_prompt_text(self, prompt_id):
+        """Get the full text of one generated prompt, or None if it doesn't exist"""
+        conn = self.get_connection()
+        try:
+            row = conn.execute('''
+            SELECT prompts.prompt_text, prompt_bodies.body
+            FROM prompts
+            LEFT JOIN prompt_bodies ON prompt_bodies.hash = prompts.body_hash
+            WHERE prompts.id = ?
+            ''', (prompt_id,)).fetchone()
+            
+            # Not in the hot table - it may have been archived
+            for _, path in reversed(self.list_archives() if row is None else []):
+                with self._attached(conn, path):
+                    row = conn.execute('''
+                    SELECT prompts.prompt_text, prompt_bodies.body
+                    FROM archive.prompts AS prompts
+                    LEFT JOIN archive.prompt_bodies AS prompt_bodies ON prompt_bodies.hash = prompts.body_hash
+                    WHERE prompts.id = ?
+                    ''', (prompt_id,)).fetchone()
+                if row is not None:
+                    break
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return row[0] if row[0] is not None else inflate_prompt_body(row[1])
+    
+    def prune_prompt_bodies(self):
+        """Delete stored prompt bodies no prompt refers to; returns how many"""
+        with self.transaction() as conn:
+            return conn.execute('''
+            DELETE FROM prompt_bodies
+            WHERE NOT EXISTS (SELECT 1 FROM prompts WHERE prompts.body_hash = prompt_bodies.hash)
+            ''').rowcount
+    
+    def get_prompt_watermark(self):
+        """
+        Get the newest prompt id and what would invalidate aggregates of
+        older prompts
+        
+        Returns:
+        - Tuple of MAX(id) of prompts, the number of prompts ever deleted
+          (or archived), the schema version and the data generation (bumped
+          when a backup is restored)
+        """
+        conn = self.get_connection()
+        try:
+            max_id, deletes, schema_version, generation = conn.execute('''
+            SELECT (SELECT MAX(id) FROM prompts),
+                   (SELECT value FROM config WHERE key = 'prompt_deletes'),
+                   (SELECT value FROM config WHERE key = 'schema_version'),
+                   (SELECT value FROM config WHERE key = 'data_generation')
+            ''').fetchone()
+            return max_id or 0, int(deletes or 0), int(schema_version or 0), int(generation or 0)
+        finally:
+            conn.close()
+    
+    def get_data_version(self):
+        """
+        Get a cheap version of the prompt and keyword data
+        
+        Returns:
+        - The prompt watermark plus the count and total usage of keywords,
+          which changes whenever prompts are added or deleted, keywords
+          are used or a backup is restored; None if it can't be read
+        """
+        try:
+            watermark = self.get_prompt_watermark()
+            conn = self.get_connection()
+            try:
+                keyword_usage = conn.execute("SELECT COUNT(*), TOTAL(usage_count) FROM keywords").fetchone()
+            finally:
+                conn.close()
+            return (*watermark, *keyword_usage)
+        except Exception as e:
+            print(f"Error reading data version: {str(e)}")
+            return None
+    
+    def get_template_usage_stats(self):
+        """
+        Get how often and how recently each template was used
+
+        Returns:
+        - DataFrame with template_id, usage_count and last_used columns,
+          most used first
+        """
+        conn = self.get_connection()
+        try:
+            # Counts come from the rollups so archived prompts still count;
+            # last_used is exact while a template has prompts in the hot table
+            df = pd.read_sql_query('''
+            SELECT rollup.template_id, rollup.usage_count,
+                   COALESCE(datetime(recent.last_created_at, 'unixepoch'), rollup.last_day) AS last_used
+            FROM (
+                SELECT template_id, SUM(count) AS usage_count, MAX(day) AS last_day
+                FROM daily_template_counts
+                GROUP BY template_id
+            ) AS rollup
+            LEFT JOIN (
+                SELECT template_id, MAX(created_at) AS last_created_at
+                FROM prompts
+                GROUP BY template_id
+            ) AS recent ON recent.template_id = rollup.template_id
+            ORDER BY rollup.usage_count DESC, rollup.template_id
+            ''', conn)
+        except Exception as e:
+            print(f"Error loading template usage: {str(e)}")
+            df = pd.DataFrame(columns=["template_id", "usage_count", "last_used"])
+        finally:
+            conn.close()
+
+        df["last_used"] = parse_datetimes(df["last_used"])
+        return df
+
+    def rebuild_rollups(self):
+        """
+        Recompute the daily rollup tables from the prompts table
+        
+        Returns:
+        - Dictionary of rollup table -> number of rows written
+        """
+        rows = {}
+        with self.transaction(immediate=True) as conn:
+            for table, column in ROLLUP_TABLES.values():
+                conn.execute(f"DELETE FROM {table}")
+                cursor = conn.execute(f'''
+                INSERT INTO {table} (day, {column}, count)
+                SELECT date(timestamp), {column}, COUNT(*)
+                FROM prompts
+                WHERE {column} IS NOT NULL AND timestamp IS NOT NULL
+                GROUP BY date(timestamp), {column}
+                ''')
+                rows[table] = cursor.rowcount
+            conn.execute("DELETE FROM config WHERE key = 'rollups_need_rebuild'")
+        
+        # Archived prompts count too
+        conn = self.get_connection()
+        try:
+            for _, path in self.list_archives():
+                with self._attached(conn, path):
+                    with conn:
+                        for table, column in ROLLUP_TABLES.values():
+                            cursor = conn.execute(f'''
+                            INSERT INTO main.{table} (day, {column}, count)
+                            SELECT date(timestamp), {column}, COUNT(*)
+                            FROM archive.prompts AS prompts
+                            WHERE {column} IS NOT NULL AND timestamp IS NOT NULL AND {ARCHIVED_ONLY}
+                            GROUP BY date(timestamp), {column}
+                            ON CONFLICT (day, {column}) DO UPDATE SET count = count + excluded.count
+                            ''')
+                            rows[table] += cursor.rowcount
+        finally:
+            conn.close()
+        return rows
+    
+    # ------------------------------------------------------------------
+    # Archives
+    # ------------------------------------------------------------------
+    @contextmanager
+    def _attached(self, conn, path):
+        """Attach an archive database as "archive" for the duration of a block"""
+        conn.execute("ATTACH DATABASE ? AS archive", (path,))
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute("DETACH DATABASE archive")
+    
+    def list_archives(self):
+        """Get the monthly archive databases as (YYYY-MM, path) pairs, oldest first"""
+        archives = []
+        for path in sorted(Path(self.archive_dir).glob(ARCHIVE_FILE_PATTERN)):
+            _, year, month = path.stem.split("_")
+            archives.append((f"{year}-{month}", str(path)))
+        return archives
+    
+    def _archives_for_range(self, start=None, end=None):
+        """Get the archives holding months that overlap [start, end)"""
+        start_epoch = range_bound_to_epoch(start, "start") if start is not None else None
+        end_epoch = range_bound_to_epoch(end, "end") if end is not None else None
+        archives = []
+        for month, path in self.list_archives():
+            month_start, month_end = _month_bounds(month)
+            if start_epoch is not None and month_end <= start_epoch:
+                continue
+            if end_epoch is not None and month_start >= end_epoch:
+                continue
+            archives.append((month, path))
+        return archives
+    
+    def archive_prompts(self, older_than_days=PROMPT_RETENTION_DAYS):
+        """
+        Move prompts older than a number of days into monthly archive databases
+        
+        Rollup tables are left untouched, so dashboard counts still include
+        the archived prompts. Prompt bodies go along with their prompts.
+        
+        Returns:
+        - Dictionary of YYYY-MM -> number of prompts archived
+        """
+        cutoff = timestamp_to_epoch(datetime.now() - timedelta(days=older_than_days))
+        conn = self.get_connection()
+        try:
+            months = [row[0] for row in conn.execute('''
+            SELECT DISTINCT strftime('%Y-%m', created_at, 'unixepoch')
+            FROM prompts
+            WHERE created_at < ?
+            ORDER BY 1
+            ''', (cutoff,))]
+        finally:
+            conn.close()
+        if not months:
+            return {}
+        
+        os.makedirs(self.archive_dir, exist_ok=True)
+        archived = {}
+        conn = self.get_connection()
+        try:
+            for month in months:
+                month_start, month_end = _month_bounds(month)
+                bounds = (month_start, min(month_end, cutoff))
+                path = os.path.join(self.archive_dir, f"prompts_{month.replace('-', '_')}.db")
+                with self._attached(conn, path):
+                    conn.execute("BEGIN IMMEDIATE")
+                    for statement in ARCHIVE_SCHEMA:
+                        conn.execute(statement)
+                    conn.execute('''
+                    INSERT OR IGNORE INTO archive.prompt_bodies (hash, body, size)
+                    SELECT hash, body, size FROM main.prompt_bodies
+                    WHERE hash IN (
+                        SELECT body_hash FROM main.prompts WHERE created_at >= ? AND created_at < ?
+                    )
+                    ''', bounds)
+                    conn.execute('''
+                    INSERT OR IGNORE INTO archive.prompts
+                        (id, timestamp, created_at, template_id, primary_keyword, category, audience,
+                         secondary, body_hash, prompt_text)
+                    SELECT id, timestamp, created_at, template_id, primary_keyword, category, audience,
+                           secondary, body_hash, prompt_text
+                    FROM main.prompts
+                    WHERE created_at >= ? AND created_at < ?
+                    ''', bounds)
+                    archived[month] = conn.execute(
+                        "DELETE FROM main.prompts WHERE created_at >= ? AND created_at < ?", bounds
+                    ).rowcount
+                    conn.commit()
+        finally:
+            conn.close()
+        
+        self.prune_prompt_bodies()
+        return archived
+    
+    def get_daily_counts(self, dimension, start=None, end=None, keys=None):
+        """
+        Get pre-aggregated daily prompt counts
+        
+        Parameters:
+        - dimension: "template", "category" or "keyword"
+        - start: First day to include (date, datetime or YYYY-MM-DD)
+        - end: Day to stop before (exclusive)
+        - keys: A value or list of values of the dimension to keep
+        
+        Returns:
+        - DataFrame with date (datetime64), the dimension's prompts column
+          (template_id, category or primary_keyword) and count
+        """
+        table, column = ROLLUP_TABLES[dimension]
+        clauses = []
+        params = []
+        if start is not None:
+            clauses.append("day >= ?")
+            params.append(str(start)[:10])
+        if end is not None:
+            clauses.append("day < ?")
+            params.append(str(end)[:10])
+        self._add_in_filter(clauses, params, column, keys)
+        
+        query = f"SELECT day AS date, {column}, count FROM {table}"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += f" ORDER BY day, {column}"
+        
+        conn = self.get_connection()
+        try:
+            df = pd.read_sql_query(query, conn, params=params)
+        except Exception as e:
+            print(f"Error loading daily {dimension} counts: {str(e)}")
+            df = pd.DataFrame(columns=["date", column, "count"])
+        finally:
+            conn.close()
+        
+        df["date"] = parse_datetimes(df["date"], DAY_FORMAT)
+        return df
+    
+    def aggregate(self, query, include_archives=True):
+        """
+        Run an AggregateQuery and return only its aggregated rows
+        
+        Parameters:
+        - query: utils.query_builder.AggregateQuery
+        - include_archives: For queries on prompts, also aggregate the
+          monthly archives; their partial results are combined with the
+          hot table's
+        
+        Returns:
+        - DataFrame with the query's columns
+        """
+        try:
+            if not (include_archives and query.table == "prompts" and self.list_archives()):
+                conn = self.get_connection()
+                try:
+                    sql, params = query.build()
+                    return pd.read_sql_query(sql, conn, params=params)
+                finally:
+                    conn.close()
+            return query.combine(list(self.iter_aggregate(query)))
+        except Exception as e:
+            print(f"Error running aggregate query: {str(e)}")
+            return pd.DataFrame(columns=query.columns)
+    
+    def iter_aggregate(self, query, include_archives=True):
+        """
+        Run an AggregateQuery on each part of a table separately
+        
+        Yields one DataFrame of query.partial() per part - the monthly
+        archives oldest first, then the hot table - for callers that fold
+        the parts into their own totals. Errors are raised.
+        """
+        archives = self.list_archives() if include_archives and query.table == "prompts" else []
+        partial = query.partial()
+        archived = query.partial().where(ARCHIVED_ONLY)
+        conn = self.get_connection()
+        try:
+            for _, path in archives:
+                with self._attached(conn, path):
+                    sql, params = archived.build(schema="archive")
+                    yield pd.read_sql_query(sql, conn, params=params)
+            sql, params = partial.build(schema="main")
+            yield pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+    
+    def record_keyword_usage(self, usages):
+        """
+        Add keyword usage counts in one batched upsert
+        
+        Parameters:
+        - usages: Iterable of (keyword, type, count, last_used, category)
+          tuples; keywords matching an existing row after normalization
+          update that row
+        
+        Returns:
+        - Number of keyword rows written
+        """
+        rows = [
+            (keyword.strip(), normalize_keyword(keyword), keyword_type, category, count, last_used)
+            for keyword, keyword_type, count, last_used, category in usages
+            if keyword and keyword.strip()
+        ]
+        if not rows:
+            return 0
+        
+        with self.transaction() as conn:
+            conn.executemany('''
+            INSERT INTO keywords (keyword, normalized, type, category, usage_count, last_used, source)
+            VALUES (?, ?, ?, ?, ?, ?, 'generator')
+            ON CONFLICT (normalized, type) DO UPDATE SET
+                usage_count = usage_count + excluded.usage_count,
+                last_used = MAX(COALESCE(last_used, ''), excluded.last_used),
+                category = COALESCE(category, excluded.category)
+            ''', rows)
+        return len(rows)
+    
+    def add_keyword(self, keyword, keyword_type, category=None, source="manual"):
+        """Add a keyword if it isn't known yet; returns whether a row was added"""
+        with self.transaction() as conn:
+            cursor = conn.execute('''
+            INSERT INTO keywords (keyword, normalized, type, category, usage_count, source)
+            VALUES (?, ?, ?, ?, 0, ?)
+            ON CONFLICT (normalized, type) DO NOTHING
+            ''', (keyword.strip(), normalize_keyword(keyword), keyword_type, category or None, source))
+            return cursor.rowcount > 0
+    
+    def get_keywords_by_type(self, keyword_type, limit=None):
+        """
+        Get the keywords of one type (primary, secondary, ...)
+
+        Returns:
+        - DataFrame of keywords, most used first
+        """
+        query = '''
+        SELECT keyword, type, category, usage_count, last_used, source
+        FROM keywords
+        WHERE type = ?
+        ORDER BY usage_count DESC, keyword
+        '''
+        params = [keyword_type]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+
+        conn = self.get_connection()
+        try:
+            return pd.read_sql_query(query, conn, params=params)
+        except Exception as e:
+            print(f"Error loading keywords: {str(e)}")
+            return pd.DataFrame(columns=["keyword", "type", "category", "usage_count", "last_used", "source"])
+        finally:
+            conn.close()
+
+    def save_template_records(self, templates, source="app"):
+        """
+        Store templates, adding a history version for every one that changed
+        
+        Parameters:
+        - templates: Dictionary of template_id -> template data
+        - source: Where the templates came from (app, import, ...)
+        
+        Returns:
+        - Dictionary of template_id -> current version for the changed templates
+        """
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        conn = self.get_connection()
+        try:
+            with conn:
+                ids = list(templates)
+                current = {}
+                # Look up existing rows in batches below SQLite's variable limit
+                for start in range(0, len(ids), 500):
+                    batch = ids[start:start + 500]
+                    current.update(
+                        (row[0], (row[1], row[2])) for row in conn.execute(
+                            f"SELECT id, version, data FROM templates WHERE id IN ({','.join('?' * len(batch))})",
+                            batch
+                        )
+                    )
+                
+                rows = []
+                versions = []
+                for template_id, template_data in templates.items():
+                    data = json.dumps(template_data, sort_keys=True)
+                    version, stored_data = current.get(template_id, (0, None))
+                    if data == stored_data:
+                        continue
+                    version += 1
+                    rows.append((
+                        template_id,
+                        template_data.get("name", template_id),
+                        template_data.get("intent", template_data.get("use_case", "")),
+                        template_data.get("tone", ""),
+                        template_data.get("schema", ""),
+                        template_data.get("category", "General"),
+                        data, version, source, now, now
+                    ))
+                    versions.append((template_id, version, data, now))
+                
+                conn.executemany('''
+                INSERT INTO templates (id, name, intent, tone, schema_type, category, data, version, source, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    name = excluded.name,
+                    intent = excluded.intent,
+                    tone = excluded.tone,
+                    schema_type = excluded.schema_type,
+                    category = excluded.category,
+                    data = excluded.data,
+                    version = excluded.version,
+                    source = excluded.source,
+                    updated_at = excluded.updated_at
+                ''', rows)
+                conn.executemany(
+                    "INSERT OR REPLACE INTO template_versions (template_id, version, data, saved_at) VALUES (?, ?, ?, ?)",
+                    versions
+                )
+        finally:
+            conn.close()
+        return {template_id: version for template_id, version, _, _ in versions}
+    
+    def save_template_record(self, template_id, template_data, source="app"):
+        """Store one template; returns its current version"""
+        versions = self.save_template_records({template_id: template_data}, source)
+        if template_id in versions:
+            return versions[template_id]
+        record = self.get_template_record(template_id)
+        return record["version"] if record else None
+    
+    def delete_template_record(self, template_id):
+        """Delete a template, keeping its version history"""
+        conn = self.get_connection()
+        try:
+            with conn:
+                conn.execute("DELETE FROM templates WHERE id = ?", (template_id,))
+        finally:
+            conn.close()
+    
+    def get_template_record(self, template_id):
+        """Get a stored template with its version metadata, or None"""
+        conn = self.get_connection()
+        try:
+            row = conn.execute(
+                "SELECT data, version, source, created_at, updated_at FROM templates WHERE id = ?",
+                (template_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        
+        if row is None:
+            return None
+        return {
+            "id": template_id,
+            "data": json.loads(row[0]),
+            "version": row[1],
+            "source": row[2],
+            "created_at": row[3],
+            "updated_at": row[4]
+        }
+    
+    def list_template_records(self, category=None, updated_since=None, limit=None):
+        """
+        List stored template summaries using the category/updated_at indexes
+        
+        Parameters:
+        - category: Only templates in this category, ordered by name
+        - updated_since: Only templates updated at or after this timestamp, newest first
+        - limit: Maximum number of templates
+        """
+        query = "SELECT id, name, intent, tone, schema_type, category, version, updated_at FROM templates"
+        conditions = []
+        params = []
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category)
+        if updated_since is not None:
+            conditions.append("updated_at >= ?")
+            params.append(updated_since)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY updated_at DESC" if updated_since is not None else " ORDER BY name"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        conn = self.get_connection()
+        try:
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+        
+        return [
+            {
+                "id": row[0],
+                "name": row[1],
+                "intent": row[2],
+                "tone": row[3],
+                "schema": row[4],
+                "category": row[5],
+                "version": row[6],
+                "updated_at": row[7]
+            }
+            for row in rows
+        ]
+    
+    def get_template_history(self, template_id):
+        """Get every stored version of a template, newest first"""
+        conn = self.get_connection()
+        try:
+            rows = conn.execute(
+                "SELECT version, data, saved_at FROM template_versions WHERE template_id = ? ORDER BY version DESC",
+                (template_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+        
+        return [{"version": row[0], "data": json.loads(row[1]), "saved_at": row[2]} for row in rows]
+    
+    @staticmethod
+    def _template_search_row(template_id, template_data):
+        """Search index row for a template, versioned by a checksum of its searchable text"""
+        fields = (
+            template_data.get("name", template_id),
+            template_data.get("intent", template_data.get("use_case", "")),
+            template_data.get("tone", ""),
+            template_data.get("schema", ""),
+            template_data.get("category", ""),
+            template_data.get("template", "")
+        )
+        version = format(zlib.crc32("\x1f".join(fields).encode("utf-8")), "08x")
+        return (template_id, version) + fields
+    
+    def index_template(self, template_id, template_data):
+        """Add or replace a template in the search index"""
+        conn = self.get_connection()
+        try:
+            with conn:
+                conn.execute("DELETE FROM template_search WHERE template_id = ?", (template_id,))
+                conn.execute("INSERT INTO template_search VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             self._template_search_row(template_id, template_data))
+        finally:
+            conn.close()
+    
+    def unindex_template(self, template_id):
+        """Remove a template from the search index"""
+        conn = self.get_connection()
+        try:
+            with conn:
+                conn.execute("DELETE FROM template_search WHERE template_id = ?", (template_id,))
+        finally:
+            conn.close()
+    
+    def sync_template_index(self, templates):
+        """
+        Bring the search index in line with a set of templates, touching only
+        the templates that were added, changed or removed
+        
+        Parameters:
+        - templates: Dictionary of template_id -> template data
+        
+        Returns:
+        - Number of index rows written or deleted
+        """
+        conn = self.get_connection()
+        try:
+            indexed = dict(conn.execute("SELECT template_id, version FROM template_search"))
+            
+            rows = [self._template_search_row(template_id, template_data)
+                    for template_id, template_data in templates.items()]
+            changed = [row for row in rows if indexed.get(row[0]) != row[1]]
+            removed = [(template_id,) for template_id in indexed if template_id not in templates]
+            
+            if changed or removed:
+                with conn:
+                    conn.executemany("DELETE FROM template_search WHERE template_id = ?",
+                                     removed + [(row[0],) for row in changed])
+                    conn.executemany("INSERT INTO template_search VALUES (?, ?, ?, ?, ?, ?, ?, ?)", changed)
+                    if self.fts_enabled and len(changed) + len(removed) > 100:
+                        conn.execute("INSERT INTO template_search(template_search) VALUES ('optimize')")
+            return len(changed) + len(removed)
+        finally:
+            conn.close()
+    
+    def search_templates(self, query, limit=20, offset=0):
+        """
+        Ranked full-text search over template name, intent, tone, schema, category and body
+        
+        Parameters:
+        - query: Free text typed by the user; the last word matches as a prefix
+        - limit: Maximum number of results
+        - offset: Number of results to skip, for pagination
+        
+        Returns:
+        - (results, total) where results is a list of dictionaries; total
+          stops counting at SEARCH_COUNT_LIMIT
+        """
+        terms = [term.replace('"', '') for term in query.split()]
+        terms = [term for term in terms if term]
+        if not terms:
+            return [], 0
+        
+        conn = self.get_connection()
+        try:
+            # Row objects on a local cursor - the pooled connection is shared
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            if self.fts_enabled:
+                # Quote every term so user input can't inject FTS syntax
+                match = " ".join(f'"{term}"' for term in terms) + "*"
+                total = cursor.execute(
+                    "SELECT COUNT(*) FROM (SELECT 1 FROM template_search WHERE template_search MATCH ? LIMIT ?)",
+                    (match, SEARCH_COUNT_LIMIT)
+                ).fetchone()[0]
+                rows = cursor.execute('''
+                SELECT template_id, name, intent, tone, schema_type, category,
+                       snippet(template_search, 7, '', '', '...', 12) AS snippet
+                FROM template_search
+                WHERE template_search MATCH ?
+                ORDER BY bm25(template_search, 0.0, 0.0, 10.0, 4.0, 2.0, 2.0, 4.0, 1.0)
+                LIMIT ? OFFSET ?
+                ''', (match, limit, offset)).fetchall()
+            else:
+                # No FTS5: every term must appear somewhere, ordered by name
+                where = " AND ".join(
+                    ["(name || ' ' || intent || ' ' || tone || ' ' || schema_type || ' ' || category || ' ' || body) LIKE ?"]
+                    * len(terms)
+                )
+                params = [f"%{term}%" for term in terms]
+                total = cursor.execute(
+                    f"SELECT COUNT(*) FROM (SELECT 1 FROM template_search WHERE {where} LIMIT ?)",
+                    params + [SEARCH_COUNT_LIMIT]
+                ).fetchone()[0]
+                rows = cursor.execute(f'''
+                SELECT template_id, name, intent, tone, schema_type, category, substr(body, 1, 80) AS snippet
+                FROM template_search WHERE {where} ORDER BY name LIMIT ? OFFSET ?
+                ''', params + [limit, offset]).fetchall()
+        finally:
+            conn.close()
+        
+        results = [
+            {
+                "id": row["template_id"],
+                "name": row["name"],
+                "intent": row["intent"],
+                "tone": row["tone"],
+                "schema": row["schema_type"],
+                "category": row["category"],
+                "snippet": row["snippet"]
+            }
+            for row in rows
+        ]
+        return results, total
+    
+    # Add the rest of your DatabaseManager methods here
+
+
+class SnapshotDatabaseManager(DatabaseManager):
+    """
+    Read-only DatabaseManager over a periodically refreshed copy of a database
+    
+    Every read method of DatabaseManager works unchanged, but queries run
+    against a separate file, so long reports neither hold read transactions
+    on the live database nor wait on its writers. Once the copy is older
+    than max_age seconds, the next read starts a refresh in the background
+    and is served from the current copy until the new one replaces it.
+    Write methods fail with "attempt to write a readonly database".
+    """
+    
+    def __init__(self, source, max_age=ANALYTICS_SNAPSHOT_MAX_AGE):
+        """
+        Parameters:
+        - source: DatabaseManager of the live database
+        - max_age: Age in seconds after which a read starts a refresh
+        """
+        root, ext = os.path.splitext(source.db_path)
+        self.source = source
+        self.max_age = max_age
+        self.db_path = f"{root}.snapshot{ext or '.db'}"
+        self.archive_dir = source.archive_dir
+        self.pool = get_pool(self.db_path, read_only=True)
+        
+        self._refresh_lock = threading.Lock()
+        self._refresher = None
+        self._inode = None
+        self.stats = {"refreshes": 0, "last_refresh_ms": 0.0, "max_refresh_ms": 0.0}
+    
+    def get_connection(self):
+        """Get a pooled read-only connection to the current snapshot"""
+        self.ensure_fresh()
+        return self.pool.acquire()
+    
+    def _stat(self):
+        try:
+            return os.stat(self.db_path)
+        except FileNotFoundError:
+            return None
+    
+    def _is_stale(self, stat):
+        return stat is None or time.time() - stat.st_mtime > self.max_age
+    
+    def ensure_fresh(self):
+        """
+        Make sure there is a snapshot to read, refreshing it if it is stale
+        
+        Only a missing snapshot is copied while the caller waits. A stale
+        one keeps being served while a background thread copies the next.
+        """
+        stat = self._stat()
+        if stat is None:
+            with self._refresh_lock:
+                stat = self._stat()
+                if stat is None:
+                    self.refresh()
+                    stat = self._stat()
+        elif self._is_stale(stat):
+            self._refresh_in_background()
+        
+        # The file is replaced on refresh (possibly by another process);
+        # connections to the old file must not be handed out again
+        if stat.st_ino != self._inode:
+            self._inode = stat.st_ino
+            self.pool.invalidate()
+    
+    def _refresh_in_background(self):
+        """Start a refresh thread unless one is already running"""
+        with self._refresh_lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._refresher = threading.Thread(target=self._refresh_if_stale, daemon=True)
+            self._refresher.start()
+    
+    def _refresh_if_stale(self):
+        try:
+            if self._is_stale(self._stat()):
+                self.refresh()
+        except Exception as e:
+            print(f"Error refreshing analytics snapshot: {str(e)}")
+    
+    def refresh(self):
+        """Copy the live database into a new snapshot file"""
+        started = time.perf_counter()
+        tmp_path = f"{self.db_path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        source = self.source.get_connection()
+        target = sqlite3.connect(tmp_path)
+        try:
+            # The snapshot is disposable - don't pay for fsyncs
+            target.execute("PRAGMA synchronous=OFF")
+            # Copy in a single step: that is one consistent read of the
+            # source, and under WAL it doesn't block the source's writers
+            source.backup(target)
+            target.execute("PRAGMA journal_mode=DELETE")
+        except BaseException:
+            target.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            source.close()
+        target.close()
+        os.replace(tmp_path, self.db_path)
         
-        conn.commit()
-        conn.close()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stats["refreshes"] += 1
+        self.stats["last_refresh_ms"] = round(elapsed_ms, 3)
+        self.stats["max_refresh_ms"] = round(max(self.stats["max_refresh_ms"], elapsed_ms), 3)
     
-    # Add the rest of your DatabaseManager methods here
\ No newline at end of file
+    def get_snapshot_stats(self):
+        """Refresh counters and the current age of the snapshot"""
+        stat = self._stat()
+        return {
+            **self.stats,
+            "path": self.db_path,
+            "max_age": self.max_age,
+            "refreshing": self._refresher is not None and self._refresher.is_alive(),
+            "age_seconds": round(time.time() - stat.st_mtime, 3) if stat else None,
+            "size_bytes": stat.st_size if stat else 0
+        }
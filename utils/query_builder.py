@@ -0,0 +1,195 @@
+"""
+Aggregate query builder for SEO Prompt Generator
+Builds GROUP BY queries so analytics read aggregated rows instead of raw
+prompts, and combines the partial results of tables split across the hot
+database and its monthly archives
+"""
+import re
+
+import pandas as pd
+
+# Aliases end up in SQL unquoted and must be plain identifiers
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# How the partial results of each aggregate function are combined
+_COMBINE = {"COUNT": "sum", "SUM": "sum", "MIN": "min", "MAX": "max"}
+
+
+def _identifier(name):
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return name
+
+
+class AggregateQuery:
+    """
+    SELECT <groups>, <aggregates> FROM <table> WHERE ... GROUP BY <groups>
+
+    Methods return the query so calls can be chained:
+
+        AggregateQuery("prompts").group_by("template_id").count_distinct("primary_keyword", "keywords")
+    """
+
+    def __init__(self, table):
+        """
+        Parameters:
+        - table: Table to aggregate, without a schema
+        """
+        self.table = _identifier(table)
+        self.groups = []        # (expression, alias)
+        self.aggregates = []    # (function, expression, alias, distinct)
+        self.clauses = []
+        self.params = []
+        self.order = []         # (alias, descending)
+        self.row_limit = None
+
+    @property
+    def columns(self):
+        """Column names of the result"""
+        return [alias for _, alias in self.groups] + [alias for _, _, alias, _ in self.aggregates]
+
+    def group_by(self, expression, alias=None):
+        """Group by a column or expression (alias defaults to the column)"""
+        self.groups.append((expression, _identifier(alias or expression)))
+        return self
+
+    def _aggregate(self, function, expression, alias, distinct=False):
+        self.aggregates.append((function, expression, _identifier(alias), distinct))
+        return self
+
+    def count(self, alias="count"):
+        """COUNT(*)"""
+        return self._aggregate("COUNT", "*", alias)
+
+    def count_distinct(self, expression, alias):
+        """COUNT(DISTINCT expression); NULLs are not counted"""
+        return self._aggregate("COUNT", expression, alias, distinct=True)
+
+    def sum(self, expression, alias):
+        """SUM(expression)"""
+        return self._aggregate("SUM", expression, alias)
+
+    def min(self, expression, alias):
+        """MIN(expression)"""
+        return self._aggregate("MIN", expression, alias)
+
+    def max(self, expression, alias):
+        """MAX(expression)"""
+        return self._aggregate("MAX", expression, alias)
+
+    def where(self, clause, *params):
+        """Add a WHERE clause with ? placeholders"""
+        self.clauses.append(clause)
+        self.params.extend(params)
+        return self
+
+    def where_in(self, expression, values):
+        """Keep rows whose expression is one of the values (a value or list); None keeps all"""
+        if values is None:
+            return self
+        values = [values] if isinstance(values, str) else list(values)
+        if not values:
+            return self.where("0")
+        return self.where(f"{expression} IN ({', '.join('?' * len(values))})", *values)
+
+    def order_by(self, alias, descending=False):
+        """Order the result by one of its columns"""
+        if alias not in self.columns:
+            raise ValueError(f"Can only order by a result column, not {alias!r}")
+        self.order.append((alias, descending))
+        return self
+
+    def limit(self, rows):
+        """Return at most this many rows"""
+        self.row_limit = int(rows)
+        return self
+
+    def build(self, schema=None):
+        """
+        Get the SQL and its parameters
+
+        Parameters:
+        - schema: Schema to read the table from (e.g. an attached archive)
+
+        Returns:
+        - (sql, params)
+        """
+        select = [f"{expression} AS {alias}" for expression, alias in self.groups]
+        select += [
+            f"{function}({'DISTINCT ' if distinct else ''}{expression}) AS {alias}"
+            for function, expression, alias, distinct in self.aggregates
+        ]
+        table = f"{schema}.{self.table} AS {self.table}" if schema else self.table
+        sql = f"SELECT {', '.join(select)} FROM {table}"
+        if self.clauses:
+            sql += " WHERE " + " AND ".join(f"({clause})" for clause in self.clauses)
+        if self.groups:
+            sql += " GROUP BY " + ", ".join(alias for _, alias in self.groups)
+        params = list(self.params)
+        if self.order:
+            sql += " ORDER BY " + ", ".join(f"{alias}{' DESC' if descending else ''}"
+                                            for alias, descending in self.order)
+        if self.row_limit is not None:
+            sql += " LIMIT ?"
+            params.append(self.row_limit)
+        return sql, params
+
+    def partial(self):
+        """
+        Get the query to run on each part of a split table
+
+        Distinct counts can't be added up, so the partial query groups by
+        the counted expressions as well; combine() counts them afterwards.
+        Ordering and limits are applied by combine().
+        """
+        partial = AggregateQuery(self.table)
+        partial.groups = list(self.groups)
+        partial.clauses = list(self.clauses)
+        partial.params = list(self.params)
+        for function, expression, alias, distinct in self.aggregates:
+            if distinct:
+                partial.groups.append((expression, alias))
+            else:
+                partial.aggregates.append((function, expression, alias, False))
+        return partial
+
+    def combine(self, frames):
+        """
+        Combine the results of partial() run on each part of a table
+
+        Returns:
+        - DataFrame equal to running the query on all parts at once
+        """
+        partial = self.partial()
+        group_columns = [alias for _, alias in self.groups]
+        distinct_columns = [alias for _, _, alias, distinct in self.aggregates if distinct]
+        additive = {alias: _COMBINE[function] for function, _, alias, distinct in self.aggregates if not distinct}
+
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=self.columns)
+        df = pd.concat(frames, ignore_index=True)
+
+        # Merge rows of the same group (and distinct values) from different parts
+        partial_groups = [alias for _, alias in partial.groups]
+        if partial_groups:
+            df = df.groupby(partial_groups, dropna=False, sort=False).agg(additive).reset_index() \
+                if additive else df.drop_duplicates(partial_groups)
+
+        aggregations = {**additive, **{alias: "nunique" for alias in distinct_columns}}
+        if group_columns:
+            result = df.groupby(group_columns, dropna=False, sort=False).agg(aggregations).reset_index() \
+                if aggregations else df[group_columns].drop_duplicates()
+            # Groups come out of SQLite sorted, NULL first
+            result = result.sort_values(group_columns, na_position="first", kind="stable")
+        else:
+            result = pd.DataFrame({alias: [df[alias].agg(how)] for alias, how in aggregations.items()})
+        result = result[self.columns]
+
+        if self.order:
+            result = result.sort_values([alias for alias, _ in self.order],
+                                        ascending=[not descending for _, descending in self.order],
+                                        na_position="first", kind="stable")
+        if self.row_limit is not None:
+            result = result.head(self.row_limit)
+        return result.reset_index(drop=True)
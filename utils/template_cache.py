@@ -0,0 +1,79 @@
+"""
+Template lookup cache for SEO Prompt Generator
+Read-through LRU cache in front of the template registry that also
+remembers unknown template IDs
+"""
+import threading
+from collections import OrderedDict
+
+# Cached value for IDs the loader did not find
+_MISSING = object()
+
+
+class TemplateLookupCache:
+    """LRU cache of template lookups with negative entries and hit/miss counters"""
+
+    def __init__(self, maxsize=512):
+        """
+        Parameters:
+        - maxsize: Maximum number of cached lookups, found or not
+        """
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by clear() so a lookup racing with it isn't cached stale
+        self._epoch = 0
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key, loader):
+        """
+        Get a cached value, calling loader(key) on a miss
+
+        Returns:
+        - The loaded value, or None if the loader returned None
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                if value is _MISSING:
+                    self.negative_hits += 1
+                    return None
+                self.hits += 1
+                return value
+            self.misses += 1
+            epoch = self._epoch
+
+        value = loader(key)
+
+        with self._lock:
+            if epoch == self._epoch:
+                self._entries[key] = _MISSING if value is None else value
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Drop every cached lookup"""
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+            self.invalidations += 1
+
+    def stats(self):
+        """Counters suitable for exporting to logs or metrics"""
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,321 @@
+"""
+Journaled template index for SEO Prompt Generator
+index.json holds a compacted snapshot of every stored template and
+index.journal holds the changes appended since that snapshot was written
+"""
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+INDEX_FILE = "index.json"
+JOURNAL_FILE = "index.journal"
+LOCK_FILE = "index.lock"
+
+# Number of times a reader retries when a compaction races with it
+READ_RETRIES = 5
+
+
+def atomic_write_json(path, data, indent=None):
+    """Write JSON to a temp file in the same directory and rename it into place"""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            if indent:
+                json.dump(data, f, indent=indent)
+            else:
+                json.dump(data, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class TemplateIndex:
+    """Snapshot + append-only journal, guarded by a cross-process file lock"""
+
+    def __init__(self, directory, compact_bytes=1024 * 1024):
+        """
+        Parameters:
+        - directory: Templates directory holding the index files
+        - compact_bytes: Journal size that triggers a background compaction
+        """
+        self.directory = directory
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self.journal_path = os.path.join(directory, JOURNAL_FILE)
+        self.lock_path = os.path.join(directory, LOCK_FILE)
+        self.compact_bytes = compact_bytes
+
+        self._thread_lock = threading.Lock()
+        self._compactor = None
+
+    def exists(self):
+        """Whether an index snapshot has been written"""
+        return os.path.exists(self.index_path)
+
+    # ------------------------------------------------------------------
+    # Locking
+    # ------------------------------------------------------------------
+    @contextmanager
+    def lock(self):
+        """Exclusive lock shared by all threads and processes writing the index"""
+        os.makedirs(self.directory, exist_ok=True)
+        with self._thread_lock:
+            with open(self.lock_path, "a+") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                    else:
+                        lock_file.seek(0)
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def _read_snapshot(self):
+        """Read index.json, returning (generation, templates, fingerprint)"""
+        try:
+            with open(self.index_path, "r") as f:
+                stat = os.fstat(f.fileno())
+                data = json.load(f)
+        except FileNotFoundError:
+            return 0, {}, None
+
+        fingerprint = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if isinstance(data, dict) and "generation" in data and "templates" in data:
+            return data["generation"], data["templates"], fingerprint
+
+        # Legacy index written as a flat {template_id: template_data} map
+        return 0, data if isinstance(data, dict) else {}, fingerprint
+
+    def _read_journal(self, generation, offset=0):
+        """
+        Read journal entries starting at a byte offset; a generation of None
+        accepts whatever generation the journal belongs to
+
+        Returns:
+        - (entries, new_offset), or None if the journal belongs to another generation
+        """
+        try:
+            f = open(self.journal_path, "rb")
+        except FileNotFoundError:
+            return [], 0
+
+        with f:
+            header = f.readline()
+            if not header.endswith(b"\n"):
+                # Journal is being created right now
+                return [], 0
+            if generation is not None and json.loads(header).get("generation") != generation:
+                return None
+
+            offset = max(offset, len(header))
+            f.seek(offset)
+            chunk = f.read()
+
+        # Only consume complete lines, a writer may be mid-append
+        end = chunk.rfind(b"\n") + 1
+        entries = []
+        for line in chunk[:end].splitlines():
+            if line.strip():
+                entry = json.loads(line)
+                entries.append((entry["op"], entry["id"], entry.get("data")))
+        return entries, offset + end
+
+    @staticmethod
+    def apply_entries(templates, entries):
+        """Apply journal entries to a {template_id: template_data} map"""
+        for op, template_id, data in entries:
+            if op == "put":
+                templates[template_id] = data
+            else:
+                templates.pop(template_id, None)
+
+    def load(self):
+        """
+        Load the full index: one snapshot read plus the journal tail
+
+        Returns:
+        - (templates, state) where state is passed back to read_since()
+        """
+        for _ in range(READ_RETRIES):
+            generation, templates, fingerprint = self._read_snapshot()
+            journal = self._read_journal(generation)
+            if journal is None:
+                # A compaction finished between the two reads
+                continue
+            entries, offset = journal
+            self.apply_entries(templates, entries)
+            return templates, (fingerprint, generation, offset)
+
+        # Still mismatched: a compaction was interrupted, so fold the
+        # journal into a new snapshot and read that
+        self.compact()
+        generation, templates, fingerprint = self._read_snapshot()
+        return templates, (fingerprint, generation, 0)
+
+    def read_since(self, state):
+        """
+        Read only the changes made after a previous load()
+
+        Returns:
+        - (entries, new_state), or (None, state) when a full load() is needed
+        """
+        fingerprint, generation, offset = state
+        try:
+            stat = os.stat(self.index_path)
+            current = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            current = None
+        if current != fingerprint:
+            return None, state
+
+        try:
+            if os.path.getsize(self.journal_path) == offset:
+                return [], state
+        except FileNotFoundError:
+            return ([], state) if offset == 0 else (None, state)
+
+        journal = self._read_journal(generation, offset)
+        if journal is None:
+            return None, state
+        entries, new_offset = journal
+        return entries, (fingerprint, generation, new_offset)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def put(self, template_id, template_data):
+        """Record a saved template"""
+        self._append({"op": "put", "id": template_id, "data": template_data})
+
+    def delete(self, template_id):
+        """Record a deleted template"""
+        self._append({"op": "delete", "id": template_id})
+
+    def _append(self, entry):
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+        with self.lock():
+            if self._journal_generation() is None:
+                generation, _, _ = self._read_snapshot()
+                self._write_journal_header(generation)
+            with open(self.journal_path, "ab") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            journal_size = os.path.getsize(self.journal_path)
+
+        if journal_size >= self.compact_bytes:
+            self.compact_in_background()
+
+    def _journal_generation(self):
+        """Generation from the journal header, without touching the snapshot"""
+        try:
+            with open(self.journal_path, "rb") as f:
+                return json.loads(f.readline())["generation"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def _write_journal_header(self, generation):
+        """Atomically start an empty journal for a snapshot generation"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-", suffix=".journal")
+        with os.fdopen(fd, "wb") as f:
+            f.write((json.dumps({"generation": generation}) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    def write_snapshot(self, templates):
+        """Replace the whole index with a new snapshot and an empty journal"""
+        with self.lock():
+            generation, _, _ = self._read_snapshot()
+            self._write_snapshot(generation + 1, templates)
+
+    def _write_snapshot(self, generation, templates):
+        # Snapshot first, then the journal: readers that see the new snapshot
+        # with the old journal detect the generation mismatch and retry
+        atomic_write_json(self.index_path, {"generation": generation, "templates": templates})
+        self._write_journal_header(generation)
+
+    def compact(self):
+        """Fold the journal into a new snapshot"""
+        with self.lock():
+            generation, templates, _ = self._read_snapshot()
+            # Replaying entries already folded into the snapshot is harmless,
+            # so a journal left behind by an interrupted compaction is kept
+            entries, _ = self._read_journal(None)
+            if not entries and generation > 0 and self._journal_generation() == generation:
+                return False
+            self.apply_entries(templates, entries)
+            self._write_snapshot(generation + 1, templates)
+        return True
+
+    def compact_in_background(self):
+        """Start a compaction thread unless one is already running"""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self._compact_quietly, daemon=True)
+        self._compactor.start()
+
+    def _compact_quietly(self):
+        try:
+            self.compact()
+        except Exception as e:
+            print(f"Error compacting template index: {str(e)}")
+
+    def read_template_files(self):
+        """Read the individual template files, keyed by template ID"""
+        templates = {}
+        for file_path in sorted(Path(self.directory).glob("*.json")):
+            if file_path.name == INDEX_FILE or file_path.name.startswith(".tmp-"):
+                continue
+            try:
+                with open(file_path, "r") as f:
+                    templates[file_path.stem] = json.load(f)
+            except Exception as e:
+                print(f"Error reading template {file_path}: {str(e)}")
+        return templates
+
+    def rebuild_from_files(self):
+        """Build a fresh snapshot from the individual template files"""
+        templates = self.read_template_files()
+        self.write_snapshot(templates)
+        return templates
+
+    def reconcile_with_files(self):
+        """
+        Journal the template files missing from (or differing in) the index
+        and drop index entries whose file is gone
+
+        Returns:
+        - (put, deleted) lists of template IDs
+        """
+        files = self.read_template_files()
+        indexed, _ = self.load()
+        put = [template_id for template_id, template_data in files.items()
+               if indexed.get(template_id) != template_data]
+        deleted = sorted(template_id for template_id in indexed if template_id not in files)
+        for template_id in put:
+            self.put(template_id, files[template_id])
+        for template_id in deleted:
+            self.delete(template_id)
+        return put, deleted
@@ -0,0 +1,340 @@
+"""
+Template registry for SEO Prompt Generator
+Keeps a process-wide, in-memory view of the template store and applies
+only the index changes made since the last read
+"""
+import os
+import threading
+import time
+
+from utils.template_renderer import with_manifest
+
+# Optional filesystem watcher - falls back to polling when not installed
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+
+class _RegistryEventHandler(FileSystemEventHandler):
+    """Mark the registry dirty whenever something changes in the directory"""
+
+    def __init__(self, registry):
+        self.registry = registry
+
+    def on_any_event(self, event):
+        self.registry.invalidate()
+
+
+class _RegistryViews:
+    """Lookup tables built from the templates, replaced as a whole on a rebuild"""
+
+    def __init__(self):
+        # template_id -> full template and template_id -> list summary
+        self.templates = {}
+        self.summaries = {}
+        # Built-in and initial template ids shadow stored templates
+        self.pinned = set()
+        # Category of each stored template, so deletes know what to release
+        self.stored_categories = {}
+
+        # Category metadata, category -> {template_id: summary} and the
+        # number of initial/stored templates keeping a custom category alive
+        self.categories = {}
+        self.category_templates = {}
+        self.category_refs = {}
+
+        # Sorted views, recomputed lazily after a change
+        self.sorted_templates = None
+        self.sorted_categories = {}
+
+    def put_stored(self, template_id, template_data):
+        """Add or replace a template coming from the index"""
+        self.delete_stored(template_id)
+
+        category = template_data.get("category", "General")
+        self.stored_categories[template_id] = category
+        self.retain_category(category)
+        if template_id in self.pinned:
+            return
+
+        template_copy = template_data.copy()
+        template_copy["is_builtin"] = False
+        self.add_template(template_id, template_copy, {
+            "id": template_id,
+            "name": template_data.get("name", template_id),
+            "intent": template_data.get("intent", template_data.get("use_case", "Custom")),
+            "tone": template_data.get("tone", "Professional"),
+            "schema": template_data.get("schema", "Article"),
+            "category": category,
+            "is_builtin": False
+        })
+
+    def delete_stored(self, template_id):
+        """Remove a template that was deleted from the index"""
+        category = self.stored_categories.pop(template_id, None)
+        if category is None:
+            return
+        if template_id not in self.pinned:
+            self.remove_template(template_id)
+        self.release_category(category)
+
+    def add_template(self, template_id, template, summary):
+        self.templates[template_id] = template
+        self.summaries[template_id] = summary
+        self.category_templates.setdefault(summary["category"], {})[template_id] = summary
+        self.sorted_templates = None
+        self.sorted_categories.pop(summary["category"], None)
+
+    def remove_template(self, template_id):
+        self.templates.pop(template_id, None)
+        summary = self.summaries.pop(template_id, None)
+        if summary is None:
+            return
+        category = summary["category"]
+        bucket = self.category_templates.get(category, {})
+        bucket.pop(template_id, None)
+        if not bucket:
+            self.category_templates.pop(category, None)
+        self.sorted_templates = None
+        self.sorted_categories.pop(category, None)
+
+    def retain_category(self, category):
+        self.category_refs[category] = self.category_refs.get(category, 0) + 1
+        if category not in self.categories:
+            self.categories[category] = {
+                "id": category,
+                "name": category,
+                "icon": "📁",
+                "is_builtin": False
+            }
+
+    def release_category(self, category):
+        self.category_refs[category] -= 1
+        if self.category_refs[category] == 0:
+            del self.category_refs[category]
+            if not self.categories[category]["is_builtin"]:
+                del self.categories[category]
+
+
+class TemplateRegistry:
+    """In-memory registry of built-in, initial and stored templates"""
+
+    def __init__(self, index, builtin_categories, initial_templates, check_interval=2.0):
+        """
+        Parameters:
+        - index: TemplateIndex holding the stored templates
+        - builtin_categories: Category definitions with built-in templates
+        - initial_templates: Templates shipped with the application
+        - check_interval: Minimum seconds between two disk fingerprint checks
+        """
+        self.index = index
+        self.templates_dir = index.directory
+        self.builtin_categories = builtin_categories
+        self.initial_templates = initial_templates
+        self.check_interval = check_interval
+
+        self._lock = threading.RLock()
+        self._observer = None
+        self._dirty = True
+        self._last_check = 0.0
+        self._index_state = None
+        self._listeners = []
+        self.generation = 0
+
+        # Readers take one reference to the views and use it throughout;
+        # a rebuild swaps in a complete new set
+        self._views = _RegistryViews()
+
+    # ------------------------------------------------------------------
+    # Change detection
+    # ------------------------------------------------------------------
+    def invalidate(self):
+        """Force a fingerprint check on the next read"""
+        self._dirty = True
+
+    def add_listener(self, callback):
+        """Call callback(generation) whenever the registry content changes"""
+        self._listeners.append(callback)
+
+    def _notify(self):
+        for callback in self._listeners:
+            try:
+                callback(self.generation)
+            except Exception as e:
+                print(f"Error notifying template listener: {str(e)}")
+
+    def refresh(self, force=False):
+        """Apply index changes made since the last check"""
+        now = time.monotonic()
+        if not force and not self._dirty:
+            # With a running watcher nothing changed unless it told us so
+            if self._observer is not None or now - self._last_check < self.check_interval:
+                return False
+
+        with self._lock:
+            self._dirty = False
+            self._last_check = now
+            return self._sync()
+
+    def _sync(self):
+        """Bring the views up to date with the index"""
+        if self._index_state is not None:
+            entries, state = self.index.read_since(self._index_state)
+            if entries is not None:
+                # Only the journal grew - apply just the new entries
+                self._index_state = state
+                for op, template_id, template_data in entries:
+                    if op == "put":
+                        self._views.put_stored(template_id, template_data)
+                    else:
+                        self._views.delete_stored(template_id)
+                if entries:
+                    self.generation += 1
+                    self._notify()
+                return bool(entries)
+
+        # First load, or the snapshot was compacted/replaced
+        stored_templates, self._index_state = self.index.load()
+        self._rebuild_views(stored_templates)
+        self._notify()
+        return True
+
+    # ------------------------------------------------------------------
+    # View maintenance
+    # ------------------------------------------------------------------
+    def _rebuild_views(self, stored_templates):
+        """Build every view from scratch and swap them in at once"""
+        views = _RegistryViews()
+
+        # Built-in category templates take precedence
+        for category_id, category_data in self.builtin_categories.items():
+            views.categories[category_id] = {
+                "id": category_id,
+                "name": category_data.get("name", category_id),
+                "icon": category_data.get("icon", "📁"),
+                "is_builtin": True
+            }
+            for template in category_data.get("templates", []):
+                template_copy = with_manifest(template)
+                template_copy["category"] = category_id
+                template_copy["is_builtin"] = True
+                views.pinned.add(template["id"])
+                views.add_template(template["id"], template_copy, {
+                    "id": template["id"],
+                    "name": template["name"],
+                    "intent": template.get("use_case", category_data["name"]),
+                    "tone": template.get("tone", "Professional"),
+                    "schema": template.get("schema", "Article"),
+                    "category": category_id,
+                    "is_builtin": True
+                })
+
+        # Then the initial templates shipped with the application
+        for template_id, template_data in self.initial_templates.items():
+            views.retain_category(template_data.get("category", "General"))
+            if template_id in views.pinned:
+                continue
+            template_copy = with_manifest(template_data)
+            template_copy["is_builtin"] = False
+            views.pinned.add(template_id)
+            views.add_template(template_id, template_copy, {
+                "id": template_id,
+                "name": template_data["name"],
+                "intent": template_data.get("intent", "General"),
+                "tone": template_data["tone"],
+                "schema": template_data["schema"],
+                "category": template_data.get("category", "General"),
+                "is_builtin": False
+            })
+
+        # Finally templates stored in the index
+        for template_id in sorted(stored_templates):
+            views.put_stored(template_id, stored_templates[template_id])
+
+        with self._lock:
+            self._views = views
+            self.generation += 1
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def get(self, template_id):
+        """Get a copy of a template by ID, or None if it is unknown"""
+        self.refresh()
+        template = self._views.templates.get(template_id)
+        return template.copy() if template is not None else None
+
+    def get_all(self):
+        """Get every template, keyed by template ID"""
+        self.refresh()
+        with self._lock:
+            return dict(self._views.templates)
+
+    def is_stored(self, template_id):
+        """Whether a template is present in the index"""
+        self.refresh()
+        return template_id in self._views.stored_categories
+
+    def list_templates(self):
+        """Get template summaries sorted by name"""
+        self.refresh()
+        views = self._views
+        sorted_templates = views.sorted_templates
+        if sorted_templates is None:
+            with self._lock:
+                sorted_templates = sorted(views.summaries.values(), key=lambda x: x["name"])
+                views.sorted_templates = sorted_templates
+        return list(sorted_templates)
+
+    def list_categories(self):
+        """Get all categories, built-in first"""
+        self.refresh()
+        with self._lock:
+            return list(self._views.categories.values())
+
+    def get_category(self, category_id):
+        """Get category metadata, or None if no template uses it"""
+        self.refresh()
+        return self._views.categories.get(category_id)
+
+    def list_category_templates(self, category_id):
+        """Get the template summaries of one category sorted by name"""
+        self.refresh()
+        views = self._views
+        sorted_templates = views.sorted_categories.get(category_id)
+        if sorted_templates is None:
+            with self._lock:
+                bucket = views.category_templates.get(category_id, {})
+                sorted_templates = sorted(bucket.values(), key=lambda x: x["name"])
+                views.sorted_categories[category_id] = sorted_templates
+        return list(sorted_templates)
+
+    # ------------------------------------------------------------------
+    # Optional filesystem watcher
+    # ------------------------------------------------------------------
+    def start_watcher(self):
+        """Watch the templates directory instead of polling; returns False if unavailable"""
+        if Observer is None:
+            return False
+        with self._lock:
+            if self._observer is not None:
+                return True
+            os.makedirs(self.templates_dir, exist_ok=True)
+            observer = Observer()
+            observer.schedule(_RegistryEventHandler(self), self.templates_dir, recursive=False)
+            observer.daemon = True
+            observer.start()
+            self._observer = observer
+            self._dirty = True
+        return True
+
+    def stop_watcher(self):
+        """Stop the filesystem watcher and go back to polling"""
+        with self._lock:
+            if self._observer is not None:
+                self._observer.stop()
+                self._observer.join()
+                self._observer = None
@@ -0,0 +1,148 @@
+"""
+Compiled template renderer for SEO Prompt Generator
+Parses a template body into literal and placeholder segments once and
+renders it in a single join pass
+"""
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+
+from config import TEMPLATE_RENDER_CACHE_SIZE
+
+PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\}")
+
+
+class CompiledTemplate:
+    """A template body split into alternating literal and placeholder segments"""
+
+    __slots__ = ("literals", "fields", "field_names")
+
+    def __init__(self, literals, fields):
+        # literals has exactly one more item than fields:
+        # literals[0] fields[0] literals[1] fields[1] ... literals[-1]
+        self.literals = literals
+        self.fields = fields
+        self.field_names = frozenset(fields)
+
+    def render(self, values):
+        """
+        Fill the placeholders in one pass
+
+        Placeholders without a value (or with an empty one) are kept as-is,
+        so the user can still see what was not filled in.
+        """
+        parts = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            value = values.get(field)
+            parts.append(value if value else "{" + field + "}")
+            parts.append(literal)
+        return "".join(parts)
+
+    def missing_fields(self, values):
+        """Placeholders used by the template that have no value"""
+        return sorted(field for field in self.field_names if not values.get(field))
+
+    def unknown_fields(self, values):
+        """Values that the template has no placeholder for"""
+        return sorted(field for field in values if field not in self.field_names)
+
+    def replace_literal(self, old, new):
+        """Return a copy with text replaced in the literal segments only"""
+        return CompiledTemplate([literal.replace(old, new) for literal in self.literals], self.fields)
+
+
+def content_hash(template_data):
+    """
+    Hash of a template's body and form fields, used to tell whether a
+    manifest is still valid
+    """
+    fields = json.dumps(template_data.get("fields") or {}, sort_keys=True, ensure_ascii=False)
+    text = template_data.get("template", "")
+    return hashlib.sha1(f"{fields}\n{text}".encode("utf-8")).hexdigest()
+
+
+def build_manifest(template_data):
+    """
+    Compute the field manifest of a template
+
+    Returns:
+    - Dictionary with the content_hash of the body and fields, the body's
+      placeholders in order of first use and the template-specific form fields
+    """
+    text = template_data.get("template", "")
+    placeholders = list(dict.fromkeys(PLACEHOLDER_PATTERN.findall(text)))
+    return {
+        "content_hash": content_hash(template_data),
+        "placeholders": placeholders,
+        "fields": template_data.get("fields") or {}
+    }
+
+
+def with_manifest(template_data):
+    """Return a copy of a template with an up-to-date manifest attached"""
+    template_copy = dict(template_data)
+    template_copy["manifest"] = build_manifest(template_data)
+    return template_copy
+
+
+def get_manifest(template_data):
+    """
+    Get a template's manifest, rebuilding it only when the stored one is
+    missing or no longer matches the template body and fields
+    """
+    manifest = template_data.get("manifest")
+    if manifest and manifest.get("content_hash") == content_hash(template_data):
+        return manifest
+    return build_manifest(template_data)
+
+
+def compile_template(text):
+    """Parse a template body into a CompiledTemplate"""
+    literals = []
+    fields = []
+    position = 0
+    for match in PLACEHOLDER_PATTERN.finditer(text):
+        literals.append(text[position:match.start()])
+        fields.append(match.group(1))
+        position = match.end()
+    literals.append(text[position:])
+    return CompiledTemplate(literals, fields)
+
+
+# (template_id, body) -> CompiledTemplate, least recently used first
+_compiled_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_compiled_template(template_id, template):
+    """
+    Get the compiled body of a template, compiling it on first use
+
+    Templates are cached by ID and current body text, so an edited file
+    never renders a stale body; Python caches the string's hash, so
+    repeat lookups with the same template don't rehash it.
+    """
+    text = template.get("template", "")
+    key = (template_id, text)
+
+    with _cache_lock:
+        compiled = _compiled_cache.get(key)
+        if compiled is not None:
+            _compiled_cache.move_to_end(key)
+            return compiled
+
+    compiled = compile_template(text)
+
+    with _cache_lock:
+        _compiled_cache[key] = compiled
+        while len(_compiled_cache) > TEMPLATE_RENDER_CACHE_SIZE:
+            _compiled_cache.popitem(last=False)
+    return compiled
+
+
+def clear_compiled_templates():
+    """Drop every cached compiled template"""
+    with _cache_lock:
+        _compiled_cache.clear()
@@ -6,9 +6,23 @@ import json
 import os
 from pathlib import Path
 import re
+import threading
+import time
 
-# Template directory paths
-TEMPLATES_DIR = "data/templates"
+from config import (DB_PATH, TEMPLATES_DIR, TEMPLATE_CHECK_INTERVAL, TEMPLATE_WATCHER,
+                    TEMPLATE_JOURNAL_COMPACT_BYTES, TEMPLATE_LOOKUP_CACHE_SIZE)
+from utils.template_cache import TemplateLookupCache
+from utils.template_index import TemplateIndex, atomic_write_json
+from utils.template_registry import TemplateRegistry
+from utils.template_renderer import content_hash, with_manifest
+
+# Directory with templates in the prompt_body format, imported on startup
+PROMPT_TEMPLATES_DIR = "prompt_templates"
+
+# Bump when INITIAL_TEMPLATES or the on-disk layout change so existing
+# installations run init_templates_directory() once more
+STORE_VERSION = 4
+STORE_STAMP_FILE = ".store_version"
 
 # Import the advanced templates
 # In production, these would be properly imported from your data module
@@ -209,217 +223,148 @@ def init_templates_directory():
         os.makedirs(TEMPLATES_DIR, exist_ok=True)
     
     # Load templates from alternate locations if available
-    custom_templates = load_templates_from_directory("prompt_templates")
+    custom_templates = load_templates_from_directory(PROMPT_TEMPLATES_DIR)
     
     # Merge with default templates from INITIAL_TEMPLATES
-    all_templates = {**INITIAL_TEMPLATES, **custom_templates}
+    all_templates = {
+        **{template_id: with_manifest(template_data) for template_id, template_data in INITIAL_TEMPLATES.items()},
+        **custom_templates
+    }
     
-    # Create template index file if it doesn't exist
-    index_file = os.path.join(TEMPLATES_DIR, "index.json")
-    if not os.path.exists(index_file):
-        # Save index with initial templates
-        with open(index_file, "w") as f:
-            json.dump(all_templates, f, indent=4)
-        
-    # Also create individual template files for each initial template
+    # Create individual template files for each initial template, recording
+    # each new file in the index journal
+    index_exists = _index.exists()
     for template_id, template_data in all_templates.items():
         template_path = os.path.join(TEMPLATES_DIR, f"{template_id}.json")
         if not os.path.exists(template_path):
-            with open(template_path, "w") as f:
-                json.dump(template_data, f, indent=4)
+            atomic_write_json(template_path, template_data, indent=4)
+            if index_exists:
+                _index.put(template_id, template_data)
+    
+    # Give existing template files without an up-to-date manifest one, so
+    # forms and generation don't recompute it on every use
+    for template_id, template_data in _index.read_template_files().items():
+        manifest = template_data.get("manifest")
+        if not manifest or manifest.get("content_hash") != content_hash(template_data):
+            atomic_write_json(os.path.join(TEMPLATES_DIR, f"{template_id}.json"),
+                              with_manifest(template_data), indent=4)
+    
+    # Create the template index from the template files if it doesn't exist,
+    # otherwise pick up files added or removed by hand since the last run
+    if index_exists:
+        _index.reconcile_with_files()
+    else:
+        _index.rebuild_from_files()
+    _registry.invalidate()
                 
     return True
 
+def _store_stamp():
+    """Version stamp describing what init_templates_directory() was run against"""
+    try:
+        prompt_templates_mtime = os.stat(PROMPT_TEMPLATES_DIR).st_mtime_ns
+    except FileNotFoundError:
+        prompt_templates_mtime = None
+    return {"store_version": STORE_VERSION, "prompt_templates_mtime": prompt_templates_mtime}
+
+def ensure_initialized():
+    """
+    Initialize the template store on first use
+    
+    Idempotent and cheap after the first call in a process. When the version
+    stamp written by a previous run still matches, no template files are
+    scanned or written at all.
+    """
+    global _initialized
+    if _initialized:
+        return
+    
+    with _init_lock:
+        if _initialized:
+            return
+        
+        started = time.perf_counter()
+        stamp = _store_stamp()
+        stamp_path = os.path.join(TEMPLATES_DIR, STORE_STAMP_FILE)
+        try:
+            with open(stamp_path, "r") as f:
+                current_stamp = json.load(f)
+        except (FileNotFoundError, ValueError):
+            current_stamp = None
+        
+        if current_stamp != stamp:
+            init_templates_directory()
+            atomic_write_json(stamp_path, stamp)
+        
+        if TEMPLATE_WATCHER:
+            _registry.start_watcher()
+        
+        _startup_stats["init_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        _startup_stats["init_skipped"] = current_stamp == stamp
+        _initialized = True
+
+def get_startup_stats():
+    """
+    Time the template store adds to process startup
+    
+    Returns:
+    - Dictionary with init_ms (None until first use) and init_skipped
+      (True when the version stamp matched)
+    """
+    return dict(_startup_stats)
+
 def get_all_categories():
     """Get all available template categories, both built-in and custom"""
-    categories = []
-    
-    # Add built-in categories from TEMPLATE_CATEGORIES
-    for category_id, category_data in TEMPLATE_CATEGORIES.items():
-        categories.append({
-            "id": category_id,
-            "name": category_data.get("name", category_id),
-            "icon": category_data.get("icon", "📁"),
-            "is_builtin": True
-        })
-    
-    # Add categories from INITIAL_TEMPLATES
-    for template_id, template_data in INITIAL_TEMPLATES.items():
-        category = template_data.get("category", "General")
-        category_found = False
-        for c in categories:
-            if c["id"] == category:
-                category_found = True
-                break
-                
-        if not category_found:
-            categories.append({
-                "id": category,
-                "name": category,
-                "icon": "📁",
-                "is_builtin": False
-            })
-    
-    # Add custom categories from template files
-    if os.path.exists(TEMPLATES_DIR):
-        for file_path in Path(TEMPLATES_DIR).glob("*.json"):
-            try:
-                with open(file_path, "r") as f:
-                    template_data = json.load(f)
-                    category = template_data.get("category", "General")
-                    
-                    category_found = False
-                    for c in categories:
-                        if c["id"] == category:
-                            category_found = True
-                            break
-                            
-                    if not category_found:
-                        categories.append({
-                            "id": category,
-                            "name": category,
-                            "icon": "📁",
-                            "is_builtin": False
-                        })
-            except Exception as e:
-                print(f"Error reading template category {file_path}: {str(e)}")
-    
-    return categories
+    ensure_initialized()
+    return _registry.list_categories()
 
 def get_template_list():
     """Get list of all available templates from both built-in and file-based sources"""
-    templates = []
-    
-    # Ensure directory exists
-    if not os.path.exists(TEMPLATES_DIR):
-        init_templates_directory()
-    
-    # Add templates from TEMPLATE_CATEGORIES
-    for category_id, category_data in TEMPLATE_CATEGORIES.items():
-        for template in category_data.get('templates', []):
-            templates.append({
-                "id": template["id"],
-                "name": template["name"],
-                "intent": template.get("use_case", category_data["name"]),
-                "tone": template.get("tone", "Professional"),
-                "schema": template.get("schema", "Article"),
-                "category": category_id,
-                "is_builtin": True
-            })
-    
-    # Add templates from INITIAL_TEMPLATES
-    for template_id, template_data in INITIAL_TEMPLATES.items():
-        # Check if template is already in the list
-        if not any(t["id"] == template_id for t in templates):
-            templates.append({
-                "id": template_id,
-                "name": template_data["name"],
-                "intent": template_data.get("intent", "General"),
-                "tone": template_data["tone"],
-                "schema": template_data["schema"],
-                "category": template_data.get("category", "General"),
-                "is_builtin": False
-            })
-    
-    # Add templates from template directory
-    for file_path in Path(TEMPLATES_DIR).glob("*.json"):
-        try:
-            with open(file_path, "r") as f:
-                template_data = json.load(f)
-                template_id = file_path.stem
-                
-                # Skip if this template is already in the list
-                if any(t["id"] == template_id for t in templates):
-                    continue
-                
-                templates.append({
-                    "id": template_id,
-                    "name": template_data.get("name", template_id),
-                    "intent": template_data.get("intent", template_data.get("use_case", "Custom")),
-                    "tone": template_data.get("tone", "Professional"),
-                    "schema": template_data.get("schema", "Article"),
-                    "category": template_data.get("category", "General"),
-                    "is_builtin": False
-                })
-        except Exception as e:
-            print(f"Error reading template {file_path}: {str(e)}")
-    
-    # Sort by name
-    templates.sort(key=lambda x: x["name"])
-    
-    return templates
+    ensure_initialized()
+    return _registry.list_templates()
 
 def get_template(template_id):
-    """Get a specific template by ID, checking both built-in and files"""
-    # First check in TEMPLATE_CATEGORIES
-    for category_id, category_data in TEMPLATE_CATEGORIES.items():
-        for template in category_data.get('templates', []):
-            if template["id"] == template_id:
-                template_copy = template.copy()
-                template_copy["category"] = category_id
-                template_copy["is_builtin"] = True
-                return template_copy
-    
-    # Check in INITIAL_TEMPLATES
-    if template_id in INITIAL_TEMPLATES:
-        template_data = INITIAL_TEMPLATES[template_id].copy()
-        template_data["is_builtin"] = False
-        return template_data
-    
-    # Check template files
-    template_path = os.path.join(TEMPLATES_DIR, f"{template_id}.json")
-    
-    if os.path.exists(template_path):
-        with open(template_path, "r") as f:
-            template_data = json.load(f)
-            template_data["is_builtin"] = False
-            return template_data
+    """
+    Get a specific template by ID, checking both built-in and files
+
+    Lookups go through a read-through cache that also remembers unknown
+    IDs; it is cleared whenever the registry picks up a change.
+    """
+    ensure_initialized()
+    _registry.refresh()
+    template = _template_cache.get(template_id, _registry.get)
+    if template is not None:
+        return template.copy()
     
     # If not found in either place, return default template
     return DEFAULT_TEMPLATE
 
+def template_exists(template_id):
+    """Whether a template ID is known; get_template() falls back to the default template otherwise"""
+    ensure_initialized()
+    return _registry.get(template_id) is not None
+
+def get_template_cache_stats():
+    """Get the hit/miss counters of the get_template() cache"""
+    return _template_cache.stats()
+
 def get_templates_by_category(category_id):
-    """Get templates organized by category"""
-    all_templates = get_template_list()
-    
-    # Group templates by category
-    templates_by_category = {}
+    """Get the templates of a category, keyed by category ID"""
+    ensure_initialized()
+    category_info = _registry.get_category(category_id) or {"id": category_id, "name": category_id, "icon": "📁"}
     
-    for template in all_templates:
-        category = template["category"]
-        
-        if category not in templates_by_category:
-            category_info = next((c for c in get_all_categories() if c["id"] == category), 
-                               {"id": category, "name": category, "icon": "📁"})
-            
-            templates_by_category[category] = {
-                "id": category,
-                "name": category_info["name"],
-                "icon": category_info.get("icon", "📁"),
-                "templates": []
-            }
-        
-        templates_by_category[category]["templates"].append(template)
-    
-    # If no templates found for requested category, add an empty entry
-    if category_id not in templates_by_category:
-        category_info = next((c for c in get_all_categories() if c["id"] == category_id), 
-                           {"id": category_id, "name": category_id, "icon": "📁"})
-        
-        templates_by_category[category_id] = {
+    return {
+        category_id: {
             "id": category_id,
             "name": category_info["name"],
             "icon": category_info.get("icon", "📁"),
-            "templates": []
+            "templates": _registry.list_category_templates(category_id)
         }
-    
-    return templates_by_category
+    }
 
 def save_template(template_id, template_data):
     """Save a template to disk"""
-    # Ensure directory exists
-    if not os.path.exists(TEMPLATES_DIR):
-        os.makedirs(TEMPLATES_DIR, exist_ok=True)
+    ensure_initialized()
     
     # For built-in templates, check if we're allowed to modify
     for category_id, category_data in TEMPLATE_CATEGORIES.items():
@@ -427,30 +372,32 @@ def save_template(template_id, template_data):
             if template["id"] == template_id:
                 # Can't save built-in templates directly
                 return False
+    
+    # Precompute the placeholder/field manifest once, at save time
+    template_data = with_manifest(template_data)
         
     # Save template file
     template_path = os.path.join(TEMPLATES_DIR, f"{template_id}.json")
+    atomic_write_json(template_path, template_data, indent=4)
     
-    with open(template_path, "w") as f:
-        json.dump(template_data, f, indent=4)
+    # Record the change in the index journal
+    _index.put(template_id, template_data)
+    _registry.invalidate()
     
-    # Also update index file
-    index_path = os.path.join(TEMPLATES_DIR, "index.json")
+    # Keep the versioned template table and the search index in sync
     try:
-        with open(index_path, "r") as f:
-            template_index = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        template_index = {}
-    
-    template_index[template_id] = template_data
-    
-    with open(index_path, "w") as f:
-        json.dump(template_index, f, indent=4)
+        db = _get_db()
+        db.save_template_record(template_id, template_data)
+        db.index_template(template_id, _registry.get(template_id) or template_data)
+    except Exception as e:
+        print(f"Error storing template {template_id} in the database: {str(e)}")
     
     return True
 
 def delete_template(template_id):
     """Delete a template if it's not built-in"""
+    ensure_initialized()
+    
     # Check if it's a built-in template (can't delete these)
     for category_id, category_data in TEMPLATE_CATEGORIES.items():
         for template in category_data.get('templates', []):
@@ -463,26 +410,87 @@ def delete_template(template_id):
     # Delete template file
     template_path = os.path.join(TEMPLATES_DIR, f"{template_id}.json")
     
+    if not os.path.exists(template_path) and not _registry.is_stored(template_id):
+        return False
+    
     if os.path.exists(template_path):
         os.remove(template_path)
-        
-        # Also remove from index file
-        index_path = os.path.join(TEMPLATES_DIR, "index.json")
-        try:
-            with open(index_path, "r") as f:
-                template_index = json.load(f)
-                
-            if template_id in template_index:
-                del template_index[template_id]
-                
-            with open(index_path, "w") as f:
-                json.dump(template_index, f, indent=4)
-        except Exception:
-            pass
-        
-        return True
-    else:
-        return False
+    
+    # Record the removal in the index journal
+    _index.delete(template_id)
+    _registry.invalidate()
+    
+    # Keep the template table and the search index in sync
+    try:
+        db = _get_db()
+        db.delete_template_record(template_id)
+        db.unindex_template(template_id)
+    except Exception as e:
+        print(f"Error removing template {template_id} from the database: {str(e)}")
+    
+    return True
+
+def search_templates(query, page=1, page_size=20):
+    """
+    Ranked full-text search over template name, intent, tone, schema, category and body
+    
+    Parameters:
+    - query: Free text typed by the user
+    - page: 1-based page number
+    - page_size: Results per page
+    
+    Returns:
+    - Dictionary with results, total, page and page_size
+    """
+    ensure_initialized()
+    _ensure_search_index()
+    results, total = _get_db().search_templates(query, limit=page_size, offset=(page - 1) * page_size)
+    return {"results": results, "total": total, "page": page, "page_size": page_size}
+
+def get_template_history(template_id):
+    """Get the saved versions of a template, newest first"""
+    ensure_initialized()
+    return _get_db().get_template_history(template_id)
+
+def import_templates_to_db():
+    """
+    One-shot import of the template store and prompt_templates/ into the
+    templates table; templates already imported unchanged are skipped
+    
+    Returns:
+    - Dictionary with the number of templates found and the number imported
+    """
+    ensure_initialized()
+    stored_templates, _ = _index.load()
+    prompt_templates = {
+        template_id: template_data
+        for template_id, template_data in load_templates_from_directory(PROMPT_TEMPLATES_DIR).items()
+        if template_id not in stored_templates
+    }
+    
+    db = _get_db()
+    imported = db.save_template_records(prompt_templates, source=PROMPT_TEMPLATES_DIR)
+    imported.update(db.save_template_records(stored_templates, source=TEMPLATES_DIR))
+    
+    return {"found": len(stored_templates) + len(prompt_templates), "imported": len(imported)}
+
+def _ensure_search_index():
+    """Sync the search index with the template registry after templates changed"""
+    global _search_generation
+    _registry.refresh()
+    if _search_generation == _registry.generation:
+        return
+    
+    _get_db().sync_template_index(_registry.get_all())
+    _search_generation = _registry.generation
+
+def _get_db():
+    """Database holding the template search index, opened on first use"""
+    global _db_manager
+    if _db_manager is None:
+        from utils.database import DatabaseManager
+        _db_manager = DatabaseManager(DB_PATH)
+    return _db_manager
 
 def load_templates_from_directory(directory_path):
     """Load all JSON template files from a directory"""
@@ -497,37 +505,53 @@ def load_templates_from_directory(directory_path):
                     
                     # Convert to required format if needed
                     if "prompt_body" in template_data:  # New format
-                        templates[template_id] = {
+                        fields = {}
+                        
+                        def convert_placeholder(match):
+                            # Collect {{field_name}} as a form field and turn it into {field_name}
+                            field = match.group(1)
+                            field_label = field.replace('_', ' ').title()
+                            fields[field] = {
+                                "label": f"📝 {field_label}",
+                                "type": "text",
+                                "required": True
+                            }
+                            return "{" + field + "}"
+                        
+                        # One regex pass extracts the fields and rewrites the body
+                        body = re.sub(r'\{\{(\w+)\}\}', convert_placeholder, template_data.get("prompt_body", ""))
+                        
+                        templates[template_id] = with_manifest({
                             "name": template_data.get("template_name", template_id),
                             "intent": template_data.get("intent", ""),
                             "tone": template_data.get("tone", ""),
                             "schema": template_data.get("schema", ""),
                             "category": template_data.get("intent", "Other"),
-                            "template": template_data.get("prompt_body", ""),
-                            "fields": {}  # We'll extract fields later
-                        }
-                        
-                        # Extract fields based on {{field_name}} pattern
-                        if templates[template_id]["template"]:
-                            placeholders = re.findall(r'\{\{(\w+)\}\}', templates[template_id]["template"])
-                            for field in placeholders:
-                                field_label = field.replace('_', ' ').title()
-                                templates[template_id]["fields"][field] = {
-                                    "label": f"📝 {field_label}",
-                                    "type": "text",
-                                    "required": True
-                                }
-                            
-                            # Replace {{field}} with {field} for compatibility
-                            templates[template_id]["template"] = re.sub(
-                                r'\{\{(\w+)\}\}', 
-                                r'{\1}', 
-                                templates[template_id]["template"]
-                            )
+                            "template": body,
+                            "fields": fields
+                        })
             except Exception as e:
                 print(f"Error loading template {file_path}: {str(e)}")
     
     return templates
 
-# Initialize templates directory on import
-init_templates_directory()
\ No newline at end of file
+# Search index state, set up on first use
+_db_manager = None
+_search_generation = 0
+
+# Journaled template index and the process-wide registry reading from it
+_index = TemplateIndex(TEMPLATES_DIR, compact_bytes=TEMPLATE_JOURNAL_COMPACT_BYTES)
+_registry = TemplateRegistry(_index, TEMPLATE_CATEGORIES, INITIAL_TEMPLATES,
+                             check_interval=TEMPLATE_CHECK_INTERVAL)
+
+# get_template() lookups, dropped on every registry change
+_template_cache = TemplateLookupCache(TEMPLATE_LOOKUP_CACHE_SIZE)
+_registry.add_listener(lambda generation: _template_cache.clear())
+
+# Initialization runs lazily on first use - see ensure_initialized()
+_initialized = False
+_init_lock = threading.Lock()
+_startup_stats = {
+    "init_ms": None,
+    "init_skipped": None
+}
\ No newline at end of file
@@ -0,0 +1,215 @@
+"""
+Write-behind queue for SEO Prompt Generator
+Collects rows in a bounded in-process queue and writes them from a single
+background thread in batched transactions
+"""
+import atexit
+import queue
+import threading
+import time
+
+# Durability modes
+SYNC = "sync"          # Write in the calling thread before returning
+BATCHED = "batched"    # Queue, and wait until the batch holding the row is committed
+ASYNC = "async"        # Queue and return immediately (fire-and-forget)
+MODES = (SYNC, BATCHED, ASYNC)
+
+# Queue item that tells the writer thread to stop
+_STOP = object()
+
+
+class _Pending:
+    """A queued row, with an event for callers waiting on its commit"""
+
+    __slots__ = ("row", "done", "error")
+
+    def __init__(self, row, wait):
+        self.row = row
+        self.done = threading.Event() if wait else None
+        self.error = None
+
+
+class WriteBehindQueue:
+    """Bounded queue drained by one writer thread in batches"""
+
+    def __init__(self, write_batch, mode=BATCHED, max_size=1000, batch_size=100, flush_interval=0.05,
+                 put_timeout=1.0):
+        """
+        Parameters:
+        - write_batch: Called with a list of rows; must write them in one transaction
+        - mode: sync, batched or async (see MODES)
+        - max_size: Rows the queue holds before callers are slowed down
+        - batch_size: Maximum rows written per transaction
+        - flush_interval: Seconds the writer waits to fill a batch of async rows
+        - put_timeout: Seconds a caller waits for room in a full queue before
+          writing its row itself
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown write mode {mode!r}, expected one of {', '.join(MODES)}")
+        self.write_batch = write_batch
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+
+        self._queue = queue.Queue(maxsize=max_size)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        # Producers between their _closed check and the end of their put;
+        # close() waits for them so no row can land behind _STOP
+        self._producers = threading.Condition()
+        self._putting = 0
+        self._closed = False
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "failed": 0,
+            "batches": 0,
+            "overflow_writes": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0
+        }
+
+    # ------------------------------------------------------------------
+    # Producers
+    # ------------------------------------------------------------------
+    def submit(self, row):
+        """Write a row according to the queue's durability mode"""
+        if self.mode == SYNC or not self._start_put():
+            self._write([_Pending(row, wait=False)], raise_errors=True)
+            return
+
+        pending = _Pending(row, wait=self.mode == BATCHED)
+        try:
+            self._ensure_thread()
+            self._queue.put(pending, timeout=self.put_timeout)
+        except queue.Full:
+            # The writer can't keep up - apply backpressure by writing here
+            with self._stats_lock:
+                self.stats["overflow_writes"] += 1
+            self._write([pending], raise_errors=True)
+            return
+        finally:
+            self._end_put()
+
+        with self._stats_lock:
+            self.stats["enqueued"] += 1
+        if pending.done is not None:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+
+    def _start_put(self):
+        """Register a producer about to queue a row; False once the queue is closed"""
+        with self._producers:
+            if self._closed:
+                return False
+            self._putting += 1
+            return True
+
+    def _end_put(self):
+        with self._producers:
+            self._putting -= 1
+            if not self._putting:
+                self._producers.notify_all()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stop = False
+            # Callers waiting on a commit get group commit: whatever queued
+            # up during the previous write goes out right away. Only
+            # fire-and-forget rows wait to fill a batch.
+            wait = self.flush_interval if self.mode == ASYNC else 0
+            deadline = time.monotonic() + wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch, raise_errors=False):
+        started = time.perf_counter()
+        error = None
+        try:
+            self.write_batch([pending.row for pending in batch])
+        except Exception as e:
+            error = e
+            print(f"Error writing {len(batch)} queued rows: {str(e)}")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self._stats_lock:
+            self.stats["batches"] += 1
+            self.stats["failed" if error else "written"] += len(batch)
+            self.stats["last_flush_ms"] = elapsed_ms
+            self.stats["max_flush_ms"] = max(self.stats["max_flush_ms"], elapsed_ms)
+            self.stats["total_flush_ms"] += elapsed_ms
+
+        for pending in batch:
+            pending.error = error
+            if pending.done is not None:
+                pending.done.set()
+        if error is not None and raise_errors:
+            raise error
+
+    # ------------------------------------------------------------------
+    # Shutdown and metrics
+    # ------------------------------------------------------------------
+    def close(self, timeout=10.0):
+        """Write everything still queued and stop the writer thread"""
+        with self._producers:
+            if self._closed:
+                return
+            self._closed = True
+            # Rows being queued right now go out before _STOP
+            while self._putting:
+                self._producers.wait()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def get_stats(self):
+        """Queue depth, row counters and flush latency"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        batches = stats["batches"]
+        stats["avg_flush_ms"] = stats["total_flush_ms"] / batches if batches else 0.0
+        for key in ("last_flush_ms", "max_flush_ms", "total_flush_ms", "avg_flush_ms"):
+            stats[key] = round(stats[key], 3)
+        stats.update({
+            "mode": self.mode,
+            "queue_depth": self._queue.qsize(),
+            "max_size": self._queue.maxsize
+        })
+        return stats
+
+
+def register_for_shutdown(write_queue):
+    """Flush a queue when the interpreter exits"""
+    atexit.register(write_queue.close)
+    return write_queue